@@ -0,0 +1,6 @@
+"""Build and maintenance tools for the curriculum and practice JSON content.
+
+Every tool can be run as a module from the repository root, for example::
+
+    python -m content_tools.patch data/curriculum/c.json c1 lesson.json
+"""
@@ -0,0 +1,441 @@
+"""Optimize the images lessons reference and map them to hashed files.
+
+Every ``![..](/x.png)`` in the curriculum is resolved under ``public/``.
+Identical files are processed once, whatever path they are referenced
+by, and written to ``public/content/img``::
+
+    manifest.json                 original ref -> src, width, height, srcset
+    <hash>.png / .jpg             fallback image (losslessly recompressed)
+    <hash>.<width>.webp           responsive lossless WebP variants (Pillow only)
+
+Pillow (``pip install -r requirements-content.txt``) is required for the
+WebP variants: images wider than a variant width get resized WebP variants
+plus a PNG fallback capped at the largest width. ``--no-pillow`` runs the
+pure-Python pipeline instead, which only de-duplicates and losslessly
+shrinks PNGs (metadata chunks dropped, fast-compressed image data
+re-deflated at level 9); without Pillow and without that flag the command
+fails rather than silently shipping full-size images.
+
+Results are cached by source hash in ``.content-cache/assets.json``, so a
+re-run only hashes the sources. ``content_tools.shard`` uses the manifest
+to point lesson content at the hashed files. The run also reports
+duplicate files and images under ``public/`` whose path no lesson or
+source file mentions.
+
+Usage::
+
+    python -m content_tools.assets [--out public/content/img] [-j N] [--no-pillow]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import re
+import struct
+import sys
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .common import (
+    CACHE_DIR,
+    CURRICULUM_DIR,
+    HASH_LENGTH,
+    PUBLIC_DIR,
+    REPO_ROOT,
+    dump_json,
+    image_refs,
+    load_cache,
+    load_json,
+    parallel_map,
+    replace_image_refs,
+    sha256_file,
+    write_atomic,
+    write_if_changed,
+)
+
+try:
+    from PIL import Image
+except ImportError:  # optional: no resizing or WebP variants without it
+    Image = None
+
+OUTPUT_DIR = PUBLIC_DIR / "content" / "img"
+URL_PREFIX = "/content/img/"
+CACHE_FILE = CACHE_DIR / "assets.json"
+MANIFEST_VERSION = 1
+WIDTHS = (480, 960, 1440)
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+POOL_THRESHOLD = 4
+# Text files searched for mentions of otherwise unreferenced images.
+SOURCE_SUFFIXES = (".ts", ".tsx", ".js", ".jsx", ".cjs", ".mjs", ".html", ".css", ".json", ".md")
+SKIP_DIRS = {".git", "node_modules", "android", "dist", ".content-cache", ".content-store"}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Chunks that change how a PNG renders; everything else is metadata.
+PNG_KEEP = {b"IHDR", b"PLTE", b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP", b"sBIT", b"IEND"}
+
+
+def sniff(data: bytes) -> str | None:
+    """Image format by magic bytes (c_hero.png, for one, is a JPEG)."""
+    if data.startswith(PNG_SIGNATURE):
+        return "png"
+    if data.startswith(b"\xff\xd8"):
+        return "jpeg"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def image_size(data: bytes) -> tuple[int, int] | None:
+    kind = sniff(data)
+    if kind == "png":
+        return struct.unpack(">II", data[16:24])
+    if kind == "gif":
+        return struct.unpack("<HH", data[6:10])
+    if kind == "jpeg":
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                i += 1
+                continue
+            marker = data[i + 1]
+            length = struct.unpack(">H", data[i + 2:i + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[i + 5:i + 9])
+                return width, height
+            i += 2 + length
+    return None
+
+
+def _png_chunks(data: bytes):
+    i = len(PNG_SIGNATURE)
+    while i + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[i:i + 8])
+        yield kind, data[i + 8:i + 8 + length]
+        i += 12 + length
+
+
+def _png_chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I4s", len(body), kind) + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def optimize_png(data: bytes) -> bytes:
+    """Drop metadata chunks and re-deflate fast-compressed image data at level 9.
+
+    Lossless: the decoded pixels are unchanged. Data already deflated at the
+    default level or above is left alone, since level 9 barely beats it and
+    takes seconds per large diagram. Returns ``data`` itself when the result
+    is not smaller.
+    """
+    chunks, idat = [], []
+    for kind, body in _png_chunks(data):
+        if kind == b"IDAT":
+            if not idat:
+                chunks.append((b"IDAT", None))
+            idat.append(body)
+        elif kind in PNG_KEEP:
+            chunks.append((kind, body))
+    packed = b"".join(idat)
+    # FLEVEL, the top two bits of the zlib FLG byte: 0 fastest .. 3 maximum.
+    if len(packed) > 2 and packed[1] >> 6 < 2:
+        try:
+            packed = zlib.compress(zlib.decompress(packed), 9)
+        except zlib.error:
+            return data
+    out = PNG_SIGNATURE + b"".join(_png_chunk(k, packed if b is None else b) for k, b in chunks)
+    return out if len(out) < len(data) else data
+
+
+@dataclass
+class Processed:
+    sha: str
+    src: str
+    width: int | None
+    height: int | None
+    srcset: list[list[Any]] = field(default_factory=list)  # [[url, width], ...]
+    files: list[str] = field(default_factory=list)
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+    def manifest_entry(self) -> dict:
+        entry: dict[str, Any] = {"src": self.src, "width": self.width, "height": self.height}
+        if self.srcset:
+            entry["srcset"] = ", ".join(f"{url} {w}w" for url, w in self.srcset)
+        return entry
+
+
+def _pillow_variants(data: bytes, stem: str, out_dir: Path, kind: str) -> tuple[list, list[str], int, bytes | None]:
+    """Write the WebP variants; also return a downsized PNG fallback if one is needed."""
+    srcset, files, written = [], [], 0
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        widths = [w for w in WIDTHS if w < img.width] + ([img.width] if img.width <= WIDTHS[-1] else [])
+        for width in widths:
+            height = round(img.height * width / img.width)
+            variant = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, "WEBP", lossless=True, method=6)
+            name = f"{stem}.{width}.webp"
+            written += len(buffer.getvalue())
+            write_if_changed(out_dir / name, buffer.getvalue())
+            srcset.append([URL_PREFIX + name, width])
+            files.append(name)
+        if kind == "png" and img.width > WIDTHS[-1]:
+            fallback = img.resize((WIDTHS[-1], round(img.height * WIDTHS[-1] / img.width)), Image.LANCZOS)
+            buffer = io.BytesIO()
+            fallback.save(buffer, "PNG", optimize=True)
+            return srcset, files, written, buffer.getvalue()
+    return srcset, files, written, None
+
+
+def process_image(job: tuple[str, str, str, bool]) -> Processed:
+    """Write the optimized files for one unique source image (runs in the pool)."""
+    path, sha, out_dir, use_pillow = job
+    out_dir = Path(out_dir)
+    data = Path(path).read_bytes()
+    kind = sniff(data)
+    stem = sha[:HASH_LENGTH]
+    size = image_size(data)
+    srcset, files, written = [], [], 0
+
+    fallback = data
+    if use_pillow and kind in ("png", "jpeg", "webp"):
+        srcset, files, written, resized = _pillow_variants(data, stem, out_dir, kind)
+        if resized is not None:
+            fallback = resized
+            size = image_size(resized)
+    if kind == "png":
+        fallback = optimize_png(fallback)
+    ext = {"png": ".png", "jpeg": ".jpg", "gif": ".gif", "webp": ".webp"}.get(kind, Path(path).suffix)
+    name = stem + ext
+    write_if_changed(out_dir / name, fallback)
+    files.append(name)
+    width, height = size if size else (None, None)
+    return Processed(sha, URL_PREFIX + name, width, height, srcset, files, len(data), written + len(fallback))
+
+
+def lesson_image_refs(files: list[Path] | None = None) -> dict[str, list[str]]:
+    """``{image ref: [lesson ids]}`` over lesson content and backup content."""
+    refs: dict[str, list[str]] = {}
+    for path in files or sorted(CURRICULUM_DIR.glob("*.json")):
+        for level in load_json(path):
+            for lesson in level.get("lessons", []):
+                for key in ("content", "backupContent"):
+                    if isinstance(lesson.get(key), str):
+                        for ref in image_refs(lesson[key]):
+                            refs.setdefault(ref, []).append(lesson.get("id", "?"))
+    return refs
+
+
+def resolve(ref: str) -> Path | None:
+    """The file under public/ a site-absolute image ref points to."""
+    if not ref.startswith("/") or ref.startswith("//"):
+        return None
+    path = (PUBLIC_DIR / ref.split("?")[0].split("#")[0].lstrip("/")).resolve()
+    return path if path.is_file() and PUBLIC_DIR.resolve() in path.parents else None
+
+
+def public_images() -> list[Path]:
+    skip = OUTPUT_DIR.resolve()
+    return sorted(
+        p.resolve() for p in PUBLIC_DIR.rglob("*")
+        if p.suffix.lower() in IMAGE_SUFFIXES and p.is_file() and skip not in p.resolve().parents
+    )
+
+
+def _pipeline(use_pillow: bool) -> str:
+    return f"1-{'pillow' if use_pillow else 'pure'}"
+
+
+def _source_text() -> str:
+    chunks = []
+    for root, dirs, names in os.walk(REPO_ROOT):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and Path(root, d).resolve() != OUTPUT_DIR.parent.resolve()]
+        for name in names:
+            if name.endswith(SOURCE_SUFFIXES):
+                try:
+                    chunks.append(Path(root, name).read_text(encoding="utf-8", errors="ignore"))
+                except OSError:
+                    pass
+    return "\n".join(chunks)
+
+
+@dataclass
+class AssetReport:
+    images: dict[str, dict]
+    processed: int
+    bytes_in: int
+    bytes_out: int
+    missing: dict[str, list[str]]
+    duplicates: list[list[str]]
+    unreferenced: list[str]
+
+
+def _load_cache(pipeline: str) -> dict:
+    cache = load_cache(CACHE_FILE)
+    cache.setdefault("files", {})
+    if cache.get("pipeline") != pipeline:
+        cache["images"] = {}
+    cache["pipeline"] = pipeline
+    return cache
+
+
+def mentioned_paths(paths: list[str], text: str) -> set[str]:
+    """The public paths (``icons/logo.png``) that ``text`` mentions as a path:
+    ``/icons/logo.png``, ``public/icons/logo.png`` or ``icons/logo.png``, but
+    not ``logo.png`` alone or ``/other/icons/logo.png``."""
+    if not paths:
+        return set()
+    alternatives = "|".join(re.escape(p) for p in sorted(paths, key=len, reverse=True))
+    pattern = re.compile(rf"(?<![\w./-])(?:/|\./|public/)?({alternatives})(?![\w./-])")
+    return {m.group(1) for m in pattern.finditer(text)}
+
+
+def _hash(path: Path, cache: dict) -> str:
+    stat = path.stat()
+    key = str(path)
+    entry = cache["files"].get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha"]
+    sha = sha256_file(path)
+    cache["files"][key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha": sha}
+    return sha
+
+
+def build(
+    out_dir: Path = OUTPUT_DIR, jobs: int | None = None, use_cache: bool = True, prune: bool = True,
+    use_pillow: bool = Image is not None,
+) -> AssetReport:
+    if use_pillow and Image is None:
+        raise ImportError("Pillow is not installed; pass use_pillow=False")
+    out_dir = Path(out_dir)
+    pipeline = _pipeline(use_pillow)
+    cache = _load_cache(pipeline) if use_cache else {"pipeline": pipeline, "files": {}, "images": {}}
+    refs = lesson_image_refs()
+    resolved: dict[str, Path] = {}
+    missing = {}
+    for ref, lessons in refs.items():
+        path = resolve(ref)
+        if path is None:
+            if ref.startswith("/"):
+                missing[ref] = lessons
+        else:
+            resolved[ref] = path
+
+    all_images = public_images()
+    shas = {path: _hash(path, cache) for path in {*resolved.values(), *all_images}}
+    by_sha: dict[str, list[Path]] = {}
+    for path, sha in shas.items():
+        by_sha.setdefault(sha, []).append(path)
+    duplicates = [
+        sorted("/" + p.relative_to(PUBLIC_DIR.resolve()).as_posix() for p in paths)
+        for paths in by_sha.values() if len(paths) > 1
+    ]
+
+    wanted = {shas[path]: path for path in resolved.values()}
+    results: dict[str, Processed] = {}
+    jobs_todo = []
+    for sha, path in sorted(wanted.items()):
+        hit = cache["images"].get(sha)
+        if hit and all((out_dir / name).exists() for name in hit["files"]):
+            results[sha] = Processed(**hit)
+        else:
+            jobs_todo.append((str(path), sha, str(out_dir), use_pillow))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    done = parallel_map(process_image, jobs_todo, jobs, POOL_THRESHOLD)
+    for item in done:
+        results[item.sha] = item
+        cache["images"][item.sha] = item.__dict__
+
+    images = {ref: results[shas[path]].manifest_entry() for ref, path in sorted(resolved.items())}
+    write_if_changed(out_dir / "manifest.json", dump_json({"version": MANIFEST_VERSION, "images": images}).encode("utf-8"))
+    if use_cache:
+        write_atomic(CACHE_FILE, dump_json(cache).encode("utf-8"))
+
+    if prune:
+        live = {"manifest.json"} | {name for item in results.values() for name in item.files}
+        for path in out_dir.iterdir():
+            if path.is_file() and path.name not in live:
+                path.unlink()
+
+    referenced = set(resolved.values())
+    candidates = {p.relative_to(PUBLIC_DIR.resolve()).as_posix(): p for p in all_images if p not in referenced}
+    mentioned = mentioned_paths(list(candidates), _source_text())
+    unreferenced = ["/" + rel for rel in candidates if rel not in mentioned]
+    return AssetReport(
+        images,
+        len(done),
+        sum(item.bytes_in for item in results.values()),
+        sum(item.bytes_out for item in results.values()),
+        missing,
+        sorted(duplicates),
+        sorted(unreferenced),
+    )
+
+
+def load_map(out_dir: Path = OUTPUT_DIR) -> dict[str, dict]:
+    """The ref -> image map of the last asset build (empty if there is none)."""
+    try:
+        return load_json(Path(out_dir) / "manifest.json")["images"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def rewrite_markdown(markdown: str, images: dict[str, dict]) -> str:
+    """Point image refs in lesson Markdown at their optimized files."""
+    return replace_image_refs(markdown, lambda ref: images[ref]["src"] if ref in images else None)
+
+
+def annotate_tree(node: Any, images: dict[str, dict]) -> None:
+    """Add width/height/srcset to the image nodes of a rendered lesson."""
+    by_src = {entry["src"]: entry for entry in images.values()}
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            entry = by_src.get(current.get("src")) if current.get("t") == "img" else None
+            if entry:
+                current.update({k: v for k, v in entry.items() if k != "src" and v is not None})
+            children = current.get("c")
+            if isinstance(children, list):
+                stack.extend(children)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.assets", description=__doc__.split("\n")[0])
+    parser.add_argument("--out", type=Path, default=OUTPUT_DIR, help="output directory (default: public/content/img)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--no-cache", action="store_true", help="reprocess every image")
+    parser.add_argument(
+        "--no-pillow", action="store_true", help="skip WebP variants and resizing (required when Pillow is missing)"
+    )
+    args = parser.parse_args(argv)
+
+    if Image is None and not args.no_pillow:
+        print(
+            "error: Pillow is required for the WebP variants; run `pip install -r requirements-content.txt` "
+            "or pass --no-pillow to only recompress PNGs",
+            file=sys.stderr,
+        )
+        return 1
+    report = build(args.out, args.jobs, use_cache=not args.no_cache, use_pillow=not args.no_pillow)
+    unique = len({entry["src"] for entry in report.images.values()})
+    print(f"{len(report.images)} referenced image(s), {unique} unique, {report.processed} processed")
+    print(f"{report.bytes_in:,} B -> {report.bytes_out:,} B")
+    for ref, lessons in sorted(report.missing.items()):
+        print(f"missing: {ref} (lessons {', '.join(lessons)})")
+    for group in report.duplicates:
+        print(f"identical: {', '.join(group)}")
+    for ref in report.unreferenced:
+        print(f"unreferenced: {ref}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,381 @@
+"""Benchmark the content toolchain on generated content at several scales.
+
+For each scale factor a checkout-shaped tree is generated in a temporary
+directory from the real content: every level and lesson of each curriculum
+file, every problem of each practice topic and of the practice bundles is
+repeated ``factor`` times with suffixed ids, so files grow the way they
+would with more content (repeat ``n`` gets ids like ``c1-x3``). The
+tools then run against that tree (``CONTENT_TOOLS_ROOT``) one stage at a
+time, each in its own process, twice: ``cold`` (empty caches) and ``warm``.
+
+Per run the report records wall time, the stage's peak RSS (``VmHWM``,
+or ``wait4`` where ``/proc`` is missing), and the bytes and files it created or changed. With
+``--tracemalloc`` it also records the peak traced Python allocation and
+the top allocation sites; with ``--profile DIR`` each run writes a cProfile
+dump there (``<stage>-x<factor>-<run>.prof``, readable with ``pstats``).
+
+``--report`` writes everything as JSON, and ``--compare OLD.json`` exits 1
+when a stage got slower than ``--threshold`` times the old wall time.
+
+Usage::
+
+    python -m content_tools.bench [--factors 1,10,100] [--stages shard,search]
+    python -m content_tools.bench --report bench.json --compare last-release.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import importlib.util
+import json
+import os
+import platform
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .common import CURRICULUM_DIR, PRACTICE_DIR, PUBLIC_DIR, REPO_ROOT, dump_json, load_json
+
+REPORT_VERSION = 1
+DEFAULT_FACTORS = (1, 10)
+# Slowdowns of stages faster than this are noise, not regressions.
+MIN_COMPARE_SECONDS = 0.05
+ESCAPE_SOURCE = "lesson_sources"
+
+# name -> command, relative to the generated tree. "-m" runs a module,
+# a .py path a script, "node" a Node script (no Python profiling hooks).
+STAGES: dict[str, list[str]] = {
+    "validate": ["-m", "content_tools.validate", "-q"],
+    "jsonindex": ["-m", "content_tools.jsonindex"],
+    "repair": ["repair_c_json.py"],
+    "escape": [str(REPO_ROOT / "escape_content.py"), "--bulk", ESCAPE_SOURCE],
+    "render": ["-m", "content_tools.render", "--all"],
+    # Without Pillow the assets stage refuses to run unless told to skip it.
+    "assets": ["-m", "content_tools.assets", *([] if importlib.util.find_spec("PIL") else ["--no-pillow"])],
+    "shard": ["-m", "content_tools.shard"],
+    "search": ["-m", "content_tools.search", "build"],
+    "practice": ["-m", "content_tools.practice"],
+    "practice-bundle": [
+        "-m", "content_tools.practice", "--split-bundle", "public/practice_content.json",
+        "--source", "public/practice_bundle", "--out", "public/content/practice_bundle",
+    ],
+    "delta": ["-m", "content_tools.delta", "release"],
+    # A store of its own: escape and repair already record into .content-store.
+    "snapshot": ["-m", "content_tools.snapshot", "--store", ".bench-store", "record", "-m", "bench"],
+    "sync_practice": ["node", "scripts/sync_practice.cjs"],
+}
+
+
+def _renamed(item: Any, n: int) -> Any:
+    """``item`` with its id suffixed for repeat ``n`` (repeat 0 keeps the real ids)."""
+    if n == 0 or not isinstance(item, dict) or not isinstance(item.get("id"), str):
+        return item
+    return {**item, "id": f"{item['id']}-x{n}"}
+
+
+def _repeat_items(items: list[dict], factor: int) -> list[dict]:
+    return [_renamed(item, n) for n in range(factor) for item in items]
+
+
+def scale_curriculum(levels: list[dict], factor: int) -> list[dict]:
+    return [
+        {**_renamed(level, n), "lessons": [_renamed(lesson, n) for lesson in level.get("lessons", [])]}
+        for n in range(factor)
+        for level in levels
+    ]
+
+
+def generate(root: Path, factor: int) -> int:
+    """Write a scaled copy of the content under ``root``; return its size in bytes."""
+    curriculum = root / "data" / "curriculum"
+    practice = root / "public" / "practice"
+    curriculum.mkdir(parents=True)
+    practice.mkdir(parents=True)
+
+    for path in CURRICULUM_DIR.glob("*.json"):
+        (curriculum / path.name).write_text(dump_json(scale_curriculum(load_json(path), factor)), encoding="utf-8")
+    for path in PRACTICE_DIR.glob("*.json"):
+        doc = load_json(path)
+        if isinstance(doc, dict) and isinstance(doc.get("problems"), list):
+            doc = {**doc, "problems": _repeat_items(doc["problems"], factor)}
+        (practice / path.name).write_text(dump_json(doc), encoding="utf-8")
+
+    bundle = load_json(PUBLIC_DIR / "practice_content.json")
+    bundle["problems"] = _repeat_items(bundle["problems"], factor)
+    (root / "public" / "practice_content.json").write_text(dump_json(bundle), encoding="utf-8")
+    languages = load_json(REPO_ROOT / "data" / "practice_content.json")
+    for language in languages["languages"].values():
+        for topic in language["topics"]:
+            topic["problems"] = _repeat_items(topic.get("problems", []), factor)
+    (root / "data" / "practice_content.json").write_text(dump_json(languages), encoding="utf-8")
+
+    for image in PUBLIC_DIR.rglob("*"):
+        if image.suffix.lower() in (".png", ".jpg", ".jpeg") and "content" not in image.relative_to(PUBLIC_DIR).parts:
+            target = root / "public" / image.relative_to(PUBLIC_DIR)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(image, target)
+    shutil.copyfile(REPO_ROOT / "repair_c_json.py", root / "repair_c_json.py")
+    (root / "scripts").mkdir()
+    shutil.copyfile(REPO_ROOT / "scripts" / "sync_practice.cjs", root / "scripts" / "sync_practice.cjs")
+
+    # One edited Markdown source per c lesson, so the escaper has work to do.
+    sources = root / ESCAPE_SOURCE
+    sources.mkdir()
+    for level in load_json(curriculum / "c.json"):
+        for lesson in level["lessons"]:
+            if isinstance(lesson.get("content"), str):
+                (sources / f"{lesson['id']}.md").write_text(lesson["content"] + "\n\nEdited.", encoding="utf-8")
+
+    return sum(p.stat().st_size for d in (curriculum, practice) for p in d.glob("*.json"))
+
+
+def _tree_state(root: Path) -> dict[str, tuple[int, int]]:
+    state = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(folder, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (stat.st_size, stat.st_mtime_ns)
+    return state
+
+
+@dataclass
+class Run:
+    factor: int
+    stage: str
+    run: str
+    wall_s: float
+    peak_rss_mb: float
+    bytes_written: int
+    files_written: int
+    exit_code: int
+    tracemalloc_peak_mb: float | None = None
+    top_allocations: list[str] | None = None
+    profile: str | None = None
+
+
+def run_stage(
+    root: Path, factor: int, stage: str, run: str, profile_dir: Path | None = None, trace: bool = False
+) -> Run:
+    command = STAGES[stage]
+    result_file = root / ".bench-child.json"
+    profile = None
+    if command[0] == "node":
+        if not shutil.which("node"):
+            return Run(factor, stage, run, 0.0, 0.0, 0, 0, -1)
+        argv = [shutil.which("node"), *command[1:]]
+    else:
+        argv = [sys.executable, "-m", "content_tools.bench", "_child"]
+        if profile_dir:
+            profile = str(Path(profile_dir).resolve() / f"{stage}-x{factor}-{run}.prof")
+            argv += ["--profile", profile]
+        if trace:
+            argv.append("--tracemalloc")
+        argv += [str(result_file), "--", *command]
+
+    env = {**os.environ, "CONTENT_TOOLS_ROOT": str(root), "PYTHONPATH": str(REPO_ROOT)}
+    before = _tree_state(root)
+    # stderr goes to a file: nobody reads a pipe until wait4 returns, so a
+    # chatty stage would fill it and block.
+    with tempfile.TemporaryFile() as errors:
+        start = time.perf_counter()
+        proc = subprocess.Popen(argv, cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=errors)
+        # wait4 instead of Popen.wait for the fallback peak RSS (node, no /proc).
+        _pid, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        errors.seek(0)
+        stderr = errors.read().decode("utf-8", "replace")
+    if proc.returncode:
+        print(f"warning: {stage} x{factor} ({run}) exited {proc.returncode}: {stderr.strip()[-500:]}", file=sys.stderr)
+
+    after = _tree_state(root)
+    child: dict[str, Any] = {}
+    if result_file.exists():
+        child = json.loads(result_file.read_text(encoding="utf-8"))
+        result_file.unlink()
+        after.pop(str(result_file), None)
+    changed = [path for path, state in after.items() if before.get(path) != state]
+    rss = child.get("peak_rss_mb") or usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return Run(
+        factor, stage, run, round(wall, 4), round(rss, 1),
+        sum(after[p][0] for p in changed), len(changed), proc.returncode,
+        child.get("tracemalloc_peak_mb"), child.get("top_allocations"), profile,
+    )
+
+
+def _peak_rss_mb() -> float | None:
+    """This process's high-water RSS since exec.
+
+    Preferred over ``wait4``'s ``ru_maxrss``, which on Linux also counts the
+    parent's footprint at fork time (the generated content, at large factors).
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _child(argv: list[str]) -> int:
+    """Run one stage in this process with the requested instrumentation."""
+    parser = argparse.ArgumentParser(prog="python -m content_tools.bench _child")
+    parser.add_argument("result", type=Path)
+    parser.add_argument("--profile", type=Path)
+    parser.add_argument("--tracemalloc", action="store_true")
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+
+    if args.tracemalloc:
+        tracemalloc.start(10)
+    profiler = cProfile.Profile() if args.profile else None
+    code = 0
+    try:
+        if profiler:
+            profiler.enable()
+        if command[0] == "-m":
+            sys.argv = [command[1], *command[2:]]
+            runpy.run_module(command[1], run_name="__main__", alter_sys=True)
+        else:
+            sys.argv = command
+            runpy.run_path(command[0], run_name="__main__")
+    except SystemExit as exc:
+        code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(str(args.profile))
+
+    result: dict[str, Any] = {"peak_rss_mb": _peak_rss_mb()}
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().statistics("lineno")[:10]
+        result["tracemalloc_peak_mb"] = round(peak / 1e6, 1)
+        result["top_allocations"] = [f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size / 1e6:.1f} MB" for s in stats]
+    args.result.write_text(json.dumps(result), encoding="utf-8")
+    return code
+
+
+def benchmark(
+    factors: list[int], stages: list[str], profile_dir: Path | None = None, trace: bool = False,
+    workdir: Path | None = None,
+) -> dict:
+    runs: list[Run] = []
+    inputs = {}
+    for factor in factors:
+        if workdir:
+            root = Path(workdir) / f"x{factor}"
+            shutil.rmtree(root, ignore_errors=True)
+            root.mkdir(parents=True)
+            context = None
+        else:
+            context = tempfile.TemporaryDirectory(prefix=f"content-bench-x{factor}-")
+            root = Path(context.name)
+        try:
+            inputs[factor] = generate(root, factor)
+            for stage in stages:
+                for run in ("cold", "warm"):
+                    result = run_stage(root, factor, stage, run, profile_dir, trace)
+                    runs.append(result)
+                    print(_format_row(result, inputs[factor]), flush=True)
+        finally:
+            if context:
+                context.cleanup()
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pillow": importlib.util.find_spec("PIL") is not None,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "input_bytes": {str(f): size for f, size in inputs.items()},
+        "runs": [asdict(r) for r in runs],
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def _format_row(run: Run, input_bytes: int) -> str:
+    extra = f"  traced {run.tracemalloc_peak_mb} MB" if run.tracemalloc_peak_mb is not None else ""
+    status = "" if run.exit_code == 0 else f"  exit {run.exit_code}"
+    return (
+        f"x{run.factor:<4} {input_bytes / 1e6:>7.1f} MB  {run.stage:<16} {run.run:<5} "
+        f"{run.wall_s:>8.3f} s {run.peak_rss_mb:>8.1f} MB rss {run.bytes_written / 1e6:>9.2f} MB "
+        f"in {run.files_written:>6} file(s){extra}{status}"
+    )
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[str]:
+    """Stages whose wall time grew by more than ``threshold`` times."""
+    previous = {(r["factor"], r["stage"], r["run"]): r for r in old["runs"]}
+    regressions = []
+    for run in new["runs"]:
+        base = previous.get((run["factor"], run["stage"], run["run"]))
+        if not base or base["wall_s"] < MIN_COMPARE_SECONDS:
+            continue
+        ratio = run["wall_s"] / base["wall_s"]
+        if ratio > threshold:
+            regressions.append(
+                f"{run['stage']} x{run['factor']} {run['run']}: {base['wall_s']:.3f}s -> {run['wall_s']:.3f}s ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    if argv[:1] == ["_child"]:
+        return _child(argv[1:])
+    parser = argparse.ArgumentParser(prog="python -m content_tools.bench", description=__doc__.split("\n")[0])
+    parser.add_argument("--factors", default=",".join(map(str, DEFAULT_FACTORS)), help="scale factors (default: 1,10)")
+    parser.add_argument("--stages", help=f"comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument("--profile", type=Path, metavar="DIR", help="write a cProfile dump per run into DIR")
+    parser.add_argument("--tracemalloc", action="store_true", help="record peak traced memory and top allocation sites")
+    parser.add_argument("--workdir", type=Path, help="generate content here and keep it (default: a temp dir)")
+    parser.add_argument("--report", type=Path, help="write the JSON report here")
+    parser.add_argument("--compare", type=Path, metavar="OLD", help="fail on slowdowns against an earlier report")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown for --compare (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    if args.profile:
+        args.profile.mkdir(parents=True, exist_ok=True)
+
+    report = benchmark([int(f) for f in args.factors.split(",")], stages, args.profile, args.tracemalloc, args.workdir)
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"report written to {args.report}")
+    if args.compare:
+        regressions = compare(load_json(args.compare), report, args.threshold)
+        for line in regressions:
+            print(f"regression: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
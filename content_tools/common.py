@@ -0,0 +1,139 @@
+"""Shared paths and file helpers for the content tools."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+
+# CONTENT_TOOLS_ROOT points the tools at another checkout-shaped tree (the
+# benchmark suite runs them against generated content this way).
+REPO_ROOT = Path(os.environ.get("CONTENT_TOOLS_ROOT") or Path(__file__).resolve().parent.parent).resolve()
+CURRICULUM_DIR = REPO_ROOT / "data" / "curriculum"
+PUBLIC_DIR = REPO_ROOT / "public"
+PRACTICE_DIR = PUBLIC_DIR / "practice"
+CACHE_DIR = REPO_ROOT / ".content-cache"
+# Hex digits of the SHA-256 kept in content-addressed output file names.
+HASH_LENGTH = 16
+
+# Curriculum files that are not shipped as a language course.
+NON_COURSE_FILES = {"schema_example.json", "python_complete.json"}
+
+
+def curriculum_files(curriculum_dir: Path = CURRICULUM_DIR) -> list[Path]:
+    """Return the language curriculum files (c.json, cpp.json, ...)."""
+    return sorted(
+        p for p in curriculum_dir.glob("*.json")
+        if p.name not in NON_COURSE_FILES
+    )
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: Path) -> str:
+    return sha256_bytes(Path(path).read_bytes())
+
+
+def dump_json(value: Any) -> str:
+    """Serialize exactly like the checked-in content (2-space indent, UTF-8)."""
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def dump_json_compact(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_json(path: Path) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_cache(path: Path, version: int | None = None) -> dict:
+    """Read a JSON cache file, or ``{}`` if it is missing, unreadable or was
+    written with a different ``version``."""
+    try:
+        cache = load_json(path)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or (version is not None and cache.get("version") != version):
+        return {}
+    return cache
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` via a temp file and rename, so readers never
+    see a half-written file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Atomically write ``data`` unless the file already holds it."""
+    path = Path(path)
+    if path.exists() and path.read_bytes() == data:
+        return False
+    write_atomic(path, data)
+    return True
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def parallel_map(fn: Callable[[T], R], items: Iterable[T], jobs: int | None, threshold: int, chunksize: int = 1) -> list[R]:
+    """``[fn(item) for item in items]``, spread over ``jobs`` worker processes
+    (default: CPU count) when there are at least ``threshold`` items. Below
+    that, or with ``jobs == 1``, a process pool costs more than it saves."""
+    items = list(items)
+    if len(items) < threshold or jobs == 1:
+        return [fn(item) for item in items]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(fn, items, chunksize=chunksize))
+
+
+_FENCE = re.compile(r"```.*?(?:```|\Z)", re.S)
+_IMAGE_REF = re.compile(r"!\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+
+
+def image_refs(markdown: str) -> list[str]:
+    """Return the targets of ``![alt](src)`` images outside fenced code."""
+    return _IMAGE_REF.findall(_FENCE.sub("", markdown))
+
+
+def replace_image_refs(markdown: str, replace: Callable[[str], str | None]) -> str:
+    """Rewrite image targets outside fenced code; ``replace`` returns the new
+    target, or None to keep the old one."""
+
+    def sub(m: re.Match) -> str:
+        new = replace(m.group(1))
+        if new is None:
+            return m.group(0)
+        start, end = m.start(1) - m.start(), m.end(1) - m.start()
+        return m.group(0)[:start] + new + m.group(0)[end:]
+
+    parts, pos = [], 0
+    for fence in _FENCE.finditer(markdown):
+        parts += [_IMAGE_REF.sub(sub, markdown[pos:fence.start()]), fence.group()]
+        pos = fence.end()
+    parts.append(_IMAGE_REF.sub(sub, markdown[pos:]))
+    return "".join(parts)
@@ -0,0 +1,363 @@
+"""Publish curriculum and practice releases as a chain of small patches.
+
+Each curriculum language file and each practice topic file is a
+*collection* with its own version number. ``release`` compares the current
+content with the latest published snapshot, keyed by level/topic id and
+lesson/problem id, and when anything changed writes a patch from the old
+version to the new one plus a fresh snapshot::
+
+    manifest.json                     collection -> version, hash, snapshot, patches
+    <name>.v<N>.<hash>.json           full snapshot of the latest version
+    <name>.<N>-<N+1>.<hash>.json      patch between two consecutive versions
+
+The chain lives in ``data/delta`` and is committed with the content it
+describes, so a clean checkout continues it instead of starting again at
+version 1. ``publish`` copies it, with precompressed siblings, to the
+served directory (default ``public/content/delta``); ``release`` does both.
+
+A client holding version N fetches ``manifest.json`` and applies the
+patches from N to the latest version, or downloads the snapshot when it has
+no version, its copy of N does not have the hash N was published with
+(a release that was never committed), a patch is missing from the chain
+(only the last ``--keep`` are kept) or the patches add up to more bytes
+than the snapshot. ``hash`` is the SHA-256 (first 16 hex digits) of the
+canonical JSON (sorted keys, no whitespace) of each version, so a client
+can also verify the patched result.
+
+Patch format::
+
+    {"from": 4, "to": 5,
+     "groups": {"l1": {...level fields without lessons...}, "l9": null},
+     "items": {"c1": {"group": "l1", "set": {"content": "..."}, "unset": ["backupContent"]},
+               "c99": {"group": "l9", "value": {...new lesson...}},
+               "c42": null},
+     "order": {"groups": ["l1", ...], "items": {"l1": ["c1", "c2", ...]}}}
+
+``groups``/``items`` entries set to ``null`` are removed. ``order`` only lists
+what changed. Items that moved between groups carry their new ``group``.
+
+``diff OLD NEW`` compares two builds of one collection directly.
+
+Usage::
+
+    python -m content_tools.delta release [--state data/delta] [--out public/content/delta] [--keep 30]
+    python -m content_tools.delta publish [--state data/delta] [--out public/content/delta]
+    python -m content_tools.delta diff old/c.json data/curriculum/c.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from .common import (
+    HASH_LENGTH,
+    PRACTICE_DIR,
+    PUBLIC_DIR,
+    REPO_ROOT,
+    curriculum_files,
+    dump_json_compact,
+    load_json,
+    sha256_bytes,
+    write_if_changed,
+)
+from .practice import load_topics, topic_meta, with_siblings, write_compressed
+
+STATE_DIR = REPO_ROOT / "data" / "delta"
+OUTPUT_DIR = PUBLIC_DIR / "content" / "delta"
+MANIFEST_VERSION = 1
+DEFAULT_KEEP = 30
+_MISSING = object()
+
+
+class DeltaError(ValueError):
+    """A patch does not apply to the document it was given."""
+
+
+def canonical_hash(doc: Any) -> str:
+    data = json.dumps(doc, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return sha256_bytes(data.encode("utf-8"))[:HASH_LENGTH]
+
+
+def split_groups(doc: Any) -> list[tuple[str, dict, list[dict]]]:
+    """Return ``(group id, group fields, items)`` for a curriculum file (a list
+    of levels) or a practice topic (a single group of problems)."""
+    if isinstance(doc, dict):
+        return [(str(topic_meta(doc)["id"]), {k: v for k, v in doc.items() if k != "problems"}, doc.get("problems", []))]
+    return [(str(level["id"]), {k: v for k, v in level.items() if k != "lessons"}, level.get("lessons", []))
+            for level in doc]
+
+
+def join_groups(groups: list[tuple[str, dict, list[dict]]], topic: bool) -> Any:
+    if topic:
+        (_, meta, items), = groups
+        return {**meta, "problems": items}
+    return [{**meta, "lessons": items} for _, meta, items in groups]
+
+
+def _items_by_id(groups: list[tuple[str, dict, list[dict]]]) -> dict[str, tuple[str, dict]]:
+    items = {}
+    for gid, _, group_items in groups:
+        for item in group_items:
+            if item.get("id") in items or "id" not in item:
+                raise DeltaError(f"item ids are not unique in group {gid!r}: {item.get('id')!r}")
+            items[item["id"]] = (gid, item)
+    return items
+
+
+def diff(old: Any, new: Any) -> dict:
+    """Return the patch that turns ``old`` into ``new`` (without from/to).
+
+    Raises :class:`DeltaError` when either side has duplicate or missing ids.
+    """
+    old_groups, new_groups = split_groups(old), split_groups(new)
+    old_meta = {gid: meta for gid, meta, _ in old_groups}
+    old_items = _items_by_id(old_groups)
+    new_items = _items_by_id(new_groups)
+
+    patch: dict[str, Any] = {"groups": {}, "items": {}, "order": {}}
+    for gid, meta, _ in new_groups:
+        if old_meta.get(gid) != meta:
+            patch["groups"][gid] = meta
+    for gid in old_meta.keys() - {gid for gid, _, _ in new_groups}:
+        patch["groups"][gid] = None
+
+    for item_id, (gid, item) in new_items.items():
+        previous = old_items.get(item_id)
+        if previous is None:
+            patch["items"][item_id] = {"group": gid, "value": item}
+            continue
+        old_gid, old_item = previous
+        if old_item == item and old_gid == gid:
+            continue
+        change: dict[str, Any] = {"group": gid}
+        changed = {k: v for k, v in item.items() if old_item.get(k, _MISSING) != v}
+        if changed:
+            change["set"] = changed
+        removed = [k for k in old_item if k not in item]
+        if removed:
+            change["unset"] = removed
+        patch["items"][item_id] = change
+    for item_id in old_items.keys() - new_items.keys():
+        patch["items"][item_id] = None
+
+    old_order = [gid for gid, _, _ in old_groups]
+    new_order = [gid for gid, _, _ in new_groups]
+    if old_order != new_order:
+        patch["order"]["groups"] = new_order
+    old_children = {gid: [i["id"] for i in items] for gid, _, items in old_groups}
+    changed_order = {
+        gid: [i["id"] for i in items]
+        for gid, _, items in new_groups
+        if old_children.get(gid) != [i["id"] for i in items]
+    }
+    if changed_order:
+        patch["order"]["items"] = changed_order
+    return {k: v for k, v in patch.items() if v}
+
+
+def apply(doc: Any, patch: dict) -> Any:
+    """Apply ``patch`` to ``doc`` and return the new document."""
+    groups = split_groups(doc)
+    meta = {gid: m for gid, m, _ in groups}
+    order = [gid for gid, _, _ in groups]
+    children = {gid: [i["id"] for i in items] for gid, _, items in groups}
+    items = {i["id"]: i for _, _, group_items in groups for i in group_items}
+
+    for gid, value in patch.get("groups", {}).items():
+        if value is None:
+            meta.pop(gid, None)
+        else:
+            meta[gid] = value
+    for item_id, change in patch.get("items", {}).items():
+        if change is None:
+            if item_id not in items:
+                raise DeltaError(f"cannot remove missing item {item_id!r}")
+            del items[item_id]
+        elif "value" in change:
+            items[item_id] = change["value"]
+        else:
+            if item_id not in items:
+                raise DeltaError(f"cannot update missing item {item_id!r}")
+            updated = {k: v for k, v in items[item_id].items() if k not in change.get("unset", ())}
+            updated.update(change.get("set", {}))
+            items[item_id] = updated
+
+    order = patch.get("order", {}).get("groups", order)
+    children.update(patch.get("order", {}).get("items", {}))
+    try:
+        rebuilt = [(gid, meta[gid], [items[i] for i in children.get(gid, [])]) for gid in order]
+    except KeyError as exc:
+        raise DeltaError(f"patch references unknown id {exc.args[0]!r}") from None
+    return join_groups(rebuilt, topic=isinstance(doc, dict))
+
+
+def collections() -> dict[str, Any]:
+    """The current content, one document per published collection."""
+    docs: dict[str, Any] = {path.stem: load_json(path) for path in curriculum_files()}
+    for topic in load_topics(PRACTICE_DIR):
+        path = PRACTICE_DIR / f"topic_{topic['id']}.json"
+        if path.exists():
+            docs[path.stem] = load_json(path)
+    return docs
+
+
+def _encode(value: Any) -> bytes:
+    return dump_json_compact(value).encode("utf-8")
+
+
+def _release_patch(out_dir: Path, entry: dict, doc: Any, digest: str) -> dict | None:
+    """Patch from the published snapshot to ``doc``, or None if none can be made."""
+    try:
+        previous = load_json(out_dir / entry["snapshot"])
+        patch = {"from": entry["version"], "to": entry["version"] + 1, **diff(previous, doc)}
+        if canonical_hash(apply(previous, patch)) == digest:
+            return patch
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _load_manifest(folder: Path) -> dict:
+    try:
+        return load_json(folder / "manifest.json")
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "collections": {}}
+
+
+def release(
+    out_dir: Path = OUTPUT_DIR, docs: dict[str, Any] | None = None, keep: int = DEFAULT_KEEP,
+    state_dir: Path = STATE_DIR,
+) -> dict[str, int]:
+    """Record a new version of every changed collection in ``state_dir`` and
+    publish the chain to ``out_dir``.
+
+    Returns ``{collection: new version}`` for the collections that changed.
+    """
+    state_dir = Path(state_dir)
+    manifest = _load_manifest(state_dir)
+    entries = manifest["collections"]
+    released = {}
+
+    for name, doc in sorted((docs if docs is not None else collections()).items()):
+        digest = canonical_hash(doc)
+        entry = entries.get(name)
+        if entry and entry["hash"] == digest:
+            continue
+        version = entry["version"] + 1 if entry else 1
+        patches = list(entry["patches"]) if entry else []
+        patch = _release_patch(state_dir, entry, doc, digest) if entry else None
+        if patch is None:
+            # Nothing to diff against: clients on older versions take the snapshot.
+            patches = []
+        else:
+            data = _encode(patch)
+            file = f"{name}.{entry['version']}-{version}.{sha256_bytes(data)[:HASH_LENGTH]}.json"
+            write_if_changed(state_dir / file, data)
+            patches.append({
+                "from": entry["version"], "from_hash": entry["hash"], "to": version, "file": file, "bytes": len(data),
+            })
+        snapshot = _encode(doc)
+        snapshot_file = f"{name}.v{version}.{digest}.json"
+        write_if_changed(state_dir / snapshot_file, snapshot)
+        entries[name] = {
+            "version": version,
+            "hash": digest,
+            "snapshot": snapshot_file,
+            "bytes": len(snapshot),
+            "patches": patches[-keep:] if keep else [],
+        }
+        released[name] = version
+
+    write_if_changed(state_dir / "manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+    _prune(state_dir, entries)
+    publish(state_dir, out_dir)
+    return released
+
+
+def publish(state_dir: Path = STATE_DIR, out_dir: Path = OUTPUT_DIR) -> dict:
+    """Copy the released chain to ``out_dir`` with precompressed siblings and
+    return its manifest."""
+    state_dir, out_dir = Path(state_dir), Path(out_dir)
+    manifest = _load_manifest(state_dir)
+    entries = manifest["collections"]
+    for entry in entries.values():
+        for file in [entry["snapshot"], *(p["file"] for p in entry["patches"])]:
+            write_compressed(out_dir / file, (state_dir / file).read_bytes())
+    write_if_changed(out_dir / "manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+    _prune(out_dir, entries)
+    return manifest
+
+
+def _prune(out_dir: Path, entries: dict) -> None:
+    live = {"manifest.json"}
+    for entry in entries.values():
+        live.add(entry["snapshot"])
+        live.update(p["file"] for p in entry["patches"])
+    live = with_siblings(live)
+    for path in out_dir.glob("*.json*"):
+        if path.name not in live:
+            path.unlink()
+
+
+def plan(entry: dict, version: int | None, digest: str | None) -> list[str]:
+    """Files a client holding ``version`` with canonical hash ``digest`` should
+    fetch: nothing, a patch chain, or the snapshot."""
+    if digest is not None and digest == entry["hash"]:
+        return []
+    chain = [p for p in entry["patches"] if version is not None and p["from"] >= version]
+    if (
+        not chain
+        or chain[0]["from"] != version
+        or chain[0].get("from_hash") != digest
+        or sum(p["bytes"] for p in chain) >= entry["bytes"]
+    ):
+        return [entry["snapshot"]]
+    return [p["file"] for p in chain]
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.delta", description=__doc__.split("\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    release_cmd = sub.add_parser("release", help="record changed collections as a new version and publish")
+    publish_cmd = sub.add_parser("publish", help="copy the released chain to the output directory")
+    for cmd in (release_cmd, publish_cmd):
+        cmd.add_argument("--state", type=Path, default=STATE_DIR, help="committed release chain (default: data/delta)")
+        cmd.add_argument("--out", type=Path, default=OUTPUT_DIR, help="output directory (default: public/content/delta)")
+    release_cmd.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="patches kept per collection (default: 30)")
+    diff_cmd = sub.add_parser("diff", help="print the patch between two builds of one collection")
+    diff_cmd.add_argument("old", type=Path)
+    diff_cmd.add_argument("new", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == "diff":
+        old, new = load_json(args.old), load_json(args.new)
+        patch = diff(old, new)
+        if canonical_hash(apply(old, patch)) != canonical_hash(new):
+            print("error: patch does not reproduce the new file", file=sys.stderr)
+            return 1
+        print(json.dumps(patch, indent=2, ensure_ascii=False))
+        print(f"{len(_encode(patch)):,} B patch vs {len(_encode(new)):,} B file", file=sys.stderr)
+        return 0
+
+    if args.command == "publish":
+        manifest = publish(args.state, args.out)
+        print(f"published {len(manifest['collections'])} collection(s) to {args.out}")
+        return 0
+
+    released = release(args.out, keep=args.keep, state_dir=args.state)
+    manifest = load_json(args.state / "manifest.json")
+    for name, version in released.items():
+        entry = manifest["collections"][name]
+        last = entry["patches"][-1]["bytes"] if entry["patches"] and entry["patches"][-1]["to"] == version else None
+        detail = f"patch {last:,} B vs snapshot {entry['bytes']:,} B" if last is not None else f"snapshot {entry['bytes']:,} B"
+        print(f"{name:<20} v{version}  {detail}")
+    print(f"released {len(released)} collection(s), {len(manifest['collections']) - len(released)} unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
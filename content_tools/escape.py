@@ -0,0 +1,221 @@
+"""Escape lesson Markdown files into the curriculum JSON in bulk.
+
+Each source file holds the Markdown of one lesson and is named after the
+lesson id: ``c1.md``, ``c1_content.txt`` or ``c1_content.md``. Files may also
+contain a pasted ``"content": "..."`` fragment, which is decoded first. The
+escaped content is written straight into the ``content`` field of the lesson
+in whichever ``data/curriculum/*.json`` file holds that id.
+
+Unchanged sources are skipped using a content-hash cache (file stats are
+only a fast path in front of the hash), and the remaining files are read
+and normalized across a process pool. A run that writes is
+recorded in the snapshot store (``content_tools.snapshot``).
+
+Usage::
+
+    python -m content_tools.escape lessons/            # write into curriculum
+    python -m content_tools.escape lessons/ --dry-run  # only report changes
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+
+from .common import CACHE_DIR, curriculum_files, load_cache, parallel_map, sha256_bytes, sha256_file, write_atomic
+from .jsonindex import load_index
+from .patch import patch_lessons
+from .snapshot import recording
+
+CACHE_FILE = CACHE_DIR / "escape.json"
+SOURCE_SUFFIXES = (".md", ".txt")
+POOL_THRESHOLD = 16
+# Files changed this close to the moment their cache entry was written may
+# have been edited again within the same timestamp tick; hash those.
+RACY_NS = 2_000_000_000
+
+
+@dataclass
+class EscapedLesson:
+    source: str
+    lesson_id: str
+    source_sha: str
+    content: str
+
+
+def lesson_id_for(path: Path) -> str:
+    stem = path.stem
+    return stem[: -len("_content")] if stem.endswith("_content") else stem
+
+
+def decode_source(raw: bytes) -> str:
+    """Decode a lesson source, undoing the UTF-16 and CRLF damage that shell
+    redirection on Windows tends to introduce."""
+    if raw.startswith((b"\xff\xfe", b"\xfe\xff")):
+        text = raw.decode("utf-16")
+    else:
+        text = raw.decode("utf-8-sig")
+    text = text.replace("\r\n", "\n")
+    stripped = text.strip()
+    if stripped.startswith('"content"'):
+        # A pasted JSON fragment such as c1_content.txt.
+        text = json.loads("{" + stripped.rstrip(",") + "}")["content"]
+    return text
+
+
+def escape_file(path: str) -> EscapedLesson:
+    raw = Path(path).read_bytes()
+    return EscapedLesson(path, lesson_id_for(Path(path)), sha256_bytes(raw), decode_source(raw))
+
+
+def _stat_fields(stat: os.stat_result) -> dict[str, int]:
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "ctime_ns": stat.st_ctime_ns, "ino": stat.st_ino}
+
+
+def _stat_unchanged(stat: os.stat_result, entry: dict) -> bool:
+    """Whether the stats alone prove the source is the one ``entry`` recorded.
+
+    ctime and inode catch edits that restore size and mtime (``cp -p``,
+    ``rsync -t``, checkouts); a racy ctime means the stats prove nothing.
+    """
+    return (
+        all(entry.get(k) == v for k, v in _stat_fields(stat).items())
+        and stat.st_ctime_ns < entry.get("recorded_ns", 0) - RACY_NS
+    )
+
+
+def _lesson_locations(files: list[Path]) -> dict[str, Path]:
+    locations: dict[str, Path] = {}
+    for path in files:
+        for lesson_id in load_index(path).lessons:
+            locations.setdefault(lesson_id, path)
+    return locations
+
+
+class _ContentHashes:
+    """Hashes of the escaped ``content`` value of each lesson, per target."""
+
+    def __init__(self) -> None:
+        self._files: dict[Path, dict[str, str]] = {}
+
+    def get(self, path: Path, lesson_id: str) -> str | None:
+        if path not in self._files:
+            data = path.read_bytes()
+            index = load_index(path, data)
+            self._files[path] = {
+                entry.id: sha256_bytes(entry.fields["content"].slice(data))
+                for entry in index.lessons.values()
+                if "content" in entry.fields
+            }
+        return self._files[path].get(lesson_id)
+
+    def invalidate(self, path: Path) -> None:
+        self._files.pop(path, None)
+
+
+def escape_tree(
+    source_dir: Path,
+    targets: list[Path] | None = None,
+    jobs: int | None = None,
+    dry_run: bool = False,
+    use_cache: bool = True,
+) -> dict[str, list[str]]:
+    """Escape every lesson source under ``source_dir`` into the curriculum.
+
+    Returns ``{curriculum file: [changed lesson ids]}``.
+    """
+    source_dir = Path(source_dir)
+    targets = targets or curriculum_files()
+    locations = _lesson_locations(targets)
+    cache = load_cache(CACHE_FILE) if use_cache else {}
+    hashes = _ContentHashes()
+
+    sources = sorted(
+        p for p in source_dir.rglob("*")
+        if p.is_file() and p.suffix in SOURCE_SUFFIXES
+    )
+    pending: list[str] = []
+    refreshed: dict[str, dict] = {}
+    for path in sources:
+        lesson_id = lesson_id_for(path)
+        if lesson_id not in locations:
+            print(f"skip {path}: no lesson {lesson_id!r} in curriculum", file=sys.stderr)
+            continue
+        key = str(path.resolve())
+        entry = cache.get(key)
+        if entry and entry["target_sha"] == hashes.get(locations[lesson_id], lesson_id):
+            stat = path.stat()
+            if _stat_unchanged(stat, entry):
+                continue
+            if sha256_file(path) == entry["source_sha"]:
+                refreshed[key] = {**entry, **_stat_fields(stat)}
+                continue
+        pending.append(str(path))
+
+    escaped = parallel_map(escape_file, pending, jobs, POOL_THRESHOLD, chunksize=8)
+
+    by_target: dict[Path, dict[str, dict[str, str]]] = {}
+    for lesson in escaped:
+        by_target.setdefault(locations[lesson.lesson_id], {})[lesson.lesson_id] = {"content": lesson.content}
+
+    changed: dict[str, list[str]] = {}
+    with nullcontext() if dry_run or not by_target else recording(f"escape {source_dir}"):
+        for target, fields in by_target.items():
+            if dry_run:
+                ids = [
+                    lesson_id for lesson_id, values in fields.items()
+                    if hashes.get(target, lesson_id)
+                    != sha256_bytes(json.dumps(values["content"], ensure_ascii=False).encode("utf-8"))
+                ]
+            else:
+                ids = patch_lessons(target, fields=fields)
+                hashes.invalidate(target)
+            if ids:
+                changed[str(target)] = ids
+
+    if not dry_run and use_cache and (escaped or refreshed):
+        now = time.time_ns()
+        cache.update(refreshed)
+        for lesson in escaped:
+            path = Path(lesson.source)
+            target = locations[lesson.lesson_id]
+            cache[str(path.resolve())] = {
+                "lesson": lesson.lesson_id,
+                **_stat_fields(path.stat()),
+                "source_sha": lesson.source_sha,
+                "target_sha": hashes.get(target, lesson.lesson_id),
+            }
+        for key in refreshed.keys() | {str(Path(lesson.source).resolve()) for lesson in escaped}:
+            cache[key]["recorded_ns"] = now
+        write_atomic(CACHE_FILE, json.dumps(cache, indent=1, sort_keys=True).encode("utf-8"))
+
+    return changed
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.escape", description=__doc__.split("\n")[0])
+    parser.add_argument("source_dir", type=Path, help="directory tree of lesson Markdown files")
+    parser.add_argument("--target", type=Path, action="append", help="curriculum file to update (default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--no-cache", action="store_true", help="re-escape every source file")
+    args = parser.parse_args(argv)
+
+    if not args.source_dir.is_dir():
+        parser.error(f"{args.source_dir} is not a directory")
+    changed = escape_tree(args.source_dir, args.target, args.jobs, args.dry_run, not args.no_cache)
+    total = sum(len(ids) for ids in changed.values())
+    for target, ids in sorted(changed.items()):
+        print(f"{target}: {', '.join(ids)}")
+    print(f"{'would update' if args.dry_run else 'updated'} {total} lesson(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,258 @@
+"""Byte-offset index of the levels, lessons and quizzes in a curriculum file.
+
+The curriculum files are a JSON array of levels, each holding a ``lessons``
+array. Instead of decoding the whole document, the index scans the raw bytes
+once and records where every level, every lesson and every top-level lesson
+field (``content``, ``quizQuestions``, ...) starts and ends. Tools can then
+splice a single lesson without touching the rest of the file.
+
+Run ``python -m content_tools.jsonindex`` to print the index of every
+curriculum file.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .common import CACHE_DIR, curriculum_files, sha256_bytes, write_atomic
+
+INDEX_CACHE_DIR = CACHE_DIR / "index"
+INDEX_VERSION = 1
+
+# A JSON string or a structural character. Numbers, booleans and null are
+# never needed for the index, so they are simply skipped over.
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}:,]', re.S)
+
+
+class IndexBuildError(ValueError):
+    """The document is not a well-formed curriculum file."""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(f"{message} at byte {offset}")
+        self.offset = offset
+
+
+@dataclass(frozen=True)
+class Span:
+    start: int
+    end: int
+
+    def slice(self, data: bytes) -> bytes:
+        return data[self.start:self.end]
+
+
+@dataclass
+class LessonEntry:
+    id: str
+    level_index: int
+    index: int
+    span: Span
+    # Spans of the lesson's string, object and array fields, keyed by name.
+    fields: dict[str, Span] = field(default_factory=dict)
+
+    @property
+    def quiz(self) -> Span | None:
+        return self.fields.get("quizQuestions")
+
+
+@dataclass
+class LevelEntry:
+    id: str | None
+    index: int
+    span: Span
+    lessons: list[LessonEntry] = field(default_factory=list)
+
+
+@dataclass
+class CurriculumIndex:
+    sha256: str
+    size: int
+    levels: list[LevelEntry]
+
+    def __post_init__(self) -> None:
+        self.lessons = {
+            lesson.id: lesson for level in self.levels for lesson in level.lessons
+        }
+
+    def lesson(self, lesson_id: str) -> LessonEntry:
+        try:
+            return self.lessons[lesson_id]
+        except KeyError:
+            raise KeyError(f"lesson {lesson_id!r} not found") from None
+
+    def to_json(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "sha256": self.sha256,
+            "size": self.size,
+            "levels": [
+                {
+                    "id": level.id,
+                    "span": [level.span.start, level.span.end],
+                    "lessons": [
+                        {
+                            "id": lesson.id,
+                            "span": [lesson.span.start, lesson.span.end],
+                            "fields": {k: [s.start, s.end] for k, s in lesson.fields.items()},
+                        }
+                        for lesson in level.lessons
+                    ],
+                }
+                for level in self.levels
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "CurriculumIndex":
+        levels = []
+        for i, level in enumerate(data["levels"]):
+            lessons = [
+                LessonEntry(
+                    id=lesson["id"],
+                    level_index=i,
+                    index=j,
+                    span=Span(*lesson["span"]),
+                    fields={k: Span(*s) for k, s in lesson["fields"].items()},
+                )
+                for j, lesson in enumerate(level["lessons"])
+            ]
+            levels.append(LevelEntry(level["id"], i, Span(*level["span"]), lessons))
+        return cls(data["sha256"], data["size"], levels)
+
+
+class _Frame:
+    __slots__ = ("kind", "start", "path", "key", "index", "expect_key")
+
+    def __init__(self, kind: bytes, start: int, path: tuple):
+        self.kind = kind
+        self.start = start
+        self.path = path
+        self.key: str | None = None
+        self.index = 0
+        self.expect_key = kind == b"{"
+
+    def child_path(self) -> tuple:
+        return self.path + ((self.key,) if self.kind == b"{" else (self.index,))
+
+
+def build_index(data: bytes) -> CurriculumIndex:
+    """Scan ``data`` and return the span index of its levels and lessons."""
+    stack: list[_Frame] = []
+    level_spans: dict[int, Span] = {}
+    level_ids: dict[int, str] = {}
+    lesson_spans: dict[tuple[int, int], Span] = {}
+    lesson_fields: dict[tuple[int, int], dict[str, Span]] = {}
+    root_seen = False
+
+    def record(path: tuple, span: Span, token: bytes | None = None) -> None:
+        depth = len(path)
+        if depth == 1:
+            level_spans[path[0]] = span
+        elif depth == 2 and path[1] == "id" and token is not None:
+            level_ids[path[0]] = json.loads(token)
+        elif depth == 3 and path[1] == "lessons":
+            lesson_spans[(path[0], path[2])] = span
+        elif depth == 4 and path[1] == "lessons":
+            lesson_fields.setdefault((path[0], path[2]), {})[path[3]] = span
+
+    for m in _TOKEN.finditer(data):
+        tok = m.group()
+        first = tok[:1]
+        top = stack[-1] if stack else None
+        if first == b'"':
+            if top is None:
+                raise IndexBuildError("expected a JSON array", m.start())
+            if top.expect_key:
+                top.key = json.loads(tok)
+                continue
+            path = top.child_path()
+            if len(path) <= 4:
+                record(path, Span(m.start(), m.end()), tok)
+        elif first in b"[{":
+            if top is None:
+                if root_seen or first != b"[":
+                    raise IndexBuildError("expected a single JSON array", m.start())
+                root_seen = True
+                stack.append(_Frame(first, m.start(), ()))
+            else:
+                if top.expect_key:
+                    raise IndexBuildError("expected an object key", m.start())
+                stack.append(_Frame(first, m.start(), top.child_path()))
+        elif first in b"]}":
+            if top is None or top.kind != (b"[" if first == b"]" else b"{"):
+                raise IndexBuildError(f"unbalanced {tok.decode()!r}", m.start())
+            stack.pop()
+            if top.path and len(top.path) <= 4:
+                record(top.path, Span(top.start, m.end()))
+        elif first == b",":
+            if top is None:
+                raise IndexBuildError("unexpected ','", m.start())
+            if top.kind == b"{":
+                top.expect_key = True
+            else:
+                top.index += 1
+        else:  # ':'
+            if top is None or top.kind != b"{" or not top.expect_key:
+                raise IndexBuildError("unexpected ':'", m.start())
+            top.expect_key = False
+
+    if stack or not root_seen:
+        raise IndexBuildError("unterminated document", len(data))
+
+    levels = [LevelEntry(level_ids.get(i), i, span) for i, span in sorted(level_spans.items())]
+    for (i, j), span in sorted(lesson_spans.items()):
+        fields = lesson_fields.get((i, j), {})
+        id_span = fields.pop("id", None)
+        if id_span is None:
+            raise IndexBuildError(f"lesson {j} of level {i} has no string id", span.start)
+        lesson_id = json.loads(id_span.slice(data))
+        levels[i].lessons.append(LessonEntry(lesson_id, i, j, span, fields))
+
+    return CurriculumIndex(sha256_bytes(data), len(data), levels)
+
+
+def _cache_path(path: Path) -> Path:
+    return INDEX_CACHE_DIR / f"{Path(path).stem}.index.json"
+
+
+def load_index(path: Path, data: bytes | None = None) -> CurriculumIndex:
+    """Return the index of ``path``, reusing the on-disk cache when the file's
+    hash has not changed."""
+    if data is None:
+        data = Path(path).read_bytes()
+    digest = sha256_bytes(data)
+    cache = _cache_path(path)
+    try:
+        cached = json.loads(cache.read_text(encoding="utf-8"))
+        if cached.get("version") == INDEX_VERSION and cached.get("sha256") == digest:
+            return CurriculumIndex.from_json(cached)
+    except (OSError, ValueError, KeyError):
+        pass
+    index = build_index(data)
+    write_atomic(cache, json.dumps(index.to_json(), separators=(",", ":")).encode("utf-8"))
+    return index
+
+
+def main(argv: list[str]) -> int:
+    paths = [Path(p) for p in argv] or curriculum_files()
+    for path in paths:
+        try:
+            index = load_index(path)
+        except IndexBuildError as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            return 1
+        print(f"{path.name}: {len(index.levels)} levels, {len(index.lessons)} lessons, {index.size} bytes")
+        for level in index.levels:
+            for lesson in level.lessons:
+                quiz = lesson.quiz
+                quiz_text = f" quiz {quiz.start}-{quiz.end}" if quiz else ""
+                print(f"  {lesson.id:<10} {lesson.span.start:>8}-{lesson.span.end:<8}{quiz_text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,747 @@
+"""Local batch judge that speaks the Judge0 and Piston HTTP APIs.
+
+Sources are compiled once per (language, source) hash and the build output is
+kept in an LRU cache under ``.content-cache/judge``. All test cases of a
+submission then run against that one artifact in parallel, each in its own
+process group with CPU, memory, output and wall-clock limits.
+
+This is a stand-in for Judge0/Piston during development and CI, not a
+security sandbox: only run code you trust, and keep the server bound to
+localhost. Browsers may only call it from the origins given with
+``--allow-origin`` (default: the Vite dev server); requests from any other
+page are refused, since each one would run code on this machine.
+
+Endpoints (``python -m content_tools.judge serve --port 2358``)::
+
+    POST /submissions[?wait=true]     Judge0 single submission
+    GET  /submissions/<token>         Judge0 result lookup
+    POST /submissions/batch           Judge0 batch submission
+    GET  /submissions/batch?tokens=   Judge0 batch lookup
+    GET  /languages                   Judge0 language list
+    POST /execute                     Piston execute (also /api/v2/piston/...)
+    GET  /runtimes                    Piston runtime list
+    POST /batch                       one source against many test_cases
+
+Checking the practice bank offline::
+
+    python -m content_tools.judge check [--solutions DIR] [--lang c]
+
+``check`` compiles every distinct starter code; with ``--solutions`` it also
+runs ``DIR/<problem id>.<ext>`` against the problem's test cases.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from .common import CACHE_DIR, PRACTICE_DIR, sha256_bytes, write_atomic
+
+JUDGE_CACHE_DIR = CACHE_DIR / "judge"
+# Browser origins allowed to call the server: the Vite dev server.
+DEFAULT_ALLOWED_ORIGINS = ("http://localhost:3001", "http://127.0.0.1:3001")
+
+
+@dataclass(frozen=True)
+class Language:
+    name: str
+    judge0_id: int
+    version: str
+    source_name: str
+    compile: tuple[str, ...] | None
+    run: tuple[str, ...]
+    # The JVM reserves far more address space than it uses, so RLIMIT_AS
+    # would kill it; its heap is capped with -Xmx instead.
+    limit_address_space: bool = True
+    aliases: tuple[str, ...] = ()
+
+
+LANGUAGES: dict[str, Language] = {
+    lang.name: lang
+    for lang in (
+        Language("c", 50, "gcc", "main.c", ("gcc", "-O2", "-std=c11", "-o", "main", "main.c", "-lm"), ("./main",)),
+        Language("cpp", 54, "g++", "main.cpp", ("g++", "-O2", "-std=c++17", "-o", "main", "main.cpp"), ("./main",),
+                 aliases=("c++",)),
+        Language("java", 62, "javac", "Main.java", ("javac", "-encoding", "UTF-8", "Main.java"),
+                 ("java", "-Xmx256m", "-Xss64m", "-cp", ".", "Main"), limit_address_space=False),
+        Language("python", 71, "python3", "main.py", None, (sys.executable, "main.py"),
+                 aliases=("python3", "py")),
+        Language("javascript", 63, "node", "main.js", None, ("node", "main.js"), limit_address_space=False,
+                 aliases=("js", "node")),
+    )
+}
+_BY_JUDGE0_ID = {lang.judge0_id: lang for lang in LANGUAGES.values()}
+_BY_ALIAS = {alias: lang for lang in LANGUAGES.values() for alias in (lang.name, *lang.aliases)}
+
+# Judge0 status ids.
+ACCEPTED = (3, "Accepted")
+WRONG_ANSWER = (4, "Wrong Answer")
+TIME_LIMIT = (5, "Time Limit Exceeded")
+COMPILATION_ERROR = (6, "Compilation Error")
+RUNTIME_SIGNALS = {
+    signal.SIGSEGV: (7, "Runtime Error (SIGSEGV)"),
+    signal.SIGXFSZ: (8, "Runtime Error (SIGXFSZ)"),
+    signal.SIGFPE: (9, "Runtime Error (SIGFPE)"),
+    signal.SIGABRT: (10, "Runtime Error (SIGABRT)"),
+}
+RUNTIME_NZEC = (11, "Runtime Error (NZEC)")
+RUNTIME_OTHER = (12, "Runtime Error (Other)")
+INTERNAL_ERROR = (13, "Internal Error")
+
+
+class JudgeError(Exception):
+    pass
+
+
+def resolve_language(key: Any) -> Language:
+    """Look a language up by Judge0 id, name or Piston alias."""
+    if isinstance(key, str) and key.isdigit():
+        key = int(key)
+    lang = _BY_JUDGE0_ID.get(key) if isinstance(key, int) else _BY_ALIAS.get(str(key).lower())
+    if lang is None:
+        raise JudgeError(f"unsupported language {key!r}")
+    return lang
+
+
+@dataclass
+class Limits:
+    cpu_time: float = 5.0
+    wall_time: float = 10.0
+    memory_kb: int = 256_000
+    output_bytes: int = 1 << 20
+
+    @classmethod
+    def from_judge0(cls, body: dict) -> "Limits":
+        limits = cls()
+        if body.get("cpu_time_limit"):
+            limits.cpu_time = float(body["cpu_time_limit"])
+        if body.get("wall_time_limit"):
+            limits.wall_time = float(body["wall_time_limit"])
+        else:
+            limits.wall_time = max(limits.wall_time, limits.cpu_time * 2)
+        if body.get("memory_limit"):
+            limits.memory_kb = int(body["memory_limit"])
+        return limits
+
+
+@dataclass
+class Artifact:
+    """A compiled (or, for interpreted languages, staged) source."""
+
+    key: str
+    directory: Path
+    language: Language
+    compile_output: str | None = None
+    ok: bool = True
+
+
+@dataclass
+class RunResult:
+    stdout: str
+    stderr: str
+    exit_code: int | None
+    signal: int | None
+    time: float
+    memory_kb: int | None
+    timed_out: bool
+    status: tuple[int, str] = ACCEPTED
+    compile_output: str | None = None
+
+    def judge0(self, token: str | None = None) -> dict:
+        result = {
+            "stdout": self.stdout or None,
+            "stderr": self.stderr or None,
+            "compile_output": self.compile_output,
+            "message": None if self.status == ACCEPTED else self.status[1],
+            "time": f"{self.time:.3f}",
+            "memory": self.memory_kb,
+            "exit_code": self.exit_code,
+            "exit_signal": self.signal,
+            "status": {"id": self.status[0], "description": self.status[1]},
+        }
+        if token:
+            result["token"] = token
+        return result
+
+
+class CompileCache:
+    """LRU cache of build directories keyed by language and source hash."""
+
+    def __init__(self, root: Path = JUDGE_CACHE_DIR, max_entries: int = 256):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Artifact] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        # Artifacts with test cases running in them; eviction skips these.
+        self._pins: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Reuse builds from earlier runs, oldest first so they are evicted first.
+        for path in sorted(self.root.iterdir(), key=lambda p: p.stat().st_mtime):
+            meta = path / "artifact.json"
+            if meta.is_file():
+                try:
+                    info = json.loads(meta.read_text(encoding="utf-8"))
+                    self._entries[path.name] = Artifact(
+                        path.name, path, resolve_language(info["language"]), info.get("compile_output"), info["ok"]
+                    )
+                except (OSError, ValueError, KeyError, JudgeError):
+                    shutil.rmtree(path, ignore_errors=True)
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key_for(lang: Language, source: str) -> str:
+        recipe = json.dumps([lang.name, lang.compile, lang.run])
+        return sha256_bytes(recipe.encode("utf-8") + b"\0" + source.encode("utf-8"))[:32]
+
+    def get(self, lang: Language, source: str, pin: bool = False) -> Artifact:
+        """Return the build of ``source``, compiling it on a miss.
+
+        With ``pin`` the artifact is not evicted until :meth:`release`.
+        """
+        key = self.key_for(lang, source)
+        with self._lock:
+            artifact = self._hit(key, pin)
+            if artifact is not None:
+                return artifact
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Concurrent submissions of the same source compile only once.
+        with key_lock:
+            with self._lock:
+                artifact = self._hit(key, pin)
+                if artifact is not None:
+                    return artifact
+            artifact = self._build(key, lang, source)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = artifact
+                if pin:
+                    self._pins[key] = self._pins.get(key, 0) + 1
+                self._key_locks.pop(key, None)
+                self._evict()
+        return artifact
+
+    def release(self, artifact: Artifact) -> None:
+        with self._lock:
+            count = self._pins.pop(artifact.key, 0) - 1
+            if count > 0:
+                self._pins[artifact.key] = count
+            self._evict()
+
+    def _hit(self, key: str, pin: bool) -> Artifact | None:
+        artifact = self._entries.get(key)
+        if artifact is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if pin:
+                self._pins[key] = self._pins.get(key, 0) + 1
+        return artifact
+
+    def _build(self, key: str, lang: Language, source: str) -> Artifact:
+        directory = self.root / key
+        staging = self.root / f".{key}.{uuid.uuid4().hex}"
+        staging.mkdir(parents=True)
+        (staging / lang.source_name).write_text(source, encoding="utf-8")
+        ok, output = True, None
+        if lang.compile:
+            try:
+                proc = subprocess.run(
+                    lang.compile, cwd=staging, capture_output=True, text=True, timeout=60
+                )
+                ok = proc.returncode == 0
+                output = (proc.stdout + proc.stderr) or None
+            except FileNotFoundError:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise JudgeError(f"{lang.compile[0]} is not installed") from None
+            except subprocess.TimeoutExpired:
+                ok, output = False, "compilation timed out"
+        meta = {"language": lang.name, "ok": ok, "compile_output": output}
+        write_atomic(staging / "artifact.json", json.dumps(meta).encode("utf-8"))
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+        return Artifact(key, directory, lang, output, ok)
+
+    def _evict(self) -> None:
+        # Oldest first, skipping pinned artifacts; the cache may stay over
+        # max_entries until they are released.
+        excess = len(self._entries) - self.max_entries
+        for key in [k for k in self._entries if k not in self._pins][:max(excess, 0)]:
+            shutil.rmtree(self._entries.pop(key).directory, ignore_errors=True)
+
+
+# Limits are applied by an exec wrapper rather than preexec_fn: test cases
+# start from pool threads, where running Python between fork and exec can
+# deadlock. prlimit(1) is used when installed, this script otherwise.
+_PRLIMIT = shutil.which("prlimit")
+_RLIMIT_WRAPPER = """\
+import os, resource, sys
+for arg in sys.argv[1:sys.argv.index("--")]:
+    name, _, value = arg[2:].partition("=")
+    soft, hard = map(int, value.split(":"))
+    resource.setrlimit(getattr(resource, "RLIMIT_" + name.upper()), (soft, hard))
+command = sys.argv[sys.argv.index("--") + 1:]
+os.execvp(command[0], command)
+"""
+
+
+def limited_command(command: tuple[str, ...], limits: Limits, limit_address_space: bool) -> list[str]:
+    """``command`` wrapped so it runs under the CPU, core, file size and memory rlimits."""
+    cpu = max(1, int(limits.cpu_time + 0.999))
+    rlimits = {"cpu": (cpu, cpu + 1), "core": (0, 0), "fsize": (limits.output_bytes,) * 2}
+    if limit_address_space:
+        rlimits["as"] = (limits.memory_kb * 1024,) * 2
+    options = [f"--{name}={soft}:{hard}" for name, (soft, hard) in rlimits.items()]
+    if _PRLIMIT:
+        return [_PRLIMIT, *options, "--", *command]
+    return [sys.executable, "-I", "-S", "-c", _RLIMIT_WRAPPER, *options, "--", *command]
+
+
+def _read_capped(stream, cap: int, sink: list[bytes]) -> None:
+    data = stream.read(cap)
+    sink.append(data)
+    while stream.read(65536):  # discard the rest so the child never blocks
+        pass
+
+
+def run_artifact(artifact: Artifact, stdin: str, limits: Limits) -> RunResult:
+    """Run one test case against an already built artifact."""
+    lang = artifact.language
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        limited_command(lang.run, limits, lang.limit_address_space),
+        cwd=artifact.directory,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    timed_out = threading.Event()
+
+    def kill() -> None:
+        timed_out.set()
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    timer = threading.Timer(limits.wall_time, kill)
+    timer.start()
+    out: list[bytes] = []
+    err: list[bytes] = []
+    readers = [
+        threading.Thread(target=_read_capped, args=(proc.stdout, limits.output_bytes, out), daemon=True),
+        threading.Thread(target=_read_capped, args=(proc.stderr, limits.output_bytes, err), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        proc.stdin.write(stdin.encode("utf-8"))
+        proc.stdin.close()
+    except (BrokenPipeError, OSError):
+        pass
+    # wait4 instead of Popen.wait so we get this child's own peak RSS.
+    _pid, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    # Children the program forked may still hold stdout open; they go too.
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    # The timer keeps running until the output is in. A descendant that left
+    # the process group can hold the pipes past the deadline; then the
+    # readers are abandoned (they are daemons) and the case times out.
+    for reader in readers:
+        reader.join(max(0.0, start + limits.wall_time - time.perf_counter()) + 0.1)
+    timer.cancel()
+    if any(reader.is_alive() for reader in readers):
+        timed_out.set()
+    else:
+        proc.stdout.close()
+        proc.stderr.close()
+
+    code = proc.returncode
+    sig = -code if code < 0 else None
+    if timed_out.is_set() or sig == signal.SIGXCPU:
+        verdict = TIME_LIMIT
+    elif sig is not None:
+        verdict = RUNTIME_SIGNALS.get(sig, RUNTIME_OTHER)
+    elif code != 0:
+        verdict = RUNTIME_NZEC
+    else:
+        verdict = ACCEPTED
+    return RunResult(
+        stdout=out[0].decode("utf-8", "replace") if out else "",
+        stderr=err[0].decode("utf-8", "replace") if err else "",
+        exit_code=None if sig is not None else code,
+        signal=sig,
+        time=elapsed,
+        memory_kb=usage.ru_maxrss,
+        timed_out=timed_out.is_set(),
+        status=verdict,
+    )
+
+
+def outputs_match(actual: str, expected: str) -> bool:
+    """Compare like most judges: ignore trailing whitespace on each line and
+    trailing blank lines."""
+    def normalize(text: str) -> list[str]:
+        lines = [line.rstrip() for line in text.replace("\r\n", "\n").split("\n")]
+        while lines and not lines[-1]:
+            lines.pop()
+        return lines
+    return normalize(actual) == normalize(expected)
+
+
+def _case_field(case: dict, *names: str) -> str:
+    for name in names:
+        if case.get(name) is not None:
+            return str(case[name])
+    return ""
+
+
+class Judge:
+    def __init__(self, cache: CompileCache | None = None, workers: int | None = None):
+        self.cache = cache if cache is not None else CompileCache()
+        self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4)
+
+    def run(self, language: Any, source: str, stdin: str = "", expected: str | None = None,
+            limits: Limits | None = None) -> RunResult:
+        return self.run_batch(language, source, [{"stdin": stdin, "expected_output": expected}], limits)[0]
+
+    def run_batch(self, language: Any, source: str, test_cases: list[dict],
+                  limits: Limits | None = None) -> list[RunResult]:
+        """Build ``source`` once and run every test case against it in parallel.
+
+        Test cases accept the practice-bank keys (``stdin``/``input`` and
+        ``expected_output``/``expectedOutput``).
+        """
+        lang = resolve_language(language)
+        limits = limits or Limits()
+        artifact = self.cache.get(lang, source, pin=True)
+        try:
+            return self._run_cases(artifact, test_cases, limits)
+        finally:
+            self.cache.release(artifact)
+
+    def _run_cases(self, artifact: Artifact, test_cases: list[dict], limits: Limits) -> list[RunResult]:
+        if not artifact.ok:
+            return [
+                RunResult("", "", None, None, 0.0, None, False, COMPILATION_ERROR, artifact.compile_output)
+                for _ in test_cases
+            ]
+
+        def run_case(case: dict) -> RunResult:
+            try:
+                result = run_artifact(artifact, _case_field(case, "stdin", "input"), limits)
+            except OSError as e:
+                return RunResult("", str(e), None, None, 0.0, None, False, INTERNAL_ERROR)
+            expected = case.get("expected_output", case.get("expectedOutput"))
+            if result.status == ACCEPTED and expected is not None and not outputs_match(result.stdout, str(expected)):
+                result.status = WRONG_ANSWER
+            result.compile_output = artifact.compile_output
+            return result
+
+        return list(self.pool.map(run_case, test_cases))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "JudgeServer"
+    PISTON_PREFIXES = ("/api/v2/piston", "/api/v2")
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _origin_allowed(self) -> bool:
+        # Requests without an Origin come from curl, scripts or the CLI, not
+        # from a web page; anything a browser sends carries one.
+        origin = self.headers.get("Origin")
+        return origin is None or origin in self.server.allowed_origins
+
+    def _cors_headers(self) -> None:
+        origin = self.headers.get("Origin")
+        if origin is not None and origin in self.server.allowed_origins:
+            self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Vary", "Origin")
+
+    def _send(self, status: int, body: Any) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self._cors_headers()
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _reject_origin(self) -> bool:
+        """Answer 403 to browsers on other origins; any page could otherwise run code here."""
+        if self._origin_allowed():
+            return False
+        self._send(403, {"error": "origin not allowed", "message": "origin not allowed"})
+        return True
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _route(self) -> tuple[str, dict]:
+        url = urlparse(self.path)
+        path = url.path.rstrip("/") or "/"
+        for prefix in self.PISTON_PREFIXES:
+            if path.startswith(prefix + "/"):
+                path = path[len(prefix):]
+                break
+        return path, parse_qs(url.query)
+
+    def do_OPTIONS(self) -> None:
+        if self._reject_origin():
+            return
+        self.send_response(204)
+        self._cors_headers()
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        if self._reject_origin():
+            return
+        path, query = self._route()
+        server = self.server
+        if path == "/languages":
+            self._send(200, [{"id": l.judge0_id, "name": f"{l.name} ({l.version})"} for l in LANGUAGES.values()])
+        elif path == "/runtimes":
+            # Aliases are listed as languages too: executionService matches
+            # runtimes on ``language`` (e.g. "python3"), not on aliases.
+            self._send(200, [
+                {"language": name, "version": l.version, "aliases": list(l.aliases)} for name, l in _BY_ALIAS.items()
+            ])
+        elif path == "/submissions/batch":
+            tokens = ",".join(query.get("tokens", [])).split(",")
+            self._send(200, {"submissions": [server.results.get(t) for t in tokens if t]})
+        elif path.startswith("/submissions/"):
+            result = server.results.get(path.rsplit("/", 1)[1])
+            self._send(200, result) if result else self._send(404, {"error": "submission not found"})
+        elif path == "/stats":
+            cache = server.judge.cache
+            self._send(200, {"cache_entries": len(cache), "hits": cache.hits, "misses": cache.misses})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if self._reject_origin():
+            return
+        path, _query = self._route()
+        try:
+            body = self._body()
+            if path == "/submissions":
+                self._send(201, self.server.submit(body))
+            elif path == "/submissions/batch":
+                self._send(201, [{"token": r["token"]} for r in self.server.submit_many(body.get("submissions", []))])
+            elif path == "/execute":
+                self._send(200, self.server.execute(body))
+            elif path == "/batch":
+                self._send(200, self.server.batch(body))
+            else:
+                self._send(404, {"error": "not found"})
+        except (JudgeError, ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": str(e), "message": str(e)})
+
+
+class JudgeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    MAX_RESULTS = 10_000
+
+    def __init__(self, address: tuple[str, int], judge: Judge, verbose: bool = False,
+                 allowed_origins: tuple[str, ...] = DEFAULT_ALLOWED_ORIGINS):
+        super().__init__(address, _Handler)
+        self.judge = judge
+        self.verbose = verbose
+        self.allowed_origins = frozenset(allowed_origins)
+        self.results: OrderedDict[str, dict] = OrderedDict()
+        self._results_lock = threading.Lock()
+
+    def _store(self, result: dict) -> dict:
+        with self._results_lock:
+            self.results[result["token"]] = result
+            while len(self.results) > self.MAX_RESULTS:
+                self.results.popitem(last=False)
+        return result
+
+    def submit(self, body: dict) -> dict:
+        # Submissions always finish before we answer, so wait=false clients
+        # simply find the result on their first poll.
+        result = self.judge.run(
+            body["language_id"], body["source_code"], body.get("stdin") or "",
+            body.get("expected_output"), Limits.from_judge0(body),
+        )
+        return self._store(result.judge0(uuid.uuid4().hex))
+
+    def submit_many(self, bodies: list[dict]) -> list[dict]:
+        # Each submission fans its test cases out to the judge pool, so the
+        # submissions themselves get their own threads to avoid starving it.
+        if len(bodies) <= 1:
+            return [self.submit(b) for b in bodies]
+        with ThreadPoolExecutor(max_workers=min(len(bodies), 8)) as pool:
+            return list(pool.map(self.submit, bodies))
+
+    def execute(self, body: dict) -> dict:
+        lang = resolve_language(body["language"])
+        files = body.get("files") or []
+        if not files:
+            raise JudgeError("files must contain the source file")
+        limits = Limits()
+        if body.get("run_timeout"):
+            limits.wall_time = float(body["run_timeout"]) / 1000
+            limits.cpu_time = limits.wall_time
+        if body.get("run_memory_limit") and int(body["run_memory_limit"]) > 0:
+            limits.memory_kb = int(body["run_memory_limit"]) // 1024
+        result = self.judge.run(lang.name, files[0]["content"], body.get("stdin") or "", limits=limits)
+        compiled = result.status != COMPILATION_ERROR
+        run = {
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "output": result.stdout + result.stderr,
+            "code": result.exit_code if compiled else None,
+            "signal": signal.Signals(result.signal).name if result.signal else None,
+            "wall_time": round(result.time * 1000),
+        }
+        response: dict[str, Any] = {"language": lang.name, "version": lang.version, "run": run}
+        if lang.compile:
+            response["compile"] = {
+                "stdout": "",
+                "stderr": result.compile_output or "",
+                "output": result.compile_output or "",
+                "code": 0 if compiled else 1,
+                "signal": None,
+            }
+        return response
+
+    def batch(self, body: dict) -> dict:
+        results = self.judge.run_batch(
+            body.get("language_id", body.get("language")), body["source_code"],
+            body.get("test_cases") or [], Limits.from_judge0(body),
+        )
+        passed = sum(r.status == ACCEPTED for r in results)
+        return {
+            "passed": passed,
+            "total": len(results),
+            "results": [r.judge0() for r in results],
+        }
+
+
+SOLUTION_EXTENSIONS = {"c": ".c", "cpp": ".cpp", "java": ".java", "python": ".py", "javascript": ".js"}
+
+
+def _iter_problems(practice_dir: Path):
+    for path in sorted(practice_dir.glob("topic_*.json")):
+        if path.name.endswith(".backup.json"):
+            continue
+        topic = json.loads(path.read_text(encoding="utf-8"))
+        yield from topic.get("problems", [])
+
+
+def check_practice(judge: Judge, practice_dir: Path = PRACTICE_DIR, solutions: Path | None = None,
+                   languages: list[str] | None = None) -> int:
+    """Compile every distinct starter code and run any reference solutions.
+
+    Returns the number of failures.
+    """
+    languages = languages or list(SOLUTION_EXTENSIONS)
+    for lang in list(languages):
+        tool = (LANGUAGES[lang].compile or LANGUAGES[lang].run)[0]
+        if shutil.which(tool) is None:
+            print(f"skipping {lang}: {tool} is not installed")
+            languages.remove(lang)
+    problems = list(_iter_problems(practice_dir))
+    failures = 0
+
+    starters = {
+        (lang, code)
+        for problem in problems
+        for lang, code in (problem.get("starter_codes") or {}).items()
+        if lang in languages and LANGUAGES[lang].compile
+    }
+    builds = list(judge.pool.map(lambda item: judge.cache.get(LANGUAGES[item[0]], item[1]), sorted(starters)))
+    for (lang, _code), artifact in zip(sorted(starters), builds):
+        if not artifact.ok:
+            failures += 1
+            print(f"starter code does not compile [{lang}]:\n{artifact.compile_output}")
+    print(f"{len(starters)} distinct starter codes built, {failures} failed")
+
+    if solutions:
+        solved = 0
+        for problem in problems:
+            for lang in languages:
+                path = Path(solutions) / f"{problem['id']}{SOLUTION_EXTENSIONS[lang]}"
+                if not path.is_file():
+                    continue
+                results = judge.run_batch(lang, path.read_text(encoding="utf-8"), problem.get("test_cases") or [])
+                bad = [i for i, r in enumerate(results) if r.status != ACCEPTED]
+                solved += 1
+                if bad:
+                    failures += 1
+                    first = results[bad[0]]
+                    print(f"{problem['id']} [{lang}]: {len(bad)}/{len(results)} failed, case {bad[0]}: {first.status[1]}")
+        print(f"{solved} solution(s) judged")
+    return failures
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.judge", description=__doc__.split("\n")[0])
+    parser.add_argument("--workers", type=int, default=None, help="parallel test-case workers")
+    parser.add_argument("--cache-size", type=int, default=256, help="compiled artifacts to keep")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the HTTP server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=2358)
+    serve.add_argument(
+        "--allow-origin", action="append", metavar="ORIGIN",
+        help="browser origin allowed to submit code (repeatable; default: the Vite dev server on :3001)",
+    )
+    serve.add_argument("-v", "--verbose", action="store_true")
+    check = sub.add_parser("check", help="check the practice bank offline")
+    check.add_argument("--practice-dir", type=Path, default=PRACTICE_DIR)
+    check.add_argument("--solutions", type=Path, help="directory of <problem id>.<ext> reference solutions")
+    check.add_argument("--lang", action="append", choices=sorted(SOLUTION_EXTENSIONS))
+    args = parser.parse_args(argv)
+
+    judge = Judge(CompileCache(max_entries=args.cache_size), args.workers)
+    if args.command == "check":
+        return 1 if check_practice(judge, args.practice_dir, args.solutions, args.lang) else 0
+
+    server = JudgeServer((args.host, args.port), judge, args.verbose, tuple(args.allow_origin or DEFAULT_ALLOWED_ORIGINS))
+    print(f"judge listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
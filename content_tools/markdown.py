@@ -0,0 +1,436 @@
+"""Parse lesson Markdown into a compact, sanitized JSON tree.
+
+Covers the subset the lessons use (GitHub-flavoured, as rendered by
+react-markdown + remark-gfm): ATX and setext headings, paragraphs, emphasis,
+inline code, links, images, nested lists, tables, block quotes, rules and
+fenced code. Raw HTML is kept as plain text and only http(s), mailto and
+site-relative URLs survive, so the tree can be rendered without
+``dangerouslySetInnerHTML``.
+
+Fenced code is tokenized with Pygments when it is installed; each token is
+either a plain string or ``[prism-class, text]``. Without Pygments the code
+is emitted as a single plain string and the client highlights it as before.
+
+Node shapes::
+
+    {"t": "h", "d": 2, "c": [...]}          heading of depth d
+    {"t": "p", "c": [...]}                  paragraph
+    {"t": "code", "lang": "c", "hl": true, "c": [tokens]}
+    {"t": "ul" | "ol", "start": 1, "tight": true, "c": [{"t": "li", "c": [...]}]}
+                                            (tight items render their "p" children without <p>)
+    {"t": "table", "align": [...], "c": [{"t": "tr", "c": [{"t": "th" | "td", "c": [...]}]}]}
+    {"t": "quote", "c": [...]}   {"t": "hr"}
+    inline: "text", {"t": "b" | "i" | "s", "c": [...]}, {"t": "ic", "v": "x"},
+            {"t": "a", "href": "/x", "c": [...]}, {"t": "img", "src": "/x.png", "alt": ""}, {"t": "br"}
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+try:
+    import pygments
+    from pygments.lexers import get_lexer_by_name
+    from pygments.token import Token
+    from pygments.util import ClassNotFound
+except ImportError:  # optional: code blocks are left for the client to highlight
+    pygments = None
+
+AST_VERSION = 2
+TOKENIZER = f"pygments-{pygments.__version__}" if pygments else "none"
+
+Node = dict[str, Any]
+
+_FENCE_OPEN = re.compile(r"^( {0,3})(`{3,}|~{3,})\s*([^`\s]*)[^`]*$")
+_ATX = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_SETEXT = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_HR = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_LIST_ITEM = re.compile(r"^( *)([-*+]|\d{1,9}[.)])(?:[ \t]+(.*)|$)")
+_QUOTE = re.compile(r"^ {0,3}> ?(.*)$")
+_TABLE_SEP = re.compile(r"^ *\|? *:?-+:? *(?:\| *:?-+:? *)*\|? *$")
+
+_SAFE_URL = re.compile(r"^(?:https?://|mailto:|/|#|\./|\.\./|[\w\-./]+$)", re.I)
+
+
+def safe_url(url: str) -> str | None:
+    url = url.strip()
+    return url if _SAFE_URL.match(url) and not url.lower().startswith("javascript:") else None
+
+
+# ---------------------------------------------------------------- inline
+
+_INLINE = re.compile(
+    r"(?P<code>`+)"
+    r"|(?P<img>!\[)"
+    r"|(?P<link>\[)"
+    r"|(?P<strong>\*\*|__)"
+    r"|(?P<em>[*_])"
+    r"|(?P<strike>~~)"
+    r"|(?P<escape>\\[\\`*_{}\[\]()#+\-.!|>~<])"
+    r"|(?P<br> {2,}\n|\\\n)"
+)
+_LINK_TAIL = re.compile(r"\]\(\s*<?((?:[^()\s>]|\([^()\s]*\))*)>?(?:\s+\"([^\"]*)\")?\s*\)")
+
+
+def _find_bracket_end(text: str, start: int) -> int:
+    depth = 0
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "[":
+            depth += 1
+        elif ch == "]":
+            if depth == 0:
+                return i
+            depth -= 1
+        i += 1
+    return -1
+
+
+def _push_text(out: list, text: str) -> None:
+    if not text:
+        return
+    if out and isinstance(out[-1], str):
+        out[-1] += text
+    else:
+        out.append(text)
+
+
+def parse_inline(text: str) -> list:
+    out: list = []
+    pos = 0
+    while pos < len(text):
+        m = _INLINE.search(text, pos)
+        if not m:
+            break
+        start = m.start()
+        kind = m.lastgroup
+        handled = False
+        if kind == "code":
+            ticks = m.group("code")
+            end = text.find(ticks, m.end())
+            if end != -1:
+                _push_text(out, text[pos:start])
+                code = text[m.end():end].replace("\n", " ")
+                if code.startswith(" ") and code.endswith(" ") and code.strip():
+                    code = code[1:-1]
+                out.append({"t": "ic", "v": code})
+                pos = end + len(ticks)
+                handled = True
+        elif kind in ("img", "link"):
+            open_end = m.end()
+            close = _find_bracket_end(text, open_end)
+            tail = _LINK_TAIL.match(text, close) if close != -1 else None
+            if tail:
+                _push_text(out, text[pos:start])
+                label = text[open_end:close]
+                url = safe_url(tail.group(1))
+                if kind == "img":
+                    if url:
+                        out.append({"t": "img", "src": url, "alt": label})
+                    else:
+                        _push_text(out, label)
+                elif url:
+                    out.append({"t": "a", "href": url, "c": parse_inline(label)})
+                else:
+                    for child in parse_inline(label):
+                        if isinstance(child, str):
+                            _push_text(out, child)
+                        else:
+                            out.append(child)
+                pos = tail.end()
+                handled = True
+        elif kind in ("strong", "em", "strike"):
+            marker = m.group(kind)
+            end = text.find(marker, m.end())
+            # Emphasis needs non-space content right inside the markers, and
+            # "_" only counts at word boundaries (snake_case stays literal).
+            while end != -1 and (end == m.end() or text[end - 1].isspace()):
+                end = text.find(marker, end + 1)
+            inner = text[m.end():end] if end != -1 else ""
+            word_bound = not (
+                marker[0] == "_"
+                and ((start > 0 and text[start - 1].isalnum())
+                     or (end + len(marker) < len(text) and text[end + len(marker)].isalnum()))
+            )
+            if end != -1 and inner and not inner[0].isspace() and word_bound:
+                _push_text(out, text[pos:start])
+                tag = {"strong": "b", "em": "i", "strike": "s"}[kind]
+                out.append({"t": tag, "c": parse_inline(inner)})
+                pos = end + len(marker)
+                handled = True
+        elif kind == "escape":
+            _push_text(out, text[pos:start] + m.group()[1])
+            pos = m.end()
+            handled = True
+        elif kind == "br":
+            _push_text(out, text[pos:start])
+            out.append({"t": "br"})
+            pos = m.end()
+            handled = True
+        if not handled:
+            _push_text(out, text[pos:m.end()])
+            pos = m.end()
+    _push_text(out, text[pos:])
+    return out
+
+
+# ---------------------------------------------------------------- code
+
+# Pygments token types mapped to the class names Prism themes style.
+_PRISM_CLASSES = []
+if pygments:
+    _PRISM_CLASSES = [
+        (Token.Comment.Preproc, "directive"),
+        (Token.Comment.PreprocFile, "string"),
+        (Token.Comment, "comment"),
+        (Token.Keyword.Type, "keyword"),
+        (Token.Keyword, "keyword"),
+        (Token.Name.Builtin, "builtin"),
+        (Token.Name.Function, "function"),
+        (Token.Name.Class, "class-name"),
+        (Token.Name.Decorator, "decorator"),
+        (Token.Name.Tag, "tag"),
+        (Token.Name.Attribute, "attr-name"),
+        (Token.Literal.String, "string"),
+        (Token.Literal.Number, "number"),
+        (Token.Operator.Word, "keyword"),
+        (Token.Operator, "operator"),
+        (Token.Punctuation, "punctuation"),
+        (Token.Name.Constant, "constant"),
+        (Token.Keyword.Constant, "boolean"),
+    ]
+
+_LANG_ALIASES = {"c++": "cpp", "js": "javascript", "py": "python", "sh": "bash", "shell": "bash"}
+
+
+def _prism_class(tokentype) -> str | None:
+    for base, name in _PRISM_CLASSES:
+        if tokentype in base:
+            return name
+    return None
+
+
+def tokenize_code(code: str, lang: str) -> tuple[list, bool]:
+    """Return ``(tokens, highlighted)`` for a fenced code block."""
+    if not pygments or not lang:
+        return [code], False
+    try:
+        lexer = get_lexer_by_name(_LANG_ALIASES.get(lang.lower(), lang.lower()), stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return [code], False
+    tokens: list = []
+    for tokentype, value in lexer.get_tokens(code):
+        cls = None if value.isspace() else _prism_class(tokentype)
+        if cls is None:
+            _push_text(tokens, value)
+        elif tokens and isinstance(tokens[-1], list) and tokens[-1][0] == cls:
+            tokens[-1][1] += value
+        else:
+            tokens.append([cls, value])
+    return tokens, True
+
+
+# ---------------------------------------------------------------- blocks
+
+def _is_block_start(line: str) -> bool:
+    return bool(
+        _FENCE_OPEN.match(line) or _ATX.match(line) or _HR.match(line)
+        or _QUOTE.match(line) or _LIST_ITEM.match(line)
+    )
+
+
+def _split_row(line: str) -> list[str]:
+    row = line.strip()
+    if row.startswith("|"):
+        row = row[1:]
+    if row.endswith("|") and not row.endswith("\\|"):
+        row = row[:-1]
+    cells, current, i = [], "", 0
+    while i < len(row):
+        if row[i] == "\\" and i + 1 < len(row) and row[i + 1] == "|":
+            current += "|"
+            i += 2
+            continue
+        if row[i] == "|":
+            cells.append(current.strip())
+            current = ""
+        else:
+            current += row[i]
+        i += 1
+    cells.append(current.strip())
+    return cells
+
+
+def _dedent(lines: list[str], width: int) -> list[str]:
+    out = []
+    for line in lines:
+        strip = len(line) - len(line.lstrip(" "))
+        out.append(line[min(strip, width):])
+    return out
+
+
+class _BlockParser:
+    def __init__(self, lines: list[str]):
+        self.lines = lines
+        self.i = 0
+
+    def parse(self) -> list[Node]:
+        blocks: list[Node] = []
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            if not line.strip():
+                self.i += 1
+                continue
+            node = (
+                self._fence(line) or self._atx(line) or self._hr(line) or self._quote(line)
+                or self._table(line) or self._list(line) or self._paragraph()
+            )
+            blocks.append(node)
+        return blocks
+
+    def _fence(self, line: str) -> Node | None:
+        m = _FENCE_OPEN.match(line)
+        if not m:
+            return None
+        indent, marker, lang = len(m.group(1)), m.group(2), m.group(3)
+        body = []
+        self.i += 1
+        while self.i < len(self.lines):
+            current = self.lines[self.i]
+            stripped = current.strip()
+            if stripped.startswith(marker[0] * len(marker)) and not stripped.strip(marker[0]):
+                self.i += 1
+                break
+            body.append(current)
+            self.i += 1
+        code = "\n".join(_dedent(body, indent))
+        tokens, highlighted = tokenize_code(code, lang)
+        return {"t": "code", "lang": lang, "hl": highlighted, "c": tokens}
+
+    def _atx(self, line: str) -> Node | None:
+        m = _ATX.match(line)
+        if not m:
+            return None
+        self.i += 1
+        return {"t": "h", "d": len(m.group(1)), "c": parse_inline(m.group(2) or "")}
+
+    def _hr(self, line: str) -> Node | None:
+        if not _HR.match(line):
+            return None
+        self.i += 1
+        return {"t": "hr"}
+
+    def _quote(self, line: str) -> Node | None:
+        if not _QUOTE.match(line):
+            return None
+        inner = []
+        while self.i < len(self.lines):
+            m = _QUOTE.match(self.lines[self.i])
+            if m:
+                inner.append(m.group(1))
+            elif self.lines[self.i].strip() and inner and inner[-1].strip():
+                inner.append(self.lines[self.i])  # lazy continuation
+            else:
+                break
+            self.i += 1
+        return {"t": "quote", "c": _BlockParser(inner).parse()}
+
+    def _table(self, line: str) -> Node | None:
+        if "|" not in line or self.i + 1 >= len(self.lines) or not _TABLE_SEP.match(self.lines[self.i + 1]):
+            return None
+        header = _split_row(line)
+        align = []
+        for cell in _split_row(self.lines[self.i + 1]):
+            left, right = cell.startswith(":"), cell.endswith(":")
+            align.append("center" if left and right else "left" if left else "right" if right else None)
+        if len(align) != len(header):
+            return None
+        rows = [{"t": "tr", "c": [{"t": "th", "c": parse_inline(c)} for c in header]}]
+        self.i += 2
+        while self.i < len(self.lines) and self.lines[self.i].strip() and "|" in self.lines[self.i]:
+            cells = _split_row(self.lines[self.i])
+            cells = (cells + [""] * len(header))[: len(header)]
+            rows.append({"t": "tr", "c": [{"t": "td", "c": parse_inline(c)} for c in cells]})
+            self.i += 1
+        return {"t": "table", "align": align, "c": rows}
+
+    def _same_list(self, index: int, base: int, ordered: bool) -> bool:
+        m = _LIST_ITEM.match(self.lines[index]) if index < len(self.lines) else None
+        return bool(m) and len(m.group(1)) == base and m.group(2)[0].isdigit() == ordered
+
+    def _next_nonblank(self, index: int) -> int:
+        while index < len(self.lines) and not self.lines[index].strip():
+            index += 1
+        return index
+
+    def _list(self, line: str) -> Node | None:
+        m = _LIST_ITEM.match(line)
+        if not m:
+            return None
+        base = len(m.group(1))
+        ordered = m.group(2)[0].isdigit()
+        node: Node = {"t": "ol" if ordered else "ul", "tight": True, "c": []}
+        if ordered:
+            node["start"] = int(m.group(2)[:-1])
+        while self._same_list(self.i, base, ordered):
+            m = _LIST_ITEM.match(self.lines[self.i])
+            content_indent = base + len(m.group(2)) + 1
+            item_lines = [m.group(3) or ""]
+            self.i += 1
+            while self.i < len(self.lines):
+                current = self.lines[self.i]
+                indent = len(current) - len(current.lstrip(" "))
+                if not current.strip():
+                    nxt = self._next_nonblank(self.i)
+                    if nxt == len(self.lines) or len(self.lines[nxt]) - len(self.lines[nxt].lstrip(" ")) <= base:
+                        break
+                    item_lines.extend([""] * (nxt - self.i))
+                    node["tight"] = False
+                    self.i = nxt
+                    continue
+                if indent > base:
+                    item_lines.append(current[min(indent, content_indent):])
+                elif not _is_block_start(current) and item_lines[-1].strip():
+                    item_lines.append(current.lstrip())  # lazy paragraph continuation
+                else:
+                    break
+                self.i += 1
+            node["c"].append({"t": "li", "c": _BlockParser(item_lines).parse()})
+            nxt = self._next_nonblank(self.i)
+            if nxt != self.i and self._same_list(nxt, base, ordered):
+                node["tight"] = False
+                self.i = nxt
+        return node
+
+    def _paragraph(self) -> Node:
+        lines = []
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            if not line.strip():
+                break
+            if lines and _SETEXT.match(line):
+                self.i += 1
+                depth = 1 if line.strip()[0] == "=" else 2
+                return {"t": "h", "d": depth, "c": parse_inline("\n".join(lines).strip())}
+            if lines and (_is_block_start(line) and not _LIST_ITEM.match(line) or _FENCE_OPEN.match(line)):
+                break
+            if lines and _LIST_ITEM.match(line):
+                m = _LIST_ITEM.match(line)
+                # Only bullets and "1." may interrupt a paragraph.
+                if not m.group(2)[0].isdigit() or m.group(2)[:-1] == "1":
+                    break
+            # Trailing spaces stay: two or more before the newline are a hard break.
+            lines.append(line.lstrip())
+            self.i += 1
+        return {"t": "p", "c": parse_inline("\n".join(lines).rstrip())}
+
+
+def parse(markdown: str) -> Node:
+    """Parse ``markdown`` into the tree described in the module docstring."""
+    text = markdown.replace("\r\n", "\n").replace("\t", "    ")
+    return {"v": AST_VERSION, "c": _BlockParser(text.split("\n")).parse()}
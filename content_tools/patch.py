@@ -0,0 +1,163 @@
+"""Replace lessons (or single lesson fields) in a curriculum file by id.
+
+Only the bytes of the affected lessons are re-serialized; everything else in
+the file is copied through untouched and the result is written atomically.
+The command line records a snapshot (``content_tools.snapshot``) before and
+after it writes.
+
+Usage::
+
+    python -m content_tools.patch data/curriculum/c.json c1 new_c1.json
+    python -m content_tools.patch --find c1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping
+
+from .common import curriculum_files, dump_json, write_atomic
+from .jsonindex import IndexBuildError, Span, load_index
+from .snapshot import recording
+
+
+class PatchError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Splice:
+    span: Span
+    replacement: bytes
+
+
+def _indent_at(data: bytes, offset: int) -> str:
+    line_start = data.rfind(b"\n", 0, offset) + 1
+    prefix = data[line_start:offset]
+    return prefix.decode("utf-8") if not prefix.strip() else ""
+
+
+def render_value(value: Any, indent: str) -> bytes:
+    """Serialize ``value`` the way it appears when nested at ``indent``."""
+    text = dump_json(value).replace("\n", "\n" + indent)
+    return text.encode("utf-8")
+
+
+def apply_splices(data: bytes, splices: list[Splice]) -> bytes:
+    ordered = sorted(splices, key=lambda s: s.span.start)
+    for before, after in zip(ordered, ordered[1:]):
+        if after.span.start < before.span.end:
+            raise PatchError("overlapping patches")
+    out = []
+    pos = 0
+    for splice in ordered:
+        out.append(data[pos:splice.span.start])
+        out.append(splice.replacement)
+        pos = splice.span.end
+    out.append(data[pos:])
+    return b"".join(out)
+
+
+def patch_lessons(
+    path: Path,
+    lessons: Mapping[str, Mapping[str, Any]] | None = None,
+    fields: Mapping[str, Mapping[str, Any]] | None = None,
+    verify: bool = True,
+) -> list[str]:
+    """Patch ``path`` in place and return the ids of the lessons that changed.
+
+    ``lessons`` maps a lesson id to its complete replacement object.
+    ``fields`` maps a lesson id to ``{field: value}`` for existing string,
+    object or array fields that should be replaced individually.
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    index = load_index(path, data)
+    splices: list[Splice] = []
+    changed: list[str] = []
+
+    for lesson_id, lesson in (lessons or {}).items():
+        if lesson.get("id", lesson_id) != lesson_id:
+            raise PatchError(f"replacement for {lesson_id!r} has id {lesson['id']!r}")
+        span = index.lesson(lesson_id).span
+        new = render_value(dict(lesson), _indent_at(data, span.start))
+        if new != span.slice(data):
+            splices.append(Splice(span, new))
+            changed.append(lesson_id)
+
+    for lesson_id, values in (fields or {}).items():
+        entry = index.lesson(lesson_id)
+        touched = False
+        for name, value in values.items():
+            span = entry.fields.get(name)
+            if span is None:
+                raise PatchError(f"lesson {lesson_id!r} has no {name!r} field to replace")
+            new = render_value(value, _indent_at(data, entry.span.start) + "  ")
+            if new != span.slice(data):
+                splices.append(Splice(span, new))
+                touched = True
+        if touched:
+            changed.append(lesson_id)
+
+    if not splices:
+        return []
+    result = apply_splices(data, splices)
+    if verify:
+        try:
+            json.loads(result)
+        except ValueError as e:
+            raise PatchError(f"{path.name} would not be valid JSON after patching: {e}") from e
+    write_atomic(path, result)
+    return changed
+
+
+def replace_lesson(path: Path, lesson: Mapping[str, Any], verify: bool = True) -> bool:
+    """Replace the lesson whose id matches ``lesson['id']``."""
+    return bool(patch_lessons(path, lessons={lesson["id"]: lesson}, verify=verify))
+
+
+def find_lesson_file(lesson_id: str, files: list[Path] | None = None) -> Path:
+    for path in files or curriculum_files():
+        if lesson_id in load_index(path).lessons:
+            return path
+    raise KeyError(f"lesson {lesson_id!r} not found in any curriculum file")
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.patch", description=__doc__.split("\n")[0])
+    parser.add_argument("--find", metavar="LESSON_ID", help="print the curriculum file that holds a lesson")
+    parser.add_argument("--field", help="replace only this field of the lesson instead of the whole lesson")
+    parser.add_argument("--no-verify", action="store_true", help="skip parsing the patched file before writing")
+    parser.add_argument("file", nargs="?", type=Path, help="curriculum file, e.g. data/curriculum/c.json")
+    parser.add_argument("lesson_id", nargs="?")
+    parser.add_argument("source", nargs="?", type=Path, help="JSON file with the replacement value")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.find:
+            print(find_lesson_file(args.find))
+            return 0
+        if not (args.file and args.lesson_id and args.source):
+            parser.error("file, lesson_id and source are required")
+        with open(args.source, "r", encoding="utf-8") as f:
+            value = json.load(f)
+        with recording(f"patch {args.lesson_id} in {args.file.name}"):
+            if args.field:
+                changed = patch_lessons(args.file, fields={args.lesson_id: {args.field: value}}, verify=not args.no_verify)
+            else:
+                value.setdefault("id", args.lesson_id)
+                changed = patch_lessons(args.file, lessons={args.lesson_id: value}, verify=not args.no_verify)
+    except (KeyError, PatchError, IndexBuildError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{args.file}: patched {args.lesson_id}" if changed else f"{args.file}: {args.lesson_id} already up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
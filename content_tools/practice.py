@@ -0,0 +1,226 @@
+"""Compile the practice bank into compact, lazily loadable files.
+
+Source of truth is ``public/practice/topics.json`` plus one
+``public/practice/topic_<id>.json`` per topic. The compiled output (default
+``public/content/practice``) contains::
+
+    index.json                   topics with a light problem list
+                                 (id, title, difficulty, estimatedTime)
+                                 and the hashed file names below
+    starters.<hash>.json         interned starter-code strings
+    topic_<id>.<hash>.json       full problem bodies; ``starter_codes`` is
+                                 replaced by ``starter_refs`` ({lang: index})
+
+Every file is minified and gets precompressed ``.gz`` (and ``.br`` when the
+``brotli`` package is installed) siblings.
+
+``--split-bundle public/practice_content.json`` first splits a flat
+``{topics, problems}`` bundle into the topic source files, which is what
+``scripts/split_practice_json.js`` used to do.
+
+Usage::
+
+    python -m content_tools.practice [--out public/content/practice]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import sys
+from pathlib import Path
+from typing import Any
+
+from .common import (
+    HASH_LENGTH,
+    PRACTICE_DIR,
+    PUBLIC_DIR,
+    dump_json,
+    dump_json_compact,
+    load_json,
+    sha256_bytes,
+    write_if_changed,
+)
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz siblings are written without it
+    brotli = None
+
+OUTPUT_DIR = PUBLIC_DIR / "content" / "practice"
+INDEX_VERSION = 1
+INDEX_PROBLEM_FIELDS = ("id", "title", "difficulty", "estimatedTime")
+
+
+def topic_meta(topic: dict) -> dict:
+    """Topic fields without problems, tolerating the older topicId/topicName keys."""
+    meta = {k: v for k, v in topic.items() if k not in ("problems", "topicId", "topicName")}
+    meta.setdefault("id", topic.get("topicId"))
+    meta.setdefault("title", topic.get("topicName"))
+    return meta
+
+
+def load_topics(source_dir: Path = PRACTICE_DIR) -> list[dict]:
+    """Load topics.json and attach the problems from each topic file."""
+    topics = []
+    for topic in load_json(source_dir / "topics.json"):
+        path = source_dir / f"topic_{topic['id']}.json"
+        body = load_json(path) if path.exists() else {}
+        merged = {**topic_meta(body), **topic}
+        merged["problems"] = body.get("problems", [])
+        topics.append(merged)
+    return topics
+
+
+def split_bundle(bundle: Path, source_dir: Path = PRACTICE_DIR) -> int:
+    """Write topics.json and topic_<id>.json from a flat practice bundle."""
+    content = load_json(bundle)
+    topics, problems = content["topics"], content.get("problems", [])
+    write_if_changed(source_dir / "topics.json", dump_json(topics).encode("utf-8"))
+    for topic in topics:
+        body = {**topic, "problems": [p for p in problems if p.get("topicId") == topic["id"]]}
+        write_if_changed(source_dir / f"topic_{topic['id']}.json", dump_json(body).encode("utf-8"))
+    return len(topics)
+
+
+class StarterTable:
+    """Interns starter-code strings so each template is shipped once."""
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def intern(self, text: str) -> int:
+        if text not in self._ids:
+            self._ids[text] = len(self.strings)
+            self.strings.append(text)
+        return self._ids[text]
+
+    def refs(self, starter_codes: dict[str, str]) -> dict[str, int]:
+        return {lang: self.intern(code) for lang, code in starter_codes.items()}
+
+
+def _hashed_name(stem: str, data: bytes) -> str:
+    return f"{stem}.{sha256_bytes(data)[:HASH_LENGTH]}.json"
+
+
+def with_siblings(names: set[str]) -> set[str]:
+    """``names`` plus the precompressed siblings :func:`write_compressed` writes."""
+    suffixes = (".gz", ".br") if brotli is not None else (".gz",)
+    return names | {name + suffix for name in names for suffix in suffixes}
+
+
+def write_compressed(path: Path, data: bytes) -> list[Path]:
+    """Write ``data`` plus precompressed siblings; return the files written.
+
+    A sibling this run cannot produce (``.br`` once brotli is gone) is
+    deleted, so a precompression-aware server never serves it stale."""
+    written = []
+    if write_if_changed(path, data):
+        written.append(path)
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    else:
+        path.with_name(path.name + ".br").unlink(missing_ok=True)
+    for suffix, blob in variants:
+        target = path.with_name(path.name + suffix)
+        if write_if_changed(target, blob):
+            written.append(target)
+    return written
+
+
+def compile_bank(topics: list[dict], out_dir: Path = OUTPUT_DIR, prune: bool = True) -> dict:
+    """Write the compiled practice bank and return its index."""
+    out_dir = Path(out_dir)
+    starters = StarterTable()
+    live: set[str] = set()
+    index_topics = []
+    bodies = []
+
+    for topic in topics:
+        problems = []
+        for problem in topic["problems"]:
+            compact = {k: v for k, v in problem.items() if k != "starter_codes"}
+            if problem.get("starter_codes"):
+                compact["starter_refs"] = starters.refs(problem["starter_codes"])
+            problems.append(compact)
+        bodies.append((topic, problems))
+
+    starter_data = dump_json_compact(starters.strings).encode("utf-8")
+    starter_name = _hashed_name("starters", starter_data)
+    write_compressed(out_dir / starter_name, starter_data)
+    live.add(starter_name)
+
+    for topic, problems in bodies:
+        meta = topic_meta(topic)
+        data = dump_json_compact({**meta, "problems": problems}).encode("utf-8")
+        name = _hashed_name(f"topic_{meta['id']}", data)
+        write_compressed(out_dir / name, data)
+        live.add(name)
+        index_topics.append({
+            **meta,
+            "file": name,
+            "bytes": len(data),
+            "problems": [{k: p[k] for k in INDEX_PROBLEM_FIELDS if k in p} for p in problems],
+        })
+
+    index = {"version": INDEX_VERSION, "starters": starter_name, "topics": index_topics}
+    write_compressed(out_dir / "index.json", dump_json_compact(index).encode("utf-8"))
+    live.add("index.json")
+
+    if prune and out_dir.is_dir():
+        keep = with_siblings(live)
+        for path in out_dir.iterdir():
+            if path.is_file() and path.name not in keep:
+                path.unlink()
+    return index
+
+
+def hydrate(index: dict, out_dir: Path = OUTPUT_DIR) -> list[dict]:
+    """Rebuild the original topics from the compiled files (used to verify
+    that compiling is lossless)."""
+    strings = load_json(Path(out_dir) / index["starters"])
+    topics = []
+    for entry in index["topics"]:
+        body = load_json(Path(out_dir) / entry["file"])
+        for problem in body["problems"]:
+            refs = problem.pop("starter_refs", None)
+            if refs is not None:
+                problem["starter_codes"] = {lang: strings[i] for lang, i in refs.items()}
+        topics.append(body)
+    return topics
+
+
+def _size(value: Any) -> int:
+    return len(dump_json(value).encode("utf-8"))
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.practice", description=__doc__.split("\n")[0])
+    parser.add_argument("--source", type=Path, default=PRACTICE_DIR, help="directory with topics.json and topic files")
+    parser.add_argument("--out", type=Path, default=OUTPUT_DIR, help="output directory (default: public/content/practice)")
+    parser.add_argument("--split-bundle", type=Path, metavar="BUNDLE", help="split a {topics, problems} bundle into --source first")
+    args = parser.parse_args(argv)
+
+    if args.split_bundle:
+        count = split_bundle(args.split_bundle, args.source)
+        print(f"split {args.split_bundle} into {count} topic file(s)")
+
+    topics = load_topics(args.source)
+    index = compile_bank(topics, args.out)
+    if brotli is None:
+        print("note: brotli not installed, only .gz variants written", file=sys.stderr)
+
+    source_bytes = sum(_size(t) for t in topics)
+    compiled = sorted(p for p in args.out.iterdir() if p.suffix == ".json")
+    compiled_bytes = sum(p.stat().st_size for p in compiled)
+    gz_bytes = sum(p.with_name(p.name + ".gz").stat().st_size for p in compiled)
+    problems = sum(len(t["problems"]) for t in index["topics"])
+    print(f"{len(index['topics'])} topics, {problems} problems")
+    print(f"source {source_bytes:,} B -> minified {compiled_bytes:,} B -> gzip {gz_bytes:,} B")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,116 @@
+"""Pre-render lesson Markdown to the JSON tree from ``content_tools.markdown``.
+
+Rendered trees are cached under ``.content-cache/render`` keyed by the hash
+of the Markdown plus the parser and tokenizer versions, so only edited
+lessons are parsed again. Cache misses are rendered in a process pool once
+there are enough of them to pay for it.
+
+``content_tools.shard`` calls :func:`render_many` to add ``contentAst`` to
+every lesson shard; this module's CLI renders a single file or reports how
+long the whole curriculum takes.
+
+Usage::
+
+    python -m content_tools.render lesson.md        # print the tree
+    python -m content_tools.render --all [--no-cache]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from . import markdown
+from .common import (
+    CACHE_DIR,
+    curriculum_files,
+    dump_json_compact,
+    load_json,
+    parallel_map,
+    sha256_bytes,
+    write_atomic,
+)
+
+CACHE_ROOT = CACHE_DIR / "render"
+POOL_THRESHOLD = 64
+
+
+def cache_key(text: str) -> str:
+    salt = f"{markdown.AST_VERSION}:{markdown.TOKENIZER}\0"
+    return sha256_bytes((salt + text).encode("utf-8"))
+
+
+def _cache_path(key: str, cache_root: Path) -> Path:
+    return cache_root / key[:2] / f"{key}.json"
+
+
+def _render(text: str) -> str:
+    return dump_json_compact(markdown.parse(text))
+
+
+def render_many(
+    texts: list[str], jobs: int | None = None, use_cache: bool = True, cache_root: Path = CACHE_ROOT
+) -> tuple[list[dict[str, Any]], int]:
+    """Render each Markdown string; return the trees and the cache-hit count."""
+    keys = [cache_key(text) for text in texts]
+    rendered: dict[str, str] = {}
+    misses: dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key in rendered or key in misses:
+            continue
+        path = _cache_path(key, cache_root)
+        if use_cache and path.exists():
+            rendered[key] = path.read_text(encoding="utf-8")
+        else:
+            misses[key] = text
+    hits = sum(1 for key in keys if key not in misses)
+
+    if misses:
+        pending = list(misses.items())
+        results = parallel_map(_render, [text for _, text in pending], jobs, POOL_THRESHOLD, chunksize=16)
+        for (key, _), data in zip(pending, results):
+            rendered[key] = data
+            if use_cache:
+                write_atomic(_cache_path(key, cache_root), data.encode("utf-8"))
+
+    return [json.loads(rendered[key]) for key in keys], hits
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.render", description=__doc__.split("\n")[0])
+    parser.add_argument("source", nargs="?", type=Path, help="Markdown file to render")
+    parser.add_argument("--all", action="store_true", help="render every lesson in data/curriculum")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not update the render cache")
+    args = parser.parse_args(argv)
+
+    if args.source:
+        tree, _ = render_many([args.source.read_text(encoding="utf-8")], use_cache=False)
+        print(json.dumps(tree[0], indent=2, ensure_ascii=False))
+        return 0
+    if not args.all:
+        parser.error("give a Markdown file or --all")
+
+    texts = [
+        lesson["content"]
+        for path in curriculum_files()
+        for level in load_json(path)
+        for lesson in level.get("lessons", [])
+        if isinstance(lesson.get("content"), str)
+    ]
+    started = time.perf_counter()
+    trees, hits = render_many(texts, args.jobs, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - started
+    size = sum(len(dump_json_compact(tree)) for tree in trees)
+    print(f"rendered {len(texts)} lesson(s) in {elapsed:.2f}s ({hits} cached), {size:,} B of trees")
+    if markdown.pygments is None:
+        print("note: pygments not installed, code blocks are not pre-highlighted", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
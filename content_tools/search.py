@@ -0,0 +1,363 @@
+"""Build a sharded, prefix-searchable BM25 index over lessons and problems.
+
+Indexed documents are curriculum lessons (title, content, quiz questions)
+and practice problems (title, concept, description). Output (default
+``public/content/search``)::
+
+    meta.json                 documents and their lengths, BM25 parameters,
+                              corpus statistics and the shard table
+    terms.<hash>.json         one shard: sorted terms and their postings
+
+Terms are split into shards by their first two characters, so a query term
+(or a prefix of at least two characters) always lives in exactly one
+shard. Each shard is ``{"terms": [...], "postings": [[doc, tf, ...]]}``
+where postings are delta-encoded document indexes followed by the term's
+field-weighted frequency in that document (×2, so it is an integer).
+Scoring happens at query time from those frequencies, the document lengths
+and ``n``/``avgdl`` in ``meta.json``; a term's document frequency is the
+length of its posting list. Prefix matching is a binary search over the
+sorted ``terms``.
+
+A shard therefore only depends on the documents containing its terms, and
+the layout is kept stable between builds: documents keep their index
+(removed ones leave a ``null`` until more than a quarter are holes) and
+shard boundaries are taken from the previous ``meta.json``, splitting only
+shards that have grown past twice the target size. Editing one lesson
+rewrites the shards of the terms it gained or lost, plus ``meta.json``.
+
+Tokenized documents are cached per lesson/problem id with the hash of their
+text, so after an escape or repair run only the edited ids are tokenized
+again.
+
+Usage::
+
+    python -m content_tools.search build [--out public/content/search]
+    python -m content_tools.search query "linked list"
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import math
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from .common import (
+    CACHE_DIR,
+    PRACTICE_DIR,
+    HASH_LENGTH,
+    PUBLIC_DIR,
+    curriculum_files,
+    dump_json_compact,
+    load_cache,
+    load_json,
+    sha256_bytes,
+    write_atomic,
+    write_if_changed,
+)
+from .practice import load_topics
+
+OUTPUT_DIR = PUBLIC_DIR / "content" / "search"
+CACHE_FILE = CACHE_DIR / "search.json"
+INDEX_VERSION = 2
+# BM25 parameters and per-field term-frequency weights (a simple BM25F).
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {"title": 3.0, "concept": 2.0, "content": 1.0, "description": 1.0, "quiz": 0.5}
+# Shards are merged until they hold at least this many postings bytes.
+SHARD_TARGET_BYTES = 24 * 1024
+
+_WORD = re.compile(r"[a-z0-9_]+(?:\+\+|#)?")
+_MARKUP = re.compile(r"!?\[([^\]]*)\]\([^)]*\)|https?://\S+")
+_ALIASES = {"c++": "cpp", "c#": "csharp"}
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have if in into is it its of on or so that the their then there "
+    "these this to was were will with you your we our can not".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case words of ``text`` without Markdown link targets or stop words."""
+    words = _WORD.findall(_MARKUP.sub(r"\1", text).lower())
+    return [_ALIASES.get(w, w) for w in words if w not in STOP_WORDS and not w.isdigit()]
+
+
+@dataclass
+class Document:
+    id: str
+    kind: str  # "lesson" or "problem"
+    group: str  # language for lessons, topic id for problems
+    title: str
+    fields: dict[str, str]
+
+    @property
+    def digest(self) -> str:
+        return sha256_bytes(dump_json_compact(self.fields).encode("utf-8"))
+
+
+def lesson_documents(files: list[Path] | None = None) -> list[Document]:
+    docs = []
+    for path in files or curriculum_files():
+        for level in load_json(path):
+            for lesson in level.get("lessons", []):
+                if not lesson.get("id"):
+                    continue
+                quiz = " ".join(
+                    " ".join([str(q.get("text", "")), *map(str, q.get("options") or [])])
+                    for q in lesson.get("quizQuestions") or []
+                    if isinstance(q, dict)
+                )
+                fields = {"title": lesson.get("title") or "", "content": lesson.get("content") or "", "quiz": quiz}
+                docs.append(Document(lesson["id"], "lesson", path.stem, fields["title"], fields))
+    return docs
+
+
+def problem_documents(source_dir: Path = PRACTICE_DIR) -> list[Document]:
+    docs = []
+    for topic in load_topics(source_dir):
+        for problem in topic["problems"]:
+            fields = {k: problem.get(k) or "" for k in ("title", "concept", "description")}
+            docs.append(Document(problem["id"], "problem", topic["id"], fields["title"], fields))
+    return docs
+
+
+def term_counts(doc: Document) -> dict[str, float]:
+    """Field-weighted term frequencies of one document."""
+    counts: Counter[str] = Counter()
+    for name, text in doc.fields.items():
+        weight = FIELD_WEIGHTS[name]
+        for term in tokenize(text):
+            counts[term] += weight
+    return dict(counts)
+
+
+def tokenize_documents(docs: list[Document], use_cache: bool = True) -> tuple[list[dict[str, float]], list[str]]:
+    """Return the term counts of ``docs`` and the ids that had to be re-tokenized."""
+    cache = load_cache(CACHE_FILE, INDEX_VERSION).get("docs", {}) if use_cache else {}
+    fresh = {}
+    counts = []
+    changed = []
+    for doc in docs:
+        key = f"{doc.kind}:{doc.id}"
+        digest = doc.digest
+        entry = cache.get(key)
+        if entry is None or entry["hash"] != digest:
+            entry = {"hash": digest, "terms": term_counts(doc)}
+            changed.append(doc.id)
+        fresh[key] = entry
+        counts.append(entry["terms"])
+    if use_cache and (changed or len(fresh) != len(cache)):
+        write_atomic(CACHE_FILE, dump_json_compact({"version": INDEX_VERSION, "docs": fresh}).encode("utf-8"))
+    return counts, changed
+
+
+def bm25(tf: float, df: int, length: float, n: int, avgdl: float) -> float:
+    idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+    norm = K1 * (1 - B + B * length / avgdl) if avgdl else K1
+    return idf * tf * (K1 + 1) / (tf + norm)
+
+
+def term_postings(counts: dict[int, dict[str, float]]) -> dict[str, list[tuple[int, int]]]:
+    """Map each term to ``(doc index, tf x 2)`` pairs sorted by doc index."""
+    postings: dict[str, list[tuple[int, int]]] = {}
+    for i in sorted(counts):
+        for term, tf in counts[i].items():
+            postings.setdefault(term, []).append((i, round(2 * tf)))
+    return postings
+
+
+def shard_key(term: str) -> str:
+    return term[:2]
+
+
+def _previous_layout(out_dir: Path) -> tuple[list[str | None], list[str]]:
+    """Document slots and shard starts of the index already in ``out_dir``."""
+    try:
+        meta = load_json(out_dir / "meta.json")
+    except (OSError, ValueError):
+        return [], []
+    if meta.get("version") != INDEX_VERSION:
+        return [], []
+    return [f"{d[0]}:{d[1]}" if d else None for d in meta["docs"]], [start for start, _ in meta["shards"]]
+
+
+def assign_slots(keys: list[str], previous: list[str | None]) -> list[str | None]:
+    """Give each document key an index, keeping the indexes of ``previous``."""
+    wanted = set(keys)
+    slots = [key if key in wanted else None for key in previous]
+    if slots.count(None) * 4 > len(slots):
+        slots = [key for key in slots if key]
+    placed = set(slots)
+    slots += [key for key in keys if key not in placed]
+    while slots and slots[-1] is None:
+        slots.pop()
+    return slots
+
+
+def plan_shards(sizes: dict[str, int], previous_starts: list[str]) -> list[list[str]]:
+    """Group the sorted shard keys into shards of roughly ``SHARD_TARGET_BYTES``."""
+    keys = sorted(sizes)
+
+    def pack(run: list[str]) -> list[list[str]]:
+        shards, current, size = [], [], 0
+        for key in run:
+            current.append(key)
+            size += sizes[key]
+            if size >= SHARD_TARGET_BYTES:
+                shards.append(current)
+                current, size = [], 0
+        if current:
+            shards.append(current)
+        return shards
+
+    if not previous_starts:
+        return pack(keys)
+    buckets: list[list[str]] = [[] for _ in previous_starts]
+    for key in keys:
+        buckets[max(bisect.bisect_right(previous_starts, key) - 1, 0)].append(key)
+    shards = []
+    for bucket in buckets:
+        if sum(sizes[key] for key in bucket) > 2 * SHARD_TARGET_BYTES:
+            shards += pack(bucket)
+        elif bucket:
+            shards.append(bucket)
+    return shards
+
+
+def _encode_postings(pairs: list[tuple[int, int]]) -> list[int]:
+    flat, previous = [], 0
+    for doc, weight in pairs:
+        flat += [doc - previous, weight]
+        previous = doc
+    return flat
+
+
+def build(out_dir: Path = OUTPUT_DIR, use_cache: bool = True, prune: bool = True) -> tuple[dict, list[str]]:
+    """Write the index and return its meta document and the re-tokenized ids."""
+    out_dir = Path(out_dir)
+    docs = lesson_documents() + problem_documents()
+    counts, changed = tokenize_documents(docs, use_cache)
+    previous_slots, previous_starts = _previous_layout(out_dir)
+    slots = assign_slots([f"{doc.kind}:{doc.id}" for doc in docs], previous_slots)
+    index = {key: i for i, key in enumerate(slots) if key}
+    by_slot = {index[f"{doc.kind}:{doc.id}"]: (doc, c) for doc, c in zip(docs, counts)}
+    postings = term_postings({i: c for i, (_doc, c) in by_slot.items()})
+
+    groups: dict[str, list[str]] = {}
+    for term in sorted(postings):
+        groups.setdefault(shard_key(term), []).append(term)
+    sizes = {key: sum(8 + len(t) + 6 * len(postings[t]) for t in terms) for key, terms in groups.items()}
+
+    shards = []
+    live = {"meta.json"}
+    for keys in plan_shards(sizes, previous_starts):
+        terms = [t for key in keys for t in groups[key]]
+        body = {"terms": terms, "postings": [_encode_postings(postings[t]) for t in terms]}
+        data = dump_json_compact(body).encode("utf-8")
+        name = f"terms.{sha256_bytes(data)[:HASH_LENGTH]}.json"
+        write_if_changed(out_dir / name, data)
+        live.add(name)
+        shards.append([keys[0], name])
+
+    lengths = {i: round(2 * sum(c.values())) for i, (_doc, c) in by_slot.items()}
+    meta = {
+        "version": INDEX_VERSION,
+        "fields": FIELD_WEIGHTS,
+        "bm25": {"k1": K1, "b": B},
+        "n": len(docs),
+        "avgdl": round(sum(lengths.values()) / 2 / len(docs), 3) if docs else 0,
+        "docs": [
+            [by_slot[i][0].kind, by_slot[i][0].id, by_slot[i][0].group, by_slot[i][0].title, lengths[i]]
+            if i in by_slot else None
+            for i in range(len(slots))
+        ],
+        "shards": shards,
+    }
+    write_if_changed(out_dir / "meta.json", dump_json_compact(meta).encode("utf-8"))
+
+    if prune:
+        for path in out_dir.glob("*.json"):
+            if path.name not in live:
+                path.unlink()
+    return meta, changed
+
+
+class SearchIndex:
+    """Reads a built index the way the client does, loading shards lazily."""
+
+    def __init__(self, out_dir: Path = OUTPUT_DIR):
+        self.out_dir = Path(out_dir)
+        self.meta = load_json(self.out_dir / "meta.json")
+        self._starts = [start for start, _ in self.meta["shards"]]
+        self._shards: dict[str, dict] = {}
+
+    def _shard(self, term: str) -> dict:
+        i = bisect.bisect_right(self._starts, shard_key(term)) - 1
+        name = self.meta["shards"][max(i, 0)][1]
+        if name not in self._shards:
+            self._shards[name] = load_json(self.out_dir / name)
+        return self._shards[name]
+
+    def _matches(self, token: str, prefix: bool) -> list[list[int]]:
+        shard = self._shard(token)
+        terms = shard["terms"]
+        i = bisect.bisect_left(terms, token)
+        found = []
+        while i < len(terms) and (terms[i] == token or prefix and terms[i].startswith(token)):
+            found.append(shard["postings"][i])
+            i += 1
+            if not prefix:
+                break
+        return found
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[float, list]]:
+        """Score documents for ``query``; the last word also matches as a prefix."""
+        docs, n, avgdl = self.meta["docs"], self.meta["n"], self.meta["avgdl"]
+        tokens = tokenize(query)
+        scores: Counter[int] = Counter()
+        for i, token in enumerate(tokens):
+            prefix = i == len(tokens) - 1 and len(token) >= 2 and not query[-1:].isspace()
+            best: dict[int, float] = {}
+            for flat in self._matches(token, prefix):
+                df = len(flat) // 2
+                doc = 0
+                for j in range(0, len(flat), 2):
+                    doc += flat[j]
+                    weight = bm25(flat[j + 1] / 2, df, docs[doc][4] / 2, n, avgdl)
+                    best[doc] = max(best.get(doc, 0.0), weight)
+            for doc, weight in best.items():
+                scores[doc] += weight
+        return [(score, docs[doc][:4]) for doc, score in scores.most_common(limit)]
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.search", description=__doc__.split("\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="build the index")
+    build_cmd.add_argument("--out", type=Path, default=OUTPUT_DIR, help="output directory (default: public/content/search)")
+    build_cmd.add_argument("--no-cache", action="store_true", help="re-tokenize every document")
+    query_cmd = sub.add_parser("query", help="search a built index")
+    query_cmd.add_argument("text")
+    query_cmd.add_argument("--out", type=Path, default=OUTPUT_DIR, help="index directory")
+    query_cmd.add_argument("-n", "--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        meta, changed = build(args.out, use_cache=not args.no_cache)
+        total = sum((args.out / name).stat().st_size for _, name in meta["shards"])
+        print(f"{meta['n']} documents, {len(meta['shards'])} shard(s), {total:,} B of postings")
+        print(f"re-tokenized {len(changed)} document(s)" + (f": {', '.join(changed[:10])}" if 0 < len(changed) <= 10 else ""))
+        return 0
+
+    index = SearchIndex(args.out)
+    for score, (kind, doc_id, group, title) in index.search(args.text, args.limit):
+        print(f"{score:8.2f}  {kind:<7} {group:<12} {doc_id:<28} {title}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
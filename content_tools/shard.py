@@ -0,0 +1,183 @@
+"""Split each curriculum file into an outline plus one shard per lesson.
+
+Output layout (default ``public/content``)::
+
+    manifest.json                 languages -> outline file, rewritten every build
+    outline/<lang>.<hash>.json    levels and lesson titles/durations/hashes
+    lessons/<hash>.json           one full lesson (content, quizQuestions, ...)
+                                  plus ``contentAst``, the pre-rendered content
+
+Outline and lesson files are content addressed, so the client can fetch
+``manifest.json`` with revalidation, then the outline, and load lessons on
+demand while caching both forever. Shards that are no longer referenced are
+removed at the end of a full build.
+
+``contentAst`` is the sanitized tree from ``content_tools.markdown`` (cached
+by ``content_tools.render``), so the client can render lessons without
+parsing Markdown or highlighting code at runtime. ``--no-render`` skips it.
+
+When ``content_tools.assets`` has been run, image refs in ``content`` point
+at the optimized, content-hashed files and image nodes in ``contentAst``
+carry their width, height and srcset.
+
+Usage::
+
+    python -m content_tools.shard [--out public/content] [--no-render]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from . import assets
+from .common import HASH_LENGTH, PUBLIC_DIR, curriculum_files, dump_json_compact, load_json, sha256_bytes, write_if_changed
+from .render import render_many
+
+OUTPUT_DIR = PUBLIC_DIR / "content"
+MANIFEST_VERSION = 1
+# Lesson fields copied into the outline; every field also stays in the shard.
+OUTLINE_LESSON_FIELDS = ("id", "title", "duration", "difficultyLevel")
+
+
+def content_hash(data: bytes) -> str:
+    return sha256_bytes(data)[:HASH_LENGTH]
+
+
+def encode(value: Any) -> bytes:
+    return dump_json_compact(value).encode("utf-8")
+
+
+def _with_images(levels: list[dict], images: dict[str, dict]) -> list[dict]:
+    return [
+        {**level, "lessons": [
+            {**lesson, "content": assets.rewrite_markdown(lesson["content"], images)}
+            if isinstance(lesson.get("content"), str) else lesson
+            for lesson in level.get("lessons", [])
+        ]}
+        for level in levels
+    ]
+
+
+def _with_rendered_content(levels: list[dict], images: dict[str, dict]) -> list[dict]:
+    rendered = [
+        lesson for level in levels for lesson in level.get("lessons", []) if isinstance(lesson.get("content"), str)
+    ]
+    trees, _ = render_many([lesson["content"] for lesson in rendered])
+    asts = {}
+    for lesson, tree in zip(rendered, trees):
+        assets.annotate_tree(tree, images)
+        asts[id(lesson)] = tree
+    return [
+        {**level, "lessons": [
+            {**lesson, "contentAst": asts[id(lesson)]} if id(lesson) in asts else lesson
+            for lesson in level.get("lessons", [])
+        ]}
+        for level in levels
+    ]
+
+
+def build_language(
+    levels: list[dict], out_dir: Path, render: bool = True, images: dict[str, dict] | None = None
+) -> tuple[dict, set[str], int]:
+    """Write the lesson shards of one language and return its outline, the
+    shard names it references and how many shard files were (re)written.
+
+    ``images`` is the ref -> optimized image map from ``content_tools.assets``.
+    """
+    if images:
+        levels = _with_images(levels, images)
+    if render:
+        levels = _with_rendered_content(levels, images or {})
+    outline_levels = []
+    shards: set[str] = set()
+    written = 0
+    for level in levels:
+        lessons = []
+        for lesson in level.get("lessons", []):
+            data = encode(lesson)
+            digest = content_hash(data)
+            name = f"{digest}.json"
+            shards.add(name)
+            if write_if_changed(out_dir / "lessons" / name, data):
+                written += 1
+            entry = {k: lesson[k] for k in OUTLINE_LESSON_FIELDS if k in lesson}
+            entry["hash"] = digest
+            entry["size"] = len(data)
+            entry["quizCount"] = len(lesson.get("quizQuestions") or [])
+            lessons.append(entry)
+        outline_level = {k: v for k, v in level.items() if k != "lessons"}
+        outline_level["lessons"] = lessons
+        outline_levels.append(outline_level)
+    return {"version": MANIFEST_VERSION, "levels": outline_levels}, shards, written
+
+
+def build(
+    out_dir: Path = OUTPUT_DIR, sources: list[Path] | None = None, prune: bool = True, render: bool = True
+) -> tuple[dict, int, int]:
+    """Build outlines and shards for every curriculum file.
+
+    Returns the manifest, the number of lesson shards written and the number
+    of stale files removed.
+    """
+    out_dir = Path(out_dir)
+    manifest: dict[str, Any] = {"version": MANIFEST_VERSION, "languages": {}}
+    if sources:
+        # A partial build keeps the other languages and their shards.
+        prune = False
+        try:
+            manifest["languages"] = load_json(out_dir / "manifest.json")["languages"]
+        except (OSError, ValueError, KeyError):
+            pass
+    live = {"lessons": set(), "outline": set()}
+    written = 0
+    images = assets.load_map(out_dir / "img")
+
+    for source in sources or curriculum_files():
+        lang = source.stem
+        outline, shards, count = build_language(load_json(source), out_dir, render, images)
+        written += count
+        live["lessons"] |= shards
+        data = encode(outline)
+        name = f"{lang}.{content_hash(data)}.json"
+        live["outline"].add(name)
+        write_if_changed(out_dir / "outline" / name, data)
+        manifest["languages"][lang] = {
+            "outline": f"outline/{name}",
+            "lessons": sum(len(level["lessons"]) for level in outline["levels"]),
+            "bytes": len(data) + sum(l["size"] for level in outline["levels"] for l in level["lessons"]),
+        }
+
+    write_if_changed(out_dir / "manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+
+    removed = 0
+    if prune:
+        for sub, names in live.items():
+            folder = out_dir / sub
+            for path in folder.glob("*.json") if folder.is_dir() else ():
+                if path.name not in names:
+                    path.unlink()
+                    removed += 1
+    return manifest, written, removed
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.shard", description=__doc__.split("\n")[0])
+    parser.add_argument("--out", type=Path, default=OUTPUT_DIR, help="output directory (default: public/content)")
+    parser.add_argument("--no-prune", action="store_true", help="keep shards that are no longer referenced")
+    parser.add_argument("--no-render", action="store_true", help="do not add pre-rendered contentAst to shards")
+    parser.add_argument("sources", nargs="*", type=Path, help="curriculum files (default: data/curriculum/*.json)")
+    args = parser.parse_args(argv)
+
+    manifest, written, removed = build(args.out, args.sources or None, prune=not args.no_prune, render=not args.no_render)
+    for lang, info in manifest["languages"].items():
+        print(f"{lang:<12} {info['lessons']:>4} lessons  {info['outline']}")
+    print(f"wrote {written} lesson shard(s), removed {removed} stale file(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
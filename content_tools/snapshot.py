@@ -0,0 +1,364 @@
+"""Content-addressed snapshots of the curriculum and practice files.
+
+Replaces the hand-made ``*.backup.json`` copies. A snapshot records every
+file under ``data/curriculum`` and ``public/practice`` at lesson/problem
+granularity: each lesson, problem and level/topic header is stored once as
+an object named by its SHA-256, so a snapshot after a one-lesson repair
+adds a single object plus a small tree. Store layout (``.content-store``)::
+
+    objects/<ab>/<sha>            one lesson, problem, header, tree or raw file
+    snapshots/<id>.json           {id, created, label, files: {path: {sha, tree}}}
+
+Files that do not round-trip through the repo's JSON formatting (apart
+from a trailing newline) are kept as a single raw object, so a rollback
+always restores the exact bytes.
+
+``repair_c_json.py``, ``content_tools.escape`` and ``content_tools.patch``
+record a snapshot before and after they write (see :func:`recording`);
+nothing is recorded when the content did not change.
+
+Usage::
+
+    python -m content_tools.snapshot record -m "before manual edit"
+    python -m content_tools.snapshot list
+    python -m content_tools.snapshot diff <id> [<id>]      # default: working tree
+    python -m content_tools.snapshot rollback <id> [--path FILE] [--entry c1]
+    python -m content_tools.snapshot import public/practice/topic_math.backup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from .common import (
+    CURRICULUM_DIR,
+    PRACTICE_DIR,
+    REPO_ROOT,
+    dump_json,
+    dump_json_compact,
+    load_json,
+    sha256_bytes,
+    write_atomic,
+)
+from .validate import is_backup, live_path_for
+
+STORE_DIR = REPO_ROOT / ".content-store"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def tracked_files() -> list[Path]:
+    """The content files every snapshot covers."""
+    files = list(CURRICULUM_DIR.glob("*.json")) + list(PRACTICE_DIR.glob("*.json"))
+    return sorted(p for p in files if not is_backup(p))
+
+
+def _relative(path: Path) -> str:
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _entry_id(entry: Any, index: int) -> str:
+    return str(entry["id"]) if isinstance(entry, dict) and "id" in entry else f"#{index}"
+
+
+@dataclass
+class Snapshot:
+    id: str
+    created: str
+    label: str
+    files: dict[str, dict[str, str]]
+
+    def to_json(self) -> dict:
+        return {"id": self.id, "created": self.created, "label": self.label, "files": self.files}
+
+
+class Store:
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+
+    # ------------------------------------------------------------ objects
+
+    def _object_path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / sha
+
+    def put(self, data: bytes) -> str:
+        sha = sha256_bytes(data)
+        path = self._object_path(sha)
+        if not path.exists():
+            write_atomic(path, data)
+        return sha
+
+    def get(self, sha: str) -> bytes:
+        try:
+            return self._object_path(sha).read_bytes()
+        except FileNotFoundError:
+            raise SnapshotError(f"missing object {sha}") from None
+
+    def get_json(self, sha: str) -> Any:
+        return json.loads(self.get(sha))
+
+    # ------------------------------------------------------------ trees
+
+    def tree_for(self, raw: bytes, write: bool = True) -> dict:
+        """Split a file into entry objects and return its tree."""
+        put = self.put if write else sha256_bytes
+
+        def obj(value: Any) -> str:
+            return put(dump_json_compact(value).encode("utf-8"))
+
+        try:
+            doc = json.loads(raw)
+            formatted = dump_json(doc).encode("utf-8")
+        except ValueError:
+            formatted = None
+        eol = raw.endswith(b"\n") and formatted == raw[:-1]
+        if formatted != raw and not eol:
+            return {"kind": "raw", "data": put(raw)}
+
+        def group(value: dict, key: str) -> dict:
+            header = {k: (None if k == key else v) for k, v in value.items()}
+            return {"key": key, "header": obj(header),
+                    "items": [[_entry_id(e, i), obj(e)] for i, e in enumerate(value[key])]}
+
+        if isinstance(doc, list) and doc and all(isinstance(l, dict) and isinstance(l.get("lessons"), list) for l in doc):
+            tree = {"kind": "curriculum", "groups": [group(level, "lessons") for level in doc]}
+        elif isinstance(doc, dict) and isinstance(doc.get("problems"), list):
+            tree = {"kind": "topic", "groups": [group(doc, "problems")]}
+        else:
+            tree = {"kind": "json", "data": obj(doc)}
+        if eol:
+            tree["eol"] = True
+        return tree
+
+    def file_bytes(self, tree: dict) -> bytes:
+        """Rebuild the exact file contents a tree was made from."""
+        if tree["kind"] == "raw":
+            return self.get(tree["data"])
+        if tree["kind"] == "json":
+            doc = self.get_json(tree["data"])
+        else:
+            groups = []
+            for group in tree["groups"]:
+                items = [self.get_json(sha) for _, sha in group["items"]]
+                header = self.get_json(group["header"])
+                groups.append({k: (items if k == group["key"] else v) for k, v in header.items()})
+            doc = groups[0] if tree["kind"] == "topic" else groups
+        return (dump_json(doc) + ("\n" if tree.get("eol") else "")).encode("utf-8")
+
+    def entries(self, tree: dict) -> dict[str, str]:
+        """``{entry id: object sha}`` for the lessons/problems of a tree."""
+        if tree["kind"] in ("raw", "json"):
+            return {}
+        return {entry_id: sha for group in tree["groups"] for entry_id, sha in group["items"]}
+
+    # ------------------------------------------------------------ snapshots
+
+    def snapshots(self) -> list[str]:
+        folder = self.root / "snapshots"
+        return sorted(p.stem for p in folder.glob("*.json")) if folder.is_dir() else []
+
+    def load(self, ref: str) -> Snapshot:
+        ids = self.snapshots()
+        if not ids:
+            raise SnapshotError("no snapshots recorded yet")
+        if ref == "latest":
+            matches = ids[-1:]
+        else:
+            matches = [i for i in ids if i.startswith(ref)]
+        if len(matches) != 1:
+            raise SnapshotError(f"{'ambiguous' if matches else 'unknown'} snapshot {ref!r}")
+        data = load_json(self.root / "snapshots" / f"{matches[0]}.json")
+        return Snapshot(**data)
+
+    def latest(self) -> Snapshot | None:
+        return self.load("latest") if self.snapshots() else None
+
+    def record(self, label: str, overrides: dict[str, bytes] | None = None) -> Snapshot | None:
+        """Snapshot every tracked file.
+
+        ``overrides`` maps a relative path to the bytes to record for it
+        instead of its current contents. Returns None when the state equals
+        the latest snapshot.
+        """
+        previous = self.latest()
+        files: dict[str, dict[str, str]] = {}
+        contents = {_relative(p): p.read_bytes() for p in tracked_files()}
+        contents.update(overrides or {})
+        for rel, raw in sorted(contents.items()):
+            sha = sha256_bytes(raw)
+            known = previous.files.get(rel) if previous else None
+            if known and known["sha"] == sha:
+                files[rel] = known
+            else:
+                tree = dump_json_compact(self.tree_for(raw)).encode("utf-8")
+                files[rel] = {"sha": sha, "tree": self.put(tree)}
+        if previous and previous.files == files:
+            return None
+        now = datetime.now(timezone.utc)
+        digest = sha256_bytes(dump_json_compact(files).encode("utf-8"))[:8]
+        snapshot = Snapshot(f"{now:%Y%m%dT%H%M%S%fZ}-{digest}", now.isoformat(timespec="seconds"), label, files)
+        write_atomic(self.root / "snapshots" / f"{snapshot.id}.json", json.dumps(snapshot.to_json(), indent=1).encode("utf-8"))
+        return snapshot
+
+    def working_tree(self) -> Snapshot:
+        """The current files as an unsaved snapshot (objects are not written)."""
+        files = {}
+        for path in tracked_files():
+            raw = path.read_bytes()
+            tree = self.tree_for(raw, write=False)
+            files[_relative(path)] = {"sha": sha256_bytes(raw), "tree": tree}
+        return Snapshot("working-tree", "", "", files)
+
+    def _tree(self, info: dict) -> dict:
+        return info["tree"] if isinstance(info["tree"], dict) else self.get_json(info["tree"])
+
+    def diff(self, old: Snapshot, new: Snapshot) -> dict[str, dict[str, list[str]]]:
+        """Per file, the entry ids added, removed and changed from ``old`` to ``new``."""
+        changes = {}
+        for rel in sorted(old.files.keys() | new.files.keys()):
+            a, b = old.files.get(rel), new.files.get(rel)
+            if a and b and a["sha"] == b["sha"]:
+                continue
+            if not a or not b:
+                changes[rel] = {"file": ["added" if b else "removed"]}
+                continue
+            before, after = self.entries(self._tree(a)), self.entries(self._tree(b))
+            change = {
+                "added": [i for i in after if i not in before],
+                "removed": [i for i in before if i not in after],
+                "changed": [i for i in after if i in before and before[i] != after[i]],
+            }
+            if not any(change.values()):
+                change = {"file": ["headers or formatting changed"]}
+            changes[rel] = {k: v for k, v in change.items() if v}
+        return changes
+
+    def rollback(self, snapshot: Snapshot, paths: list[str] | None = None, entries: list[str] | None = None) -> list[str]:
+        """Restore files (or single lessons/problems) from ``snapshot``.
+
+        Returns the relative paths that were rewritten.
+        """
+        selected = {rel: info for rel, info in snapshot.files.items() if not paths or rel in paths}
+        if paths and len(selected) != len(set(paths)):
+            missing = sorted(set(paths) - selected.keys())
+            raise SnapshotError(f"not in snapshot {snapshot.id}: {', '.join(missing)}")
+        written = []
+        if not entries:
+            for rel, info in selected.items():
+                target = REPO_ROOT / rel
+                if target.exists() and sha256_bytes(target.read_bytes()) == info["sha"]:
+                    continue
+                write_atomic(target, self.file_bytes(self._tree(info)))
+                written.append(rel)
+            return written
+
+        wanted = set(entries)
+        for rel, info in selected.items():
+            tree = self._tree(info)
+            found = {i: sha for i, sha in self.entries(tree).items() if i in wanted}
+            if not found:
+                continue
+            wanted -= found.keys()
+            target = REPO_ROOT / rel
+            raw = target.read_bytes()
+            doc = json.loads(raw)
+            restored = {i: self.get_json(sha) for i, sha in found.items()}
+            groups = doc if tree["kind"] == "curriculum" else [doc]
+            key = "lessons" if tree["kind"] == "curriculum" else "problems"
+            for group in groups:
+                group[key] = [restored.pop(_entry_id(e, n), e) for n, e in enumerate(group[key])]
+            if restored:
+                raise SnapshotError(f"{rel}: {', '.join(sorted(restored))} no longer exist; roll back the whole file")
+            write_atomic(target, (dump_json(doc) + ("\n" if raw.endswith(b"\n") else "")).encode("utf-8"))
+            written.append(rel)
+        if wanted:
+            raise SnapshotError(f"not in snapshot {snapshot.id}: {', '.join(sorted(wanted))}")
+        return written
+
+
+@contextmanager
+def recording(label: str, store: Store | None = None) -> Iterator[Store]:
+    """Snapshot the content before and after the wrapped block writes it."""
+    store = store or Store()
+    store.record(f"before {label}")
+    yield store
+    store.record(label)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.snapshot", description=__doc__.split("\n")[0])
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="store directory (default: .content-store)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    record_cmd = sub.add_parser("record", help="snapshot the current content")
+    record_cmd.add_argument("-m", "--message", default="manual snapshot")
+    list_cmd = sub.add_parser("list", help="list snapshots, newest first")
+    list_cmd.add_argument("-n", type=int, default=20, help="how many to show (default: 20)")
+    diff_cmd = sub.add_parser("diff", help="lessons/problems changed between two snapshots")
+    diff_cmd.add_argument("old")
+    diff_cmd.add_argument("new", nargs="?", help="default: the working tree")
+    rollback_cmd = sub.add_parser("rollback", help="restore content from a snapshot")
+    rollback_cmd.add_argument("snapshot")
+    rollback_cmd.add_argument("--path", action="append", help="only this file (relative to the repo root)")
+    rollback_cmd.add_argument("--entry", action="append", help="only this lesson/problem id")
+    import_cmd = sub.add_parser("import", help="record a *.backup.json copy as a snapshot of its live file")
+    import_cmd.add_argument("backups", nargs="+", type=Path)
+    args = parser.parse_args(argv)
+    store = Store(args.store)
+
+    try:
+        if args.command == "record":
+            snapshot = store.record(args.message)
+            print(snapshot.id if snapshot else "nothing changed since the latest snapshot")
+        elif args.command == "list":
+            ids = store.snapshots()
+            previous = None
+            rows = []
+            for snapshot_id in ids:
+                snapshot = store.load(snapshot_id)
+                changed = sum(1 for rel, info in snapshot.files.items()
+                              if not previous or previous.files.get(rel) != info)
+                rows.append(f"{snapshot.id}  {snapshot.created}  {changed:>3} file(s)  {snapshot.label}")
+                previous = snapshot
+            print("\n".join(reversed(rows[-args.n:])) if rows else "no snapshots recorded yet")
+        elif args.command == "diff":
+            new = store.load(args.new) if args.new else store.working_tree()
+            changes = store.diff(store.load(args.old), new)
+            for rel, change in changes.items():
+                print(rel)
+                for kind, ids in change.items():
+                    print(f"  {kind}: {', '.join(ids)}")
+            if not changes:
+                print("no differences")
+        elif args.command == "rollback":
+            snapshot = store.load(args.snapshot)
+            with recording(f"rollback to {snapshot.id}", store):
+                written = store.rollback(snapshot, args.path, args.entry)
+            print(f"restored {', '.join(written)}" if written else "already matches the snapshot")
+        elif args.command == "import":
+            for backup in args.backups:
+                if not is_backup(backup):
+                    raise SnapshotError(f"{backup} is not a *.backup.json / *.json.backup file")
+                live = live_path_for(backup)
+                snapshot = store.record(f"import {backup.name}", {_relative(live): backup.read_bytes()})
+                print(f"{backup.name}: {snapshot.id if snapshot else 'identical to the latest snapshot'}")
+    except SnapshotError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
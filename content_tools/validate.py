@@ -0,0 +1,339 @@
+"""Validate the curriculum and practice content.
+
+Per file (in parallel, cached by file hash):
+
+* the file parses as JSON and has the expected shape
+* lessons have an id, title and content; quiz ``correctAnswer`` indexes a
+  real option
+* problems have an id, title and non-empty ``test_cases`` with an expected
+  output
+
+Across files (every run):
+
+* duplicate level, lesson, problem and topic ids
+* ``![..](/path.png)`` images in lesson content that are missing from public/
+* topics listed in topics.json without a topic file, and vice versa
+* ``*.backup.json`` / ``*.json.backup`` copies that drifted from the live file
+
+Usage::
+
+    python -m content_tools.validate            # exit 1 on errors
+    python -m content_tools.validate --strict   # warnings fail too
+
+``python -m content_tools.bench --stages validate`` times it on scaled content.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from .common import (
+    CACHE_DIR,
+    CURRICULUM_DIR,
+    NON_COURSE_FILES,
+    PUBLIC_DIR,
+    image_refs,
+    load_cache,
+    parallel_map,
+    sha256_bytes,
+    write_atomic,
+)
+
+CACHE_FILE = CACHE_DIR / "validate.json"
+CACHE_VERSION = 2
+POOL_THRESHOLD = 8
+BACKUP_SUFFIXES = (".backup.json", ".json.backup")
+
+
+def is_backup(path: Path) -> bool:
+    return path.name.endswith(BACKUP_SUFFIXES)
+
+
+def live_path_for(backup: Path) -> Path:
+    name = backup.name
+    for suffix in BACKUP_SUFFIXES:
+        if name.endswith(suffix):
+            return backup.with_name(name[: -len(suffix)] + ".json")
+    return backup
+
+
+def _check_curriculum(doc: Any, errors: list[str], warnings: list[str], facts: dict) -> None:
+    if not isinstance(doc, list):
+        errors.append("expected a JSON array of levels")
+        return
+    for i, level in enumerate(doc):
+        where = f"level {i}"
+        if not isinstance(level, dict) or not isinstance(level.get("lessons"), list):
+            errors.append(f"{where}: expected an object with a lessons array")
+            continue
+        if level.get("id"):
+            facts["levels"].append(level["id"])
+        for j, lesson in enumerate(level["lessons"]):
+            lesson_id = lesson.get("id") if isinstance(lesson, dict) else None
+            where = f"lesson {lesson_id or f'{i}.{j}'}"
+            if not lesson_id:
+                errors.append(f"{where}: missing id")
+                continue
+            facts["lessons"].append(lesson_id)
+            for key in ("title", "content"):
+                if not lesson.get(key):
+                    warnings.append(f"{where}: empty {key}")
+            for key, value in lesson.items():
+                if isinstance(value, str) and "](" in value:
+                    facts["images"].extend([lesson_id, ref] for ref in image_refs(value))
+            quiz = lesson.get("quizQuestions") or []
+            if not isinstance(quiz, list):
+                errors.append(f"{where}: quizQuestions is not an array")
+                quiz = []
+            quiz_ids = set()
+            for k, question in enumerate(quiz):
+                if not isinstance(question, dict):
+                    errors.append(f"{where} quiz {k}: expected an object, got {question!r}")
+                    continue
+                qwhere = f"{where} quiz {question.get('id', k)}"
+                options = question.get("options")
+                answer = question.get("correctAnswer")
+                if not isinstance(options, list) or not options:
+                    errors.append(f"{qwhere}: has no options")
+                    options = []
+                elif len(options) == 1:
+                    warnings.append(f"{qwhere}: only one option (placeholder quiz?)")
+                valid_answer = isinstance(answer, int) and not isinstance(answer, bool) and 0 <= answer < len(options)
+                if options and not valid_answer:
+                    errors.append(f"{qwhere}: correctAnswer {answer!r} is outside options[0..{len(options) - 1}]")
+                if not question.get("text"):
+                    errors.append(f"{qwhere}: missing text")
+                if question.get("id") in quiz_ids:
+                    warnings.append(f"{qwhere}: duplicate question id")
+                quiz_ids.add(question.get("id"))
+
+
+def _check_practice_topic(doc: Any, errors: list[str], warnings: list[str], facts: dict) -> None:
+    if not isinstance(doc, dict) or not isinstance(doc.get("problems"), list):
+        errors.append("expected a topic object with a problems array")
+        return
+    facts["topic"] = doc.get("id") or doc.get("topicId")
+    for i, problem in enumerate(doc["problems"]):
+        problem_id = problem.get("id") if isinstance(problem, dict) else None
+        where = f"problem {problem_id or i}"
+        if not problem_id:
+            errors.append(f"{where}: missing id")
+            continue
+        facts["problems"].append(problem_id)
+        if not problem.get("title"):
+            errors.append(f"{where}: missing title")
+        cases = problem.get("test_cases") or problem.get("testCases")
+        if not cases:
+            errors.append(f"{where}: no test_cases")
+            continue
+        if not isinstance(cases, list):
+            errors.append(f"{where}: test_cases is not an array")
+            continue
+        for k, case in enumerate(cases):
+            if not isinstance(case, dict):
+                errors.append(f"{where} test case {k}: expected an object, got {case!r}")
+            elif case.get("expected_output", case.get("expectedOutput")) is None:
+                errors.append(f"{where} test case {k}: missing expected_output")
+        cases = [c for c in cases if isinstance(c, dict)]
+        if cases and not any(not (c.get("isHidden") or c.get("is_hidden")) for c in cases):
+            warnings.append(f"{where}: every test case is hidden")
+
+
+def check_file(path: str, kind: str) -> dict:
+    """Check a single file. Runs in a worker process and must stay picklable."""
+    errors: list[str] = []
+    warnings: list[str] = []
+    facts: dict[str, Any] = {"levels": [], "lessons": [], "problems": [], "images": [], "topic": None}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return {"errors": [f"invalid JSON: {e}"], "warnings": [], "facts": facts}
+    if kind == "curriculum":
+        _check_curriculum(doc, errors, warnings, facts)
+    elif kind == "topic":
+        _check_practice_topic(doc, errors, warnings, facts)
+    elif kind == "topics":
+        if not isinstance(doc, list) or not all(isinstance(t, dict) and t.get("id") for t in doc):
+            errors.append("expected an array of topics with ids")
+        else:
+            facts["topics"] = [t["id"] for t in doc]
+            for topic in sorted({t for t in facts["topics"] if facts["topics"].count(t) > 1}):
+                errors.append(f"topic id {topic!r} is listed more than once")
+    return {"errors": errors, "warnings": warnings, "facts": facts}
+
+
+def _check_job(job: tuple[str, str]) -> dict:
+    return check_file(*job)
+
+
+def _kind(path: Path, curriculum_dir: Path) -> str:
+    if path.parent == curriculum_dir:
+        return "curriculum"
+    if path.name == "topics.json":
+        return "topics"
+    if path.name.startswith("topic_"):
+        return "topic"
+    return "json"
+
+
+def discover(curriculum_dir: Path, practice_dir: Path) -> list[Path]:
+    files = [p for p in curriculum_dir.iterdir() if p.name.endswith((".json",) + BACKUP_SUFFIXES)]
+    files += [p for p in practice_dir.iterdir() if p.name.endswith(".json")]
+    return sorted(p for p in files if p.is_file())
+
+
+class Report:
+    def __init__(self) -> None:
+        self.errors: list[str] = []
+        self.warnings: list[str] = []
+        self.files = 0
+        self.checked = 0
+
+    def error(self, message: str) -> None:
+        self.errors.append(message)
+
+    def warn(self, message: str) -> None:
+        self.warnings.append(message)
+
+
+def _backup_drift(backup: Path, backup_facts: dict, live_facts: dict | None) -> str | None:
+    if live_facts is None:
+        return f"{backup.name}: backup of a file that no longer exists"
+    key = "problems" if backup_facts["problems"] or live_facts["problems"] else "lessons"
+    old, new = set(backup_facts[key]), set(live_facts[key])
+    if old == new:
+        return f"{backup.name}: stale backup of {live_path_for(backup).name} (content differs, same ids)"
+    return (
+        f"{backup.name}: drifted from {live_path_for(backup).name} "
+        f"({len(old - new)} {key} only in backup, {len(new - old)} only in live file)"
+    )
+
+
+def validate(
+    curriculum_dir: Path = CURRICULUM_DIR,
+    practice_dir: Path | None = None,
+    public_dir: Path = PUBLIC_DIR,
+    cache_file: Path | None = CACHE_FILE,
+    jobs: int | None = None,
+) -> Report:
+    curriculum_dir = Path(curriculum_dir)
+    public_dir = Path(public_dir)
+    practice_dir = Path(practice_dir) if practice_dir else public_dir / "practice"
+    report = Report()
+    cache = load_cache(cache_file, CACHE_VERSION) if cache_file else {}
+    entries: dict[str, dict] = cache.get("files", {})
+
+    files = discover(curriculum_dir, practice_dir)
+    report.files = len(files)
+    digests: dict[Path, str] = {}
+    results: dict[Path, dict] = {}
+    pending: list[Path] = []
+    for path in files:
+        digest = sha256_bytes(path.read_bytes())
+        digests[path] = digest
+        entry = entries.get(str(path))
+        if entry and entry["sha256"] == digest:
+            results[path] = entry["result"]
+        else:
+            pending.append(path)
+
+    checks = [(str(p), _kind(p, curriculum_dir)) for p in pending]
+    fresh = parallel_map(_check_job, checks, jobs, POOL_THRESHOLD)
+    results.update(zip(pending, fresh))
+    report.checked = len(pending)
+
+    if cache_file:
+        new_cache = {
+            "version": CACHE_VERSION,
+            "files": {str(p): {"sha256": digests[p], "result": results[p]} for p in files},
+        }
+        write_atomic(cache_file, json.dumps(new_cache, separators=(",", ":")).encode("utf-8"))
+
+    for path in files:
+        rel = path.relative_to(public_dir.parent) if path.is_relative_to(public_dir.parent) else path
+        for message in results[path]["errors"]:
+            report.error(f"{rel}: {message}")
+        for message in results[path]["warnings"]:
+            report.warn(f"{rel}: {message}")
+
+    # Cross-file checks. Backups only take part in the drift check, and the
+    # non-course files (schema_example.json, ...) may reuse course ids.
+    live = [p for p in files if not is_backup(p)]
+    seen: dict[tuple[str, str], Path] = {}
+    for path in live:
+        facts = results[path]["facts"]
+        shared_ids = not (path.parent == curriculum_dir and path.name in NON_COURSE_FILES)
+        for key in ("levels", "lessons", "problems"):
+            for item in facts[key] if shared_ids else ():
+                first = seen.setdefault((key, item), path)
+                if first is not path:
+                    report.error(f"duplicate {key[:-1]} id {item!r} in {first.name} and {path.name}")
+            counts: dict[str, int] = {}
+            for item in facts[key]:
+                counts[item] = counts.get(item, 0) + 1
+            for item, count in counts.items():
+                if count > 1:
+                    report.error(f"{path.name}: {key[:-1]} id {item!r} appears {count} times")
+
+        for lesson_id, ref in facts["images"]:
+            if ref.startswith(("http://", "https://", "data:")):
+                continue
+            target = public_dir / ref.lstrip("/").split("?")[0].split("#")[0]
+            if not target.is_file():
+                report.error(f"{path.name}: lesson {lesson_id} references missing image {ref}")
+
+    topics_file = practice_dir / "topics.json"
+    if topics_file in results and "topics" in results[topics_file]["facts"]:
+        listed = set(results[topics_file]["facts"]["topics"])
+        present = {results[p]["facts"]["topic"] for p in live if _kind(p, curriculum_dir) == "topic"}
+        for topic in sorted(listed - present):
+            report.error(f"topics.json lists {topic!r} but practice/topic_{topic}.json is missing")
+        for topic in sorted(t for t in present - listed if t):
+            report.warn(f"practice/topic_{topic}.json is not listed in topics.json")
+
+    for backup in (p for p in files if is_backup(p)):
+        live_file = live_path_for(backup)
+        if live_file in digests and digests[live_file] == digests[backup]:
+            report.warn(f"{backup.name}: identical copy of {live_file.name}")
+            continue
+        drift = _backup_drift(backup, results[backup]["facts"], results.get(live_file, {}).get("facts"))
+        if drift:
+            report.warn(drift)
+
+    return report
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m content_tools.validate", description=__doc__.split("\n")[0])
+    parser.add_argument("--strict", action="store_true", help="treat warnings as errors")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors (and warnings with --strict)")
+    parser.add_argument("--no-cache", action="store_true", help="re-check every file")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = validate(cache_file=None if args.no_cache else CACHE_FILE, jobs=args.jobs)
+    elapsed = time.perf_counter() - start
+    for message in report.errors:
+        print(f"error: {message}")
+    if not args.quiet or args.strict:
+        for message in report.warnings:
+            print(f"warning: {message}")
+    failed = bool(report.errors) or (args.strict and bool(report.warnings))
+    if not args.quiet or failed:
+        print(
+            f"{report.files} files ({report.checked} re-checked) in {elapsed:.2f}s: "
+            f"{len(report.errors)} error(s), {len(report.warnings)} warning(s)"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
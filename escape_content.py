@@ -1,5 +1,9 @@
 
+# Single lesson:  python escape_content.py [--out escaped.txt]
+# Bulk mode:      python escape_content.py --bulk lessons/ [--dry-run] [-j N]
+#                 (see content_tools/escape.py)
 import json
+import sys
 
 content = """**Welcome to C Programming!** Your journey to becoming a powerful programmer starts here. C is the foundation of modern computing.
 
@@ -186,4 +190,17 @@ In this C journey, you'll master:
 
 > *"The way to get started is to quit talking and begin doing." \u2014 Walt Disney*"""
 
-print(json.dumps(content))
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--bulk"]:
+        from content_tools.escape import main
+
+        sys.exit(main(args[1:]))
+
+    escaped = json.dumps(content, ensure_ascii=False) + "\n"
+    if args[:1] == ["--out"] and len(args) == 2:
+        # Write the file ourselves so shell redirection can't turn it into UTF-16.
+        with open(args[1], "w", encoding="utf-8", newline="\n") as f:
+            f.write(escaped)
+    else:
+        sys.stdout.buffer.write(escaped.encode("utf-8"))
@@ -1,8 +1,11 @@
 
-import json
-import os
+import sys
+from pathlib import Path
 
-file_path = r"c:\Users\DELL\OneDrive\Desktop\gens\data\curriculum\c.json"
+from content_tools.patch import PatchError, replace_lesson
+from content_tools.snapshot import recording
+
+file_path = Path(__file__).resolve().parent / "data" / "curriculum" / "c.json"
 
 # The correct Lesson 1 content and quiz
 new_lesson_1 = {
@@ -74,46 +77,16 @@ new_lesson_1 = {
     ]
 }
 
+# Lesson 1 is located by its id through the byte-offset index, so the patch
+# keeps working when other lessons grow or shrink. Only the c1 span is
+# re-serialized and the file is replaced atomically. The content before and
+# after the repair is recorded in the snapshot store, so it can be undone
+# with `python -m content_tools.snapshot rollback <id>`.
 try:
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Level 1 is data[0]
-    # Replace the lessons array's first element or entire list if corrupted
-    # But since the JSON is likely currently malformed, json.load will fail.
-    # So I need to read it as lines and fix it.
-    pass
-except Exception as e:
-    print(f"JSON load failed as expected: {e}")
-
-# Read as lines to perform surgical replacement
-with open(file_path, 'r', encoding='utf-8') as f:
-    lines = f.readlines()
-
-# We need to find the Level 1 "lessons" array and replace its first block.
-# According to my latest view_file:
-# Line 5: "lessons": [
-# Line 6: { (Start of Lesson 1)
-# ... corrupted mess ...
-# Line 67: }, (End of malformed Lesson 1)
-# Line 68: { (Start of Lesson 2)
-
-# Python indices are 0-based, so Line 6 is index 5, Line 67 is index 66.
-# We want to replace lines[5:67] (inclusive of 66).
-# lines[5:67] in Python slicing is from index 5 up to but NOT including index 67.
-# So lines[5:67] covers Line 6 to Line 67. Perfect.
-
-# Convert new_lesson_1 to a indented JSON string block
-new_lesson_json = json.dumps(new_lesson_1, indent=6, ensure_ascii=False)
-# Add the correct indentation and trailing comma
-new_lesson_json_lines = [ "      " + line + "\n" for line in new_lesson_json.split("\n") ]
-new_lesson_json_lines[-1] = new_lesson_json_lines[-1].rstrip() + ",\n"
-
-# Perform replacement
-lines[5:67] = new_lesson_json_lines
-
-# Write back
-with open(file_path, 'w', encoding='utf-8') as f:
-    f.writelines(lines)
+    with recording("repair_c_json.py"):
+        changed = replace_lesson(file_path, new_lesson_1)
+except (KeyError, PatchError, ValueError) as e:
+    print(f"Repair failed: {e}")
+    sys.exit(1)
 
-print("Repair complete!")
+print("Repair complete!" if changed else "Lesson c1 already up to date.")
@@ -0,0 +1,86 @@
+"""Shared fixtures for the content tool tests.
+
+Every path in ``content_tools`` (curriculum, practice, caches, snapshot
+store) derives from ``CONTENT_TOOLS_ROOT``, so the tests point it at a
+scratch tree before the package is imported and never touch the checkout.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(tempfile.mkdtemp(prefix="content-tools-tests-"))
+os.environ["CONTENT_TOOLS_ROOT"] = str(_ROOT)
+
+from content_tools.common import dump_json  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_ROOT, ignore_errors=True)
+
+
+@pytest.fixture
+def root() -> Path:
+    """An empty checkout-shaped tree (``data/curriculum``, ``public/practice``)."""
+    for child in _ROOT.iterdir():
+        if child.is_dir():
+            shutil.rmtree(child)
+        else:
+            child.unlink()
+    (_ROOT / "data" / "curriculum").mkdir(parents=True)
+    (_ROOT / "public" / "practice").mkdir(parents=True)
+    return _ROOT
+
+
+def lesson(lesson_id: str, **fields) -> dict:
+    return {
+        "id": lesson_id,
+        "title": f"Lesson {lesson_id}",
+        "content": f"About {lesson_id}.",
+        "quizQuestions": [
+            {"id": 1, "text": f"What is {lesson_id}?", "options": ["a", "b"], "correctAnswer": 0, "explanation": ""}
+        ],
+        **fields,
+    }
+
+
+def problem(problem_id: str, **fields) -> dict:
+    return {
+        "id": problem_id,
+        "title": f"Problem {problem_id}",
+        "description": "Print the answer.",
+        "test_cases": [{"stdin": "", "expected_output": "42", "isHidden": False}],
+        **fields,
+    }
+
+
+@pytest.fixture
+def curriculum(root: Path) -> list[dict]:
+    """A small c.json with escaped and nested strings, written like the real files."""
+    levels = [
+        {
+            "id": "l1",
+            "title": "Basics",
+            "lessons": [
+                lesson("c1", content='Say "hi" with printf("%d\\n", x);\n```c\nint main() { return 0; }\n```'),
+                lesson("c2", content="Brackets in text: [ ] { } , : and a backslash \\", meta={"tags": ["a", "{b}"]}),
+            ],
+        },
+        {"id": "l2", "title": "Más — ünïcode", "lessons": [lesson("c3"), lesson("c4", content="")]},
+    ]
+    (root / "data" / "curriculum" / "c.json").write_text(dump_json(levels), encoding="utf-8")
+    return levels
+
+
+@pytest.fixture
+def topic(root: Path) -> dict:
+    doc = {"id": "arrays", "title": "Arrays", "problems": [problem("p1"), problem("p2"), problem("p3")]}
+    practice = root / "public" / "practice"
+    (practice / "topic_arrays.json").write_text(dump_json(doc), encoding="utf-8")
+    (practice / "topics.json").write_text(dump_json([{"id": "arrays", "title": "Arrays"}]), encoding="utf-8")
+    return doc
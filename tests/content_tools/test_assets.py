@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import struct
+import zlib
+
+from conftest import lesson
+
+from content_tools import assets
+from content_tools.common import dump_json
+
+
+def _png(width: int, height: int, shade: int) -> bytes:
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    rows = b"".join(b"\0" + bytes([shade]) * width for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)  # 8-bit greyscale
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 0)) + chunk(b"IEND", b"")
+
+
+def test_build_without_pillow(root):
+    img = root / "public" / "img"
+    img.mkdir()
+    for i in range(4):
+        (img / f"p{i}.png").write_bytes(_png(8 + i, 4, 40 * i))
+    (img / "copy.png").write_bytes((img / "p0.png").read_bytes())
+    (img / "logo.png").write_bytes(_png(2, 2, 255))
+    (root / "index.html").write_text('<link rel="icon" href="/img/logo.png">', encoding="utf-8")
+    content = " ".join(f"![p{i}](/img/p{i}.png)" for i in range(4)) + " ![gone](/img/gone.png)"
+    levels = [{"id": "l1", "lessons": [lesson("c1", content=content)]}]
+    (root / "data" / "curriculum" / "c.json").write_text(dump_json(levels), encoding="utf-8")
+
+    report = assets.build(jobs=2, use_pillow=False)
+    assert report.processed == 4
+    assert report.images["/img/p3.png"]["width"] == 11
+    assert report.missing == {"/img/gone.png": ["c1"]}
+    assert report.duplicates == [["/img/copy.png", "/img/p0.png"]]
+    assert report.unreferenced == ["/img/copy.png"]
+    for entry in report.images.values():
+        assert (root / "public" / entry["src"].lstrip("/")).is_file()
+
+    assert assets.build(jobs=2, use_pillow=False).processed == 0
+
+
+def test_mentioned_paths_match_whole_paths():
+    paths = ["icons/logo.png", "logo.png"]
+    assert assets.mentioned_paths(paths, 'src="/icons/logo.png"') == {"icons/logo.png"}
+    assert assets.mentioned_paths(paths, "public/logo.png") == {"logo.png"}
+    assert assets.mentioned_paths(paths, "/other/icons/logo.png and mylogo.png") == set()
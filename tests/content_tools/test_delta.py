@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import copy
+
+import pytest
+from conftest import lesson, problem
+
+from content_tools.common import load_json
+from content_tools.delta import DeltaError, apply, canonical_hash, diff, plan, publish, release
+
+
+def _round_trip(old, new) -> dict:
+    patch = diff(old, new)
+    assert apply(copy.deepcopy(old), patch) == new
+    assert canonical_hash(apply(old, patch)) == canonical_hash(new)
+    return patch
+
+
+def test_identical_documents_give_an_empty_patch(curriculum):
+    assert _round_trip(curriculum, copy.deepcopy(curriculum)) == {}
+
+
+def test_changed_fields_are_set_and_unset(curriculum):
+    new = copy.deepcopy(curriculum)
+    new[0]["lessons"][0]["content"] = "changed"
+    del new[0]["lessons"][1]["meta"]
+    patch = _round_trip(curriculum, new)
+    assert patch["items"] == {
+        "c1": {"group": "l1", "set": {"content": "changed"}},
+        "c2": {"group": "l1", "unset": ["meta"]},
+    }
+    assert "order" not in patch
+
+
+def test_moved_added_and_deleted_lessons(curriculum):
+    new = copy.deepcopy(curriculum)
+    c1 = new[0]["lessons"].pop(0)
+    new[1]["lessons"].insert(1, c1)  # moved to another level
+    new[1]["lessons"].reverse()  # reordered
+    del new[0]["lessons"][0]  # c2 deleted
+    new[0]["lessons"].append(lesson("c5"))  # added
+    patch = _round_trip(curriculum, new)
+    assert patch["items"]["c1"] == {"group": "l2"}
+    assert patch["items"]["c2"] is None
+    assert patch["items"]["c5"] == {"group": "l1", "value": lesson("c5")}
+    assert patch["order"]["items"] == {"l1": ["c5"], "l2": ["c4", "c1", "c3"]}
+
+
+def test_levels_reordered_renamed_and_removed(curriculum):
+    new = copy.deepcopy(curriculum)
+    new.reverse()
+    new[0]["title"] = "Renamed"
+    _round_trip(curriculum, new)
+    _round_trip(curriculum, new[:1])
+    _round_trip(new[:1], curriculum)
+
+
+def test_practice_topics_round_trip(topic):
+    new = copy.deepcopy(topic)
+    new["problems"].insert(0, new["problems"].pop())
+    new["problems"][1]["title"] = "Edited"
+    new["problems"].append(problem("p4"))
+    del new["problems"][2]
+    new["title"] = "Arrays and lists"
+    patch = _round_trip(topic, new)
+    assert patch["groups"] == {"arrays": {k: v for k, v in new.items() if k != "problems"}}
+
+
+def test_duplicate_ids_and_bad_patches_raise(curriculum):
+    duplicated = copy.deepcopy(curriculum)
+    duplicated[1]["lessons"].append(lesson("c1"))
+    with pytest.raises(DeltaError, match="not unique"):
+        diff(curriculum, duplicated)
+    with pytest.raises(DeltaError, match="missing item"):
+        apply(curriculum, {"items": {"c99": None}})
+    with pytest.raises(DeltaError, match="missing item"):
+        apply(curriculum, {"items": {"c99": {"group": "l1", "set": {"title": "x"}}}})
+    with pytest.raises(DeltaError, match="unknown id"):
+        apply(curriculum, {"order": {"items": {"l1": ["c1", "c99"]}}})
+
+
+def test_release_chains_patches_and_plans_downloads(curriculum, tmp_path):
+    out, state = tmp_path / "delta", tmp_path / "state"
+    assert release(out, {"c": curriculum}, state_dir=state) == {"c": 1}
+    assert release(out, {"c": curriculum}, state_dir=state) == {}
+
+    v2 = copy.deepcopy(curriculum)
+    v2[0]["lessons"][0]["content"] = "v2"
+    v3 = copy.deepcopy(v2)
+    v3[1]["lessons"].append(lesson("c5"))
+    assert release(out, {"c": v2}, state_dir=state) == {"c": 2}
+    assert release(out, {"c": v3}, state_dir=state) == {"c": 3}
+
+    entry = load_json(out / "manifest.json")["collections"]["c"]
+    assert [(p["from"], p["to"]) for p in entry["patches"]] == [(1, 2), (2, 3)]
+    doc = copy.deepcopy(curriculum)  # what a client on v1 holds
+    for file in plan(entry, 1, canonical_hash(doc)):
+        doc = apply(doc, load_json(out / file))
+    assert doc == v3
+    assert plan(entry, 3, canonical_hash(v3)) == []
+    assert plan(entry, None, None) == [entry["snapshot"]]
+    assert plan(entry, 0, "0" * 16) == [entry["snapshot"]]
+    # Superseded snapshots are pruned, patches stay.
+    assert sorted(p.name for p in out.glob("c.v*.json")) == [entry["snapshot"]]
+    assert sorted(p.name for p in state.iterdir()) == sorted(p.name for p in out.glob("*.json"))
+
+
+def test_a_fresh_output_dir_continues_the_committed_chain(curriculum, tmp_path):
+    state = tmp_path / "state"
+    release(tmp_path / "build1", {"c": curriculum}, state_dir=state)
+    v2 = copy.deepcopy(curriculum)
+    v2[0]["lessons"][0]["content"] = "v2"
+    assert release(tmp_path / "build2", {"c": v2}, state_dir=state) == {"c": 2}
+
+    entry = load_json(tmp_path / "build2" / "manifest.json")["collections"]["c"]
+    assert plan(entry, 1, canonical_hash(curriculum)) == [entry["patches"][0]["file"]]
+    assert publish(state, tmp_path / "build3")["collections"]["c"] == entry
+
+
+def test_fresh_state_different_content_same_version(curriculum, tmp_path):
+    # Two releases that never saw each other's state both call their content v1.
+    v1 = copy.deepcopy(curriculum)
+    v1[0]["lessons"][0]["content"] = "other v1"
+    release(tmp_path / "a", {"c": curriculum}, state_dir=tmp_path / "state_a")
+    release(tmp_path / "b", {"c": v1}, state_dir=tmp_path / "state_b")
+    entry = load_json(tmp_path / "b" / "manifest.json")["collections"]["c"]
+    assert entry["version"] == 1
+    assert plan(entry, 1, canonical_hash(curriculum)) == [entry["snapshot"]]
+    assert plan(entry, 1, canonical_hash(v1)) == []
+
+
+def test_release_prunes_siblings_it_no_longer_writes(curriculum, tmp_path, monkeypatch):
+    monkeypatch.setattr("content_tools.practice.brotli", None)
+    out, state = tmp_path / "delta", tmp_path / "state"
+    release(out, {"c": curriculum}, state_dir=state)
+    snapshot = load_json(out / "manifest.json")["collections"]["c"]["snapshot"]
+    (out / f"{snapshot}.br").write_bytes(b"stale")
+    assert release(out, {"c": curriculum}, state_dir=state) == {}
+    assert sorted(p.name for p in out.iterdir()) == sorted(["manifest.json", snapshot, f"{snapshot}.gz"])
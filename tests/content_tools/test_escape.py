@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from content_tools import escape
+
+
+@pytest.fixture
+def sources(root, curriculum):
+    folder = root / "lessons"
+    folder.mkdir()
+    (folder / "c1.md").write_text("# One\r\nfirst", encoding="utf-8")
+    (folder / "c3_content.txt").write_text('"content": "pasted \\"json\\"",', encoding="utf-8")
+    (folder / "c99.md").write_text("no such lesson", encoding="utf-8")
+    return folder
+
+
+def _content(root, lesson_id):
+    levels = json.loads((root / "data" / "curriculum" / "c.json").read_bytes())
+    return next(l["content"] for level in levels for l in level["lessons"] if l["id"] == lesson_id)
+
+
+def test_sources_are_escaped_into_their_lessons(root, curriculum, sources):
+    target = str(root / "data" / "curriculum" / "c.json")
+    assert escape.escape_tree(sources, dry_run=True) == {target: ["c1", "c3"]}
+    assert _content(root, "c1") == curriculum[0]["lessons"][0]["content"]
+    assert escape.escape_tree(sources) == {target: ["c1", "c3"]}
+    assert _content(root, "c1") == "# One\nfirst"
+    assert _content(root, "c3") == 'pasted "json"'
+    assert escape.escape_tree(sources) == {}
+
+
+def test_same_size_edit_with_restored_mtime_is_not_skipped(root, sources, monkeypatch):
+    source = sources / "c1.md"
+    escape.escape_tree(sources)
+    # Age the cache entry so its stats would be trusted.
+    monkeypatch.setattr(escape, "RACY_NS", -10**18)
+    stat = source.stat()
+    source.write_text("# One\r\nFIRST", encoding="utf-8")
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert source.stat().st_size == stat.st_size
+
+    assert escape.escape_tree(sources) == {str(root / "data" / "curriculum" / "c.json"): ["c1"]}
+    assert _content(root, "c1") == "# One\nFIRST"
+
+
+def test_touched_but_identical_sources_are_hashed_not_rewritten(root, sources, monkeypatch):
+    escape.escape_tree(sources)
+    os.utime(sources / "c1.md")
+    escaped = []
+    monkeypatch.setattr(escape, "escape_file", lambda path: escaped.append(path))
+    assert escape.escape_tree(sources) == {}
+    assert escaped == []
+
+
+def test_editing_the_lesson_in_the_curriculum_re_escapes_it(root, sources):
+    escape.escape_tree(sources)
+    path = root / "data" / "curriculum" / "c.json"
+    path.write_text(path.read_text(encoding="utf-8").replace("# One\\nfirst", "hand edit"), encoding="utf-8")
+    assert escape.escape_tree(sources) == {str(path): ["c1"]}
+    assert _content(root, "c1") == "# One\nfirst"
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from content_tools.common import dump_json
+from content_tools.jsonindex import INDEX_CACHE_DIR, IndexBuildError, build_index, load_index
+
+
+def test_spans_cover_levels_lessons_and_fields(root, curriculum):
+    data = (root / "data" / "curriculum" / "c.json").read_bytes()
+    index = build_index(data)
+
+    assert [level.id for level in index.levels] == ["l1", "l2"]
+    assert list(index.lessons) == ["c1", "c2", "c3", "c4"]
+    for level, expected in zip(index.levels, curriculum):
+        assert json.loads(level.span.slice(data)) == expected
+        for entry, lesson in zip(level.lessons, expected["lessons"]):
+            assert json.loads(entry.span.slice(data)) == lesson
+            assert set(entry.fields) == set(lesson) - {"id"}
+            for name, span in entry.fields.items():
+                assert json.loads(span.slice(data)) == lesson[name]
+
+
+def test_escaped_and_nested_strings_do_not_confuse_the_scanner(root, curriculum):
+    data = (root / "data" / "curriculum" / "c.json").read_bytes()
+    c2 = build_index(data).lesson("c2")
+    assert json.loads(c2.fields["content"].slice(data)) == curriculum[0]["lessons"][1]["content"]
+    assert json.loads(c2.fields["meta"].slice(data)) == {"tags": ["a", "{b}"]}
+    assert json.loads(c2.quiz.slice(data)) == curriculum[0]["lessons"][1]["quizQuestions"]
+
+
+def test_compact_input_is_indexed_too():
+    levels = [{"id": "l1", "lessons": [{"id": "x\"1", "content": "]}"}]}]
+    data = json.dumps(levels, separators=(",", ":")).encode("utf-8")
+    entry = build_index(data).lesson('x"1')
+    assert json.loads(entry.span.slice(data)) == levels[0]["lessons"][0]
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ('{"id": "l1"}', "expected a single JSON array"),
+        ('"text"', "expected a JSON array"),
+        ("[] []", "expected a single JSON array"),
+        ('[{"id": "l1", "lessons": []}', "unterminated document"),
+        ('[{"id": "l1"]]', "unbalanced ']'"),
+        ('[{"id": "l1", {}}]', "expected an object key"),
+        (', []', "unexpected ','"),
+        (': []', "unexpected ':'"),
+        ('[{"id": "l1", "lessons": [{"title": "no id"}]}]', "lesson 0 of level 0 has no string id"),
+    ],
+)
+def test_malformed_documents_raise_with_an_offset(text, message):
+    with pytest.raises(IndexBuildError, match=message) as info:
+        build_index(text.encode("utf-8"))
+    assert 0 <= info.value.offset <= len(text)
+
+
+def test_unknown_lesson_is_a_key_error(root, curriculum):
+    index = build_index((root / "data" / "curriculum" / "c.json").read_bytes())
+    with pytest.raises(KeyError, match="c99"):
+        index.lesson("c99")
+
+
+def test_load_index_reuses_the_cache_until_the_file_changes(root, curriculum):
+    path = root / "data" / "curriculum" / "c.json"
+    first = load_index(path)
+    cache = INDEX_CACHE_DIR / "c.index.json"
+    assert json.loads(cache.read_text(encoding="utf-8"))["sha256"] == first.sha256
+
+    path.write_text(dump_json(curriculum[:1]), encoding="utf-8")
+    second = load_index(path)
+    assert list(second.lessons) == ["c1", "c2"]
+    assert json.loads(cache.read_text(encoding="utf-8"))["sha256"] == second.sha256
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from content_tools.judge import (
+    ACCEPTED,
+    RUNTIME_NZEC,
+    TIME_LIMIT,
+    WRONG_ANSWER,
+    CompileCache,
+    Judge,
+    JudgeServer,
+    Limits,
+    resolve_language,
+)
+
+PYTHON = resolve_language("python")
+ORIGIN = "http://localhost:3001"
+
+
+@pytest.fixture
+def cache(tmp_path) -> CompileCache:
+    return CompileCache(tmp_path / "judge")
+
+
+@pytest.fixture
+def judge(cache):
+    judge = Judge(cache, workers=2)
+    yield judge
+    judge.pool.shutdown()
+
+
+@pytest.fixture
+def server(judge):
+    server = JudgeServer(("127.0.0.1", 0), judge)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _request(url: str, body: dict | None = None, origin: str | None = ORIGIN) -> tuple[int, dict, dict]:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data, {"Content-Type": "application/json"})
+    if origin:
+        request.add_header("Origin", origin)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, dict(response.headers), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def test_verdicts(judge):
+    source = "import sys\nn = int(sys.stdin.read())\nprint(n * 2)\nsys.exit(1 if n < 0 else 0)\n"
+    results = judge.run_batch("python", source, [
+        {"stdin": "21", "expected_output": "42\n"},
+        {"input": "2", "expectedOutput": "5"},
+        {"stdin": "-1"},
+    ])
+    assert [r.status for r in results] == [ACCEPTED, WRONG_ANSWER, RUNTIME_NZEC]
+    assert results[0].stdout == "42\n" and results[2].exit_code == 1
+
+    spin = judge.run("python", "while True:\n    pass\n", limits=Limits(cpu_time=1, wall_time=5))
+    assert spin.status == TIME_LIMIT
+    sleep = judge.run("python", "import time\ntime.sleep(30)\n", limits=Limits(cpu_time=5, wall_time=1))
+    assert sleep.status == TIME_LIMIT and sleep.timed_out
+
+
+def test_forked_children_do_not_outlive_the_case(judge):
+    # A child that keeps stdout open is killed with the process group.
+    forked = "import os, time\nif os.fork() == 0:\n    time.sleep(30)\nprint('parent')\n"
+    started = time.perf_counter()
+    result = judge.run("python", forked, expected="parent", limits=Limits(wall_time=3))
+    assert result.status == ACCEPTED
+    assert time.perf_counter() - started < 2
+
+    # One that leaves the process group is cut off at the wall-time limit.
+    escaped = "import os, time\nif os.fork() == 0:\n    os.setsid()\n    time.sleep(30)\nprint('parent')\n"
+    started = time.perf_counter()
+    result = judge.run("python", escaped, limits=Limits(wall_time=1))
+    assert result.status == TIME_LIMIT
+    assert time.perf_counter() - started < 5
+
+
+def test_each_source_is_built_once(judge, cache):
+    source = "print(input())\n"
+    judge.run_batch("python", source, [{"stdin": str(i), "expected_output": str(i)} for i in range(4)])
+    judge.run("python", source, "x", "x")
+    assert (cache.misses, cache.hits) == (1, 1)
+    judge.run("python", source + "# edited\n")
+    assert cache.misses == 2
+    assert CompileCache(cache.root).get(PYTHON, source) is not None  # reloaded from disk
+    assert len(CompileCache(cache.root)) == 2
+
+
+def test_eviction_skips_pinned_artifacts(tmp_path):
+    cache = CompileCache(tmp_path / "judge", max_entries=1)
+    pinned = cache.get(PYTHON, "print(1)", pin=True)
+    other = cache.get(PYTHON, "print(2)")
+    assert pinned.directory.is_dir()
+    assert not other.directory.exists()
+
+    cache.release(pinned)
+    cache.get(PYTHON, "print(3)")
+    assert not pinned.directory.exists()
+    assert len(cache) == 1
+
+
+def test_other_origins_are_refused(server):
+    status, headers, body = _request(server + "/submissions?wait=true", {"language_id": 71, "source_code": "print(1)"},
+                                     origin="https://evil.example")
+    assert status == 403 and body["error"] == "origin not allowed"
+    assert "Access-Control-Allow-Origin" not in headers
+
+    status, headers, _ = _request(server + "/languages")
+    assert status == 200 and headers["Access-Control-Allow-Origin"] == ORIGIN
+    assert _request(server + "/languages", origin=None)[0] == 200
+
+
+def test_judge0_submission_shape(server):
+    status, _, result = _request(server + "/submissions?base64_encoded=false&wait=true", {
+        "language_id": 71, "source_code": "print(input()[::-1])", "stdin": "abc",
+        "memory_limit": 256000, "time_limit": 5, "cpu_time_limit": 10,
+    })
+    assert status == 201
+    assert result["stdout"] == "cba\n" and result["stderr"] is None and result["compile_output"] is None
+    assert result["status"] == {"id": 3, "description": "Accepted"}
+    assert float(result["time"]) >= 0 and "memory" in result
+
+    status, _, polled = _request(server + f"/submissions/{result['token']}?base64_encoded=false")
+    assert status == 200 and polled == result
+
+    _, _, failed = _request(server + "/submissions?wait=true", {"language_id": 71, "source_code": "raise SystemExit(3)"})
+    assert failed["status"]["id"] == RUNTIME_NZEC[0] and failed["exit_code"] == 3
+
+
+def test_piston_execute_shape(server):
+    runtimes = _request(server + "/api/v2/piston/runtimes")[2]
+    runtime = next(r for r in runtimes if r["language"] == "python")
+    status, _, result = _request(server + "/api/v2/piston/execute", {
+        "language": "python", "version": runtime["version"],
+        "files": [{"name": "main.py", "content": "import sys\nprint(sys.stdin.read().upper())"}], "stdin": "hi",
+    })
+    assert status == 200
+    assert result["run"]["stdout"] == "HI\n" and result["run"]["stderr"] == ""
+    assert result["run"]["code"] == 0 and result["run"]["signal"] is None
+    assert isinstance(result["run"]["wall_time"], int)
+    assert "compile" not in result
+
+    _, _, bad = _request(server + "/execute", {"language": "cobol", "files": [{"content": ""}]})
+    assert "unsupported language" in bad["message"]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import pytest
+
+from content_tools import markdown
+from content_tools.markdown import parse, safe_url
+
+
+def _blocks(text: str) -> list:
+    return parse(text)["c"]
+
+
+@pytest.mark.parametrize(
+    "url", ["javascript:alert(1)", " JavaScript:alert(1)", "data:text/html;base64,PHNjcmlwdD4=", "vbscript:x", "file:///etc"]
+)
+def test_unsafe_urls_are_rejected(url):
+    assert safe_url(url) is None
+
+
+def test_unsafe_links_and_images_keep_only_their_text():
+    [para] = _blocks("[x](javascript:alert(1)) ![pic](data:image/png;base64,AAAA) [ok](/lessons/c1) [m](mailto:a@b.c)")
+    assert para["c"] == [
+        "x pic ",
+        {"t": "a", "href": "/lessons/c1", "c": ["ok"]},
+        " ",
+        {"t": "a", "href": "mailto:a@b.c", "c": ["m"]},
+    ]
+
+
+def test_raw_html_is_kept_as_text():
+    assert _blocks('<script>alert(1)</script> <b>x</b>\n\n<div onclick="go()">hi</div>') == [
+        {"t": "p", "c": ["<script>alert(1)</script> <b>x</b>"]},
+        {"t": "p", "c": ['<div onclick="go()">hi</div>']},
+    ]
+
+
+def test_hard_breaks():
+    assert _blocks("a  \nb") == [{"t": "p", "c": ["a", {"t": "br"}, "b"]}]
+    assert _blocks("a\\\nb") == [{"t": "p", "c": ["a", {"t": "br"}, "b"]}]
+    assert _blocks("a \nb  ") == [{"t": "p", "c": ["a \nb"]}]
+
+
+def test_inline_markup():
+    [para] = _blocks("**bold** *it* ~~gone~~ `a*b` snake_case_name \\*lit\\*")
+    assert para["c"] == [
+        {"t": "b", "c": ["bold"]}, " ", {"t": "i", "c": ["it"]}, " ", {"t": "s", "c": ["gone"]}, " ",
+        {"t": "ic", "v": "a*b"}, " snake_case_name *lit*",
+    ]
+
+
+def test_table_with_alignment_and_escaped_pipes():
+    [table] = _blocks("| a | b | c | d |\n|:--|:-:|--:|---|\n| 1 | 2 \\| 3 | x |\n| only |")
+    assert table["align"] == ["left", "center", "right", None]
+    header, first, short = table["c"]
+    assert [cell["t"] for cell in header["c"]] == ["th"] * 4
+    assert [cell["c"] for cell in first["c"]] == [["1"], ["2 | 3"], ["x"], []]
+    assert [cell["c"] for cell in short["c"]] == [["only"], [], [], []]
+
+
+def test_nested_lists():
+    [outer] = _blocks("3. three\n4. four\n   - nested\n   - more\n     1. deeper\n5. five")
+    assert (outer["t"], outer["start"], outer["tight"]) == ("ol", 3, True)
+    assert len(outer["c"]) == 3
+    inner = outer["c"][1]["c"][1]
+    assert inner["t"] == "ul" and [li["c"][0]["c"] for li in inner["c"]] == [["nested"], ["more"]]
+    assert inner["c"][1]["c"][1]["c"][0]["c"] == [{"t": "p", "c": ["deeper"]}]
+
+    [loose] = _blocks("- a\n\n- b")
+    assert loose["tight"] is False
+
+
+def test_headings_quotes_and_rules():
+    assert _blocks("# One #\nTwo\n---\n> quoted\nlazy\n\n***") == [
+        {"t": "h", "d": 1, "c": ["One"]},
+        {"t": "h", "d": 2, "c": ["Two"]},
+        {"t": "quote", "c": [{"t": "p", "c": ["quoted\nlazy"]}]},
+        {"t": "hr"},
+    ]
+
+
+def test_fenced_code_without_pygments(monkeypatch):
+    monkeypatch.setattr(markdown, "pygments", None)
+    assert _blocks("```c\n  int x;\n```\n~~~\nplain\n~~~") == [
+        {"t": "code", "lang": "c", "hl": False, "c": ["  int x;"]},
+        {"t": "code", "lang": "", "hl": False, "c": ["plain"]},
+    ]
+
+
+def test_fenced_code_with_pygments():
+    pytest.importorskip("pygments")
+    [code] = _blocks("```c\nint main() { return 0; }\n```")
+    assert code["hl"] is True
+    assert ["keyword", "int"] in code["c"] and ["keyword", "return"] in code["c"]
+    assert "".join(t if isinstance(t, str) else t[1] for t in code["c"]) == "int main() { return 0; }"
+    [unknown] = _blocks("```nosuchlang\nx\n```")
+    assert unknown == {"t": "code", "lang": "nosuchlang", "hl": False, "c": ["x"]}
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from conftest import lesson
+
+from content_tools.common import dump_json
+from content_tools.jsonindex import Span, build_index
+from content_tools.patch import PatchError, Splice, apply_splices, find_lesson_file, patch_lessons, replace_lesson
+
+
+def _outside(data: bytes, span: Span) -> tuple[bytes, bytes]:
+    return data[:span.start], data[span.end:]
+
+
+def test_replacing_a_lesson_leaves_every_other_byte_alone(root, curriculum):
+    path = root / "data" / "curriculum" / "c.json"
+    before = path.read_bytes()
+    span = build_index(before).lesson("c2").span
+    new = lesson("c2", content="Rewritten, with \"quotes\" and ünïcode.")
+
+    assert patch_lessons(path, lessons={"c2": new}) == ["c2"]
+
+    after = path.read_bytes()
+    new_span = build_index(after).lesson("c2").span
+    assert _outside(after, new_span) == _outside(before, span)
+    curriculum[0]["lessons"][1] = new
+    assert after == dump_json(curriculum).encode("utf-8")
+
+
+def test_replacing_a_field_leaves_every_other_byte_alone(root, curriculum):
+    path = root / "data" / "curriculum" / "c.json"
+    before = path.read_bytes()
+    span = build_index(before).lesson("c3").fields["quizQuestions"]
+    quiz = [{"id": 1, "text": "New?", "options": ["x", "y", "z"], "correctAnswer": 2, "explanation": "z"}]
+
+    assert patch_lessons(path, fields={"c3": {"quizQuestions": quiz, "title": "Lesson c3"}}) == ["c3"]
+
+    after = path.read_bytes()
+    new_span = build_index(after).lesson("c3").fields["quizQuestions"]
+    assert _outside(after, new_span) == _outside(before, span)
+    curriculum[1]["lessons"][0]["quizQuestions"] = quiz
+    assert after == dump_json(curriculum).encode("utf-8")
+
+
+def test_unchanged_replacements_do_not_write(root, curriculum):
+    path = root / "data" / "curriculum" / "c.json"
+    mtime = path.stat().st_mtime_ns
+    assert patch_lessons(path, lessons={"c1": curriculum[0]["lessons"][0]}) == []
+    assert not replace_lesson(path, curriculum[1]["lessons"][1])
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_several_lessons_in_one_pass(root, curriculum):
+    path = root / "data" / "curriculum" / "c.json"
+    changed = patch_lessons(
+        path,
+        lessons={"c4": lesson("c4", content="filled in")},
+        fields={"c1": {"content": "short"}},
+    )
+    assert sorted(changed) == ["c1", "c4"]
+    doc = json.loads(path.read_bytes())
+    assert doc[0]["lessons"][0]["content"] == "short"
+    assert doc[1]["lessons"][1]["content"] == "filled in"
+
+
+def test_errors_leave_the_file_untouched(root, curriculum):
+    path = root / "data" / "curriculum" / "c.json"
+    before = path.read_bytes()
+    with pytest.raises(PatchError, match="has id"):
+        patch_lessons(path, lessons={"c1": lesson("c9")})
+    with pytest.raises(PatchError, match="no 'missing' field"):
+        patch_lessons(path, fields={"c1": {"missing": "x"}})
+    with pytest.raises(KeyError, match="c99"):
+        patch_lessons(path, lessons={"c99": lesson("c99")})
+    assert path.read_bytes() == before
+
+
+def test_overlapping_splices_are_rejected():
+    with pytest.raises(PatchError, match="overlapping"):
+        apply_splices(b"0123456789", [Splice(Span(1, 5), b"a"), Splice(Span(4, 6), b"b")])
+    assert apply_splices(b"0123456789", [Splice(Span(6, 8), b"B"), Splice(Span(1, 3), b"A")]) == b"0A345B89"
+
+
+def test_find_lesson_file(root, curriculum):
+    assert find_lesson_file("c3") == root / "data" / "curriculum" / "c.json"
+    with pytest.raises(KeyError):
+        find_lesson_file("c99")
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import copy
+
+from content_tools import practice
+
+
+def test_compiling_is_lossless(root, topic):
+    out = root / "public" / "content" / "practice"
+    topics = practice.load_topics()
+    expected = copy.deepcopy(topics)
+    index = practice.compile_bank(topics, out)
+    assert [t["id"] for t in index["topics"]] == ["arrays"]
+    assert practice.hydrate(index, out) == expected
+
+
+def test_stale_brotli_siblings_are_removed(root, topic, monkeypatch):
+    out = root / "public" / "content" / "practice"
+    out.mkdir(parents=True)
+    stale = [out / "index.json.br", out / "old.json", out / "old.json.gz"]
+    for path in stale:
+        path.write_bytes(b"stale")
+    monkeypatch.setattr(practice, "brotli", None)
+
+    index = practice.compile_bank(practice.load_topics(), out)
+    names = sorted(p.name for p in out.iterdir())
+    assert names == sorted(
+        f"{name}{suffix}" for name in ("index.json", index["starters"], index["topics"][0]["file"]) for suffix in ("", ".gz")
+    )
+
+    (out / "index.json.br").write_bytes(b"stale")
+    practice.compile_bank(practice.load_topics(), out, prune=False)
+    assert not (out / "index.json.br").exists()
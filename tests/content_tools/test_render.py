@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from content_tools import markdown, render
+
+
+def test_cache_hits_follow_the_content_hash(tmp_path):
+    texts = ["# One", "two *words*", "# One"]
+    trees, hits = render.render_many(texts, jobs=1, cache_root=tmp_path)
+    assert hits == 0
+    assert trees == [markdown.parse(t) for t in texts]
+    assert len(list(tmp_path.rglob("*.json"))) == 2  # the duplicate is rendered once
+
+    assert render.render_many(texts, jobs=1, cache_root=tmp_path) == (trees, 3)
+    edited, hits = render.render_many(["# One", "two *words*!"], jobs=1, cache_root=tmp_path)
+    assert hits == 1
+    assert edited[1] == markdown.parse("two *words*!")
+
+
+def test_parser_version_and_no_cache_miss(tmp_path, monkeypatch):
+    render.render_many(["a"], jobs=1, cache_root=tmp_path)
+    assert render.render_many(["a"], jobs=1, use_cache=False, cache_root=tmp_path)[1] == 0
+    monkeypatch.setattr(markdown, "AST_VERSION", markdown.AST_VERSION + 1)
+    assert render.render_many(["a"], jobs=1, cache_root=tmp_path)[1] == 0
+
+
+def test_pool_gives_the_same_trees(tmp_path, monkeypatch):
+    monkeypatch.setattr(render, "POOL_THRESHOLD", 2)
+    texts = [f"lesson {i}\n\n- item" for i in range(4)]
+    trees, _ = render.render_many(texts, jobs=2, cache_root=tmp_path)
+    assert trees == [markdown.parse(t) for t in texts]
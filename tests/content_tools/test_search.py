@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import pytest
+from conftest import lesson
+
+from content_tools import search
+from content_tools.common import dump_json, load_json
+
+
+@pytest.fixture
+def corpus(root, topic):
+    levels = [
+        {"id": "l1", "lessons": [
+            lesson("r1", title="Recursion basics", content="A recursive function calls itself.", quizQuestions=[]),
+            lesson("r2", title="Loops", content="for loops and while loops; recursion is mentioned once.",
+                   quizQuestions=[]),
+            lesson("r3", title="Pointers", content="Memory addresses and records.", quizQuestions=[]),
+        ]},
+    ]
+    (root / "data" / "curriculum" / "c.json").write_text(dump_json(levels), encoding="utf-8")
+    return levels
+
+
+def _ids(index: search.SearchIndex, query: str) -> list[str]:
+    return [doc[1] for _score, doc in index.search(query)]
+
+
+def test_assign_slots_keeps_indexes_stable():
+    previous = ["lesson:a", "lesson:b", "lesson:c", "lesson:d", "lesson:e"]
+    assert search.assign_slots(["lesson:e", "lesson:a", "lesson:c", "lesson:d", "lesson:f"], previous) == [
+        "lesson:a", None, "lesson:c", "lesson:d", "lesson:e", "lesson:f",
+    ]
+    # Trailing holes are dropped rather than kept.
+    assert search.assign_slots(previous[:4], previous) == previous[:4]
+    assert search.assign_slots(["lesson:x"], []) == ["lesson:x"]
+
+
+def test_assign_slots_compacts_once_a_quarter_are_holes():
+    previous = ["a", "b", "c", "d", "e", "f", "g", "h"]
+    assert search.assign_slots(["a", "c", "e", "f", "g", "h"], previous) == ["a", None, "c", None, "e", "f", "g", "h"]
+    assert search.assign_slots(["a", "e", "f", "g", "h", "new"], previous) == ["a", "e", "f", "g", "h", "new"]
+
+
+def test_plan_shards_reuses_previous_starts(monkeypatch):
+    monkeypatch.setattr(search, "SHARD_TARGET_BYTES", 10)
+    sizes = {"aa": 6, "ab": 6, "ba": 6, "ca": 6}
+    assert search.plan_shards(sizes, []) == [["aa", "ab"], ["ba", "ca"]]
+    # New keys join the shard they sort into; nothing else moves.
+    grown = {**sizes, "a0": 2, "bb": 6}
+    assert search.plan_shards(grown, ["aa", "ba"]) == [["a0", "aa", "ab"], ["ba", "bb", "ca"]]
+    # Only a shard past twice the target is split again.
+    assert search.plan_shards({**grown, "cb": 6}, ["aa", "ba"]) == [["a0", "aa", "ab"], ["ba", "bb"], ["ca", "cb"]]
+
+
+def test_editing_one_document_rewrites_only_its_shards(root, corpus, monkeypatch):
+    monkeypatch.setattr(search, "SHARD_TARGET_BYTES", 1)  # one shard per two-letter key
+    out = root / "public" / "content" / "search"
+    meta, changed = search.build(out)
+    assert sorted(changed) == ["p1", "p2", "p3", "r1", "r2", "r3"]
+    before = {p.name: load_json(p)["terms"] for p in out.glob("terms.*.json")}
+
+    corpus[0]["lessons"][2]["content"] = "Memory addresses and zebras."  # gains "zebras", loses "records"
+    (root / "data" / "curriculum" / "c.json").write_text(dump_json(corpus), encoding="utf-8")
+    new_meta, changed = search.build(out)
+    after = {p.name: load_json(p)["terms"] for p in out.glob("terms.*.json")}
+
+    assert changed == ["r3"]
+    assert [d[:2] for d in new_meta["docs"]] == [d[:2] for d in meta["docs"]]
+    gone = {t for name in before.keys() - after.keys() for t in before[name]}
+    added = {t for name in after.keys() - before.keys() for t in after[name]}
+    assert gone == {"records", "recursion", "recursive"}  # the "re" shard
+    assert added == {"recursion", "recursive", "zebras"}  # "re" without records, and a new "ze" shard
+    assert len(after.keys() - before.keys()) == 2
+
+
+def test_prefix_queries_and_ranking(root, corpus):
+    out = root / "public" / "content" / "search"
+    search.build(out)
+    index = search.SearchIndex(out)
+    assert _ids(index, "recursion") == ["r1", "r2"]  # title beats a passing mention
+    assert _ids(index, "loops") == ["r2"]
+    assert set(_ids(index, "rec")) == {"r1", "r2", "r3"}  # recursion, recursive, records
+    assert _ids(index, "rec ") == []  # a finished word is not a prefix
+    assert _ids(index, "recursive function") == ["r1"]
+    assert set(_ids(index, "answer")) == {"p1", "p2", "p3"}
+    assert _ids(index, "the") == []
+    [(_score, doc)] = index.search("pointers")
+    assert doc == ["lesson", "r3", "c", "Pointers"]
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import copy
+
+from conftest import lesson
+
+from content_tools import markdown, shard
+from content_tools.common import dump_json, load_json
+
+
+def _lessons(levels: list[dict]) -> list[dict]:
+    return [l for level in levels for l in level["lessons"]]
+
+
+def test_outline_and_shards_round_trip(root, curriculum):
+    out = root / "public" / "content"
+    manifest, written, removed = shard.build(out, render=False)
+    assert (written, removed) == (4, 0)
+    info = manifest["languages"]["c"]
+    assert info["lessons"] == 4
+
+    outline = load_json(out / info["outline"])
+    assert [level["title"] for level in outline["levels"]] == ["Basics", "Más — ünïcode"]
+    entries = [entry for level in outline["levels"] for entry in level["lessons"]]
+    for entry, source in zip(entries, _lessons(curriculum)):
+        assert set(entry) == {"id", "title", "hash", "size", "quizCount"}
+        assert (entry["id"], entry["title"], entry["quizCount"]) == (source["id"], source["title"], 1)
+        path = out / "lessons" / f"{entry['hash']}.json"
+        assert path.stat().st_size == entry["size"]
+        assert load_json(path) == source
+    assert info["bytes"] == len((out / info["outline"]).read_bytes()) + sum(e["size"] for e in entries)
+
+    assert shard.build(out, render=False)[1:] == (0, 0)
+
+
+def test_duration_is_copied_and_content_is_rendered(root, curriculum):
+    levels = copy.deepcopy(curriculum)
+    levels[0]["lessons"][0]["duration"] = "5 min"
+    (root / "data" / "curriculum" / "c.json").write_text(dump_json(levels), encoding="utf-8")
+    out = root / "public" / "content"
+    manifest, _, _ = shard.build(out)
+    first = load_json(out / manifest["languages"]["c"]["outline"])["levels"][0]["lessons"][0]
+    assert first["duration"] == "5 min"
+    body = load_json(out / "lessons" / f"{first['hash']}.json")
+    assert body["contentAst"] == markdown.parse(levels[0]["lessons"][0]["content"])
+
+
+def test_partial_build_keeps_other_languages_and_full_build_prunes(root, curriculum):
+    out = root / "public" / "content"
+    cpp = root / "data" / "curriculum" / "cpp.json"
+    cpp.write_text(dump_json([{"id": "p1", "lessons": [lesson("x1"), lesson("x2")]}]), encoding="utf-8")
+    shard.build(out, render=False)
+    old_shards = {p.name for p in (out / "lessons").iterdir()}
+
+    edited = copy.deepcopy(curriculum)
+    edited[0]["lessons"][0]["content"] = "edited"
+    c_json = root / "data" / "curriculum" / "c.json"
+    c_json.write_text(dump_json(edited), encoding="utf-8")
+    manifest, written, removed = shard.build(out, sources=[c_json], render=False)
+    assert set(manifest["languages"]) == {"c", "cpp"}
+    assert (written, removed) == (1, 0)
+    assert old_shards < {p.name for p in (out / "lessons").iterdir()}  # stale shard kept
+    assert len(list((out / "outline").iterdir())) == 3
+
+    manifest, written, removed = shard.build(out, render=False)
+    assert (written, removed) == (0, 2)  # old c1 shard and old c outline
+    live = {f"{e['hash']}.json" for lang in manifest["languages"].values()
+            for level in load_json(out / lang["outline"])["levels"] for e in level["lessons"]}
+    assert {p.name for p in (out / "lessons").iterdir()} == live
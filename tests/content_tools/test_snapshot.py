@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from content_tools.common import dump_json
+from content_tools.snapshot import SnapshotError, Store, recording
+
+
+@pytest.fixture
+def store(root) -> Store:
+    return Store(root / ".content-store")
+
+
+def _edit(path, change) -> None:
+    text = path.read_text(encoding="utf-8")
+    doc = json.loads(text)
+    change(doc)
+    path.write_text(dump_json(doc) + ("\n" if text.endswith("\n") else ""), encoding="utf-8")
+
+
+def test_record_skips_unchanged_content(store, curriculum, topic):
+    first = store.record("first")
+    assert first is not None
+    assert store.record("again") is None
+    assert store.snapshots() == [first.id]
+    assert set(first.files) == {"data/curriculum/c.json", "public/practice/topic_arrays.json", "public/practice/topics.json"}
+
+
+def test_whole_file_rollback_restores_exact_bytes(root, store, curriculum, topic):
+    c_json = root / "data" / "curriculum" / "c.json"
+    topics = root / "public" / "practice" / "topics.json"
+    odd = root / "public" / "practice" / "topic_odd.json"
+    topics.write_text(topics.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    odd.write_text('{"id": "odd",  "problems": [ ]}', encoding="utf-8")  # not repo formatting: kept raw
+    originals = {p: p.read_bytes() for p in (c_json, topics, odd)}
+    snapshot = store.record("before")
+
+    _edit(c_json, lambda doc: doc[0]["lessons"].pop())
+    topics.write_text("[]", encoding="utf-8")
+    odd.write_text("{}", encoding="utf-8")
+
+    assert store.rollback(snapshot, paths=["data/curriculum/c.json"]) == ["data/curriculum/c.json"]
+    assert c_json.read_bytes() == originals[c_json]
+    assert topics.read_bytes() == b"[]"
+
+    assert sorted(store.rollback(snapshot)) == ["public/practice/topic_odd.json", "public/practice/topics.json"]
+    for path, data in originals.items():
+        assert path.read_bytes() == data
+    with pytest.raises(SnapshotError, match="not in snapshot"):
+        store.rollback(snapshot, paths=["data/curriculum/nope.json"])
+
+
+def test_entry_rollback_restores_only_that_lesson(root, store, curriculum):
+    c_json = root / "data" / "curriculum" / "c.json"
+    snapshot = store.record("before")
+
+    def edit(doc):
+        doc[0]["lessons"][0]["content"] = "broken by a repair run"
+        doc[1]["lessons"][0]["title"] = "kept edit"
+    _edit(c_json, edit)
+
+    assert store.diff(snapshot, store.working_tree()) == {"data/curriculum/c.json": {"changed": ["c1", "c3"]}}
+    assert store.rollback(snapshot, entries=["c1"]) == ["data/curriculum/c.json"]
+    doc = json.loads(c_json.read_bytes())
+    assert doc[0]["lessons"][0] == curriculum[0]["lessons"][0]
+    assert doc[1]["lessons"][0]["title"] == "kept edit"
+
+    with pytest.raises(SnapshotError, match="c99"):
+        store.rollback(snapshot, entries=["c99"])
+    _edit(c_json, lambda doc: doc[1]["lessons"].pop())
+    with pytest.raises(SnapshotError, match="no longer exist"):
+        store.rollback(snapshot, entries=["c4"])
+
+
+def test_entry_rollback_keeps_a_trailing_newline(root, store, topic):
+    path = root / "public" / "practice" / "topic_arrays.json"
+    path.write_text(dump_json(topic) + "\n", encoding="utf-8")
+    snapshot = store.record("before")
+    _edit(path, lambda doc: doc["problems"][1].update(title="edited"))
+    store.rollback(snapshot, entries=["p2"])
+    assert path.read_text(encoding="utf-8") == dump_json(topic) + "\n"
+
+
+def test_recording_wraps_a_write(root, store, curriculum):
+    with recording("edit", store):
+        _edit(root / "data" / "curriculum" / "c.json", lambda doc: doc[0].update(title="Edited"))
+    labels = [store.load(i).label for i in store.snapshots()]
+    assert labels == ["before edit", "edit"]
+    before, after = (store.load(i) for i in store.snapshots())
+    assert store.diff(before, after) == {"data/curriculum/c.json": {"file": ["headers or formatting changed"]}}
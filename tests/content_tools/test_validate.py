@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import copy
+
+import pytest
+from conftest import lesson, problem
+
+from content_tools.common import dump_json
+from content_tools.validate import validate
+
+
+def _run(root, jobs=1, cache_file=None):
+    return validate(root / "data" / "curriculum", root / "public" / "practice", root / "public", cache_file, jobs)
+
+
+def _write(path, doc) -> None:
+    path.write_text(doc if isinstance(doc, str) else dump_json(doc), encoding="utf-8")
+
+
+def test_clean_content_passes(root, curriculum, topic):
+    report = _run(root)
+    assert report.errors == []
+    assert report.warnings == ["data/curriculum/c.json: lesson c4: empty content"]
+    assert report.files == 3
+
+
+def _quiz(**fields):
+    return [{"id": 1, "text": "Q?", "options": ["a", "b"], "correctAnswer": 0, **fields}]
+
+
+@pytest.mark.parametrize(
+    "levels, message",
+    [
+        ("[{", "invalid JSON"),
+        ({"id": "l1"}, "expected a JSON array of levels"),
+        ([{"id": "l1", "lessons": {}}], "level 0: expected an object with a lessons array"),
+        ([{"id": "l1", "lessons": [{"title": "t"}]}], "lesson 0.0: missing id"),
+        ([{"id": "l1", "lessons": [lesson("c1", quizQuestions=_quiz(options=[]))]}], "quiz 1: has no options"),
+        ([{"id": "l1", "lessons": [lesson("c1", quizQuestions=_quiz(correctAnswer=2))]}],
+         "quiz 1: correctAnswer 2 is outside options[0..1]"),
+        ([{"id": "l1", "lessons": [lesson("c1", quizQuestions=_quiz(correctAnswer=True))]}],
+         "correctAnswer True is outside"),
+        ([{"id": "l1", "lessons": [lesson("c1", quizQuestions=_quiz(text=""))]}], "quiz 1: missing text"),
+        ([{"id": "l1", "lessons": [lesson("c1", quizQuestions=["oops"])]}], "quiz 0: expected an object, got 'oops'"),
+        ([{"id": "l1", "lessons": [lesson("c1", quizQuestions={"id": 1})]}], "lesson c1: quizQuestions is not an array"),
+        ([{"id": "l1", "lessons": [lesson("c1"), lesson("c1")]}], "lesson id 'c1' appears 2 times"),
+        ([{"id": "l1", "lessons": [lesson("c1", content="![x](/img/missing.png)")]}],
+         "lesson c1 references missing image /img/missing.png"),
+    ],
+)
+def test_curriculum_errors(root, levels, message):
+    _write(root / "data" / "curriculum" / "c.json", levels)
+    errors = _run(root).errors
+    assert len(errors) == 1 and message in errors[0], errors
+
+
+@pytest.mark.parametrize(
+    "doc, message",
+    [
+        ([], "expected a topic object with a problems array"),
+        ({"id": "arrays", "problems": [{"title": "no id"}]}, "problem 0: missing id"),
+        ({"id": "arrays", "problems": [problem("p1", title="")]}, "problem p1: missing title"),
+        ({"id": "arrays", "problems": [problem("p1", test_cases=[])]}, "problem p1: no test_cases"),
+        ({"id": "arrays", "problems": [problem("p1", test_cases=[{"stdin": "1"}])]},
+         "problem p1 test case 0: missing expected_output"),
+        ({"id": "arrays", "problems": [problem("p1", test_cases=["1"])]},
+         "problem p1 test case 0: expected an object, got '1'"),
+        ({"id": "arrays", "problems": [problem("p1", test_cases="1")]}, "problem p1: test_cases is not an array"),
+    ],
+)
+def test_practice_errors(root, topic, doc, message):
+    _write(root / "public" / "practice" / "topic_arrays.json", doc)
+    errors = [e for e in _run(root).errors if "topics.json lists" not in e]
+    assert len(errors) == 1 and message in errors[0], errors
+
+
+def test_cross_file_errors(root, curriculum, topic):
+    practice = root / "public" / "practice"
+    _write(root / "data" / "curriculum" / "cpp.json", [{"id": "l1", "lessons": [lesson("c2")]}])
+    _write(practice / "topic_strings.json", {"id": "strings", "problems": [problem("p1")]})
+    _write(practice / "topics.json", [{"id": "arrays"}, {"id": "graphs"}, {"id": "arrays"}])
+    errors = _run(root).errors
+    assert "duplicate level id 'l1' in c.json and cpp.json" in errors
+    assert "duplicate lesson id 'c2' in c.json and cpp.json" in errors
+    assert "duplicate problem id 'p1' in topic_arrays.json and topic_strings.json" in errors
+    assert any("topic id 'arrays' is listed more than once" in e for e in errors)
+
+    _write(practice / "topics.json", [{"id": "arrays"}, {"id": "graphs"}])
+    report = _run(root)
+    assert "topics.json lists 'graphs' but practice/topic_graphs.json is missing" in report.errors
+    assert "practice/topic_strings.json is not listed in topics.json" in report.warnings
+
+    _write(practice / "topics.json", [{"title": "no id"}])
+    assert any("expected an array of topics with ids" in e for e in _run(root).errors)
+
+
+def test_warnings(root, curriculum, topic):
+    levels = copy.deepcopy(curriculum)
+    levels[0]["lessons"][0]["quizQuestions"] = _quiz(options=["only"]) + _quiz()
+    _write(root / "data" / "curriculum" / "c.json", levels)
+    hidden = copy.deepcopy(topic)
+    hidden["problems"][0]["test_cases"][0]["isHidden"] = True
+    _write(root / "public" / "practice" / "topic_arrays.json", hidden)
+    warnings = _run(root).warnings
+    assert any("quiz 1: only one option" in w for w in warnings)
+    assert any("duplicate question id" in w for w in warnings)
+    assert any("problem p1: every test case is hidden" in w for w in warnings)
+
+
+def test_backups_are_compared_with_the_live_file(root, curriculum):
+    folder = root / "data" / "curriculum"
+    live = folder / "c.json"
+    _write(folder / "c.backup.json", live.read_text(encoding="utf-8"))
+    assert _run(root).warnings[-1] == "c.backup.json: identical copy of c.json"
+
+    drifted = copy.deepcopy(curriculum)
+    drifted[0]["lessons"].pop()
+    _write(folder / "c.backup.json", drifted)
+    assert "c.backup.json: drifted from c.json (0 lessons only in backup, 1 only in live file)" in _run(root).warnings
+
+    _write(folder / "gone.json.backup", drifted)
+    assert "gone.json.backup: backup of a file that no longer exists" in _run(root).warnings
+    assert _run(root).errors == []  # backups never count as duplicate ids
+
+
+def test_cache_and_pool_give_the_same_report(root, curriculum, topic, tmp_path):
+    for i in range(10):
+        _write(root / "data" / "curriculum" / f"lang{i}.json", [{"id": f"l{i}x", "lessons": [lesson(f"x{i}")]}])
+    cache = tmp_path / "validate.json"
+    cold = _run(root, jobs=2, cache_file=cache)
+    warm = _run(root, jobs=2, cache_file=cache)
+    assert cold.checked == cold.files == 13
+    assert warm.checked == 0
+    assert (warm.errors, warm.warnings) == (cold.errors, cold.warnings) == ([], _run(root).warnings)
@@ -1,3 +1,4 @@
+import fs from 'fs';
 import path from 'path';
 import { defineConfig, loadEnv } from 'vite';
 import react from '@vitejs/plugin-react';
@@ -16,6 +17,15 @@ export default defineConfig(({ mode }) => {
     },
     plugins: [
       react(),
+      {
+        // public/content/ is written by the opt-in `npm run content` step and no client code
+        // reads it yet; keep it out of dist so it never ships in the web or Android build.
+        name: 'exclude-generated-content',
+        apply: 'build',
+        closeBundle() {
+          fs.rmSync(path.resolve(__dirname, 'dist', 'content'), { recursive: true, force: true });
+        },
+      },
       // VitePWA({
       //   registerType: 'prompt',
       //   includeAssets: ['favicon.ico', 'icons/*'],